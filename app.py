@@ -1,22 +1,39 @@
-import gradio as gr
-import pandas as pd
+from startup import (
+    timed_import, lazy_import, import_report, elapsed_since_start,
+    wait_for_port_free, wait_for_http_ready
+)
 import json
 import os
 import time
 import threading
 import logging
 import sys
-from datetime import datetime
-from database import CharacterDatabase
-from file_manager import CharacterFileManager
-import numpy as np
-import soundfile as sf
 import zipfile
-from tqdm import tqdm
-from action_parameters import ALL_ACTION_PARAMS
-from dialogue_generation_ui_v2 import build_dialogue_generation_ui
-from voice_pack_exporter import VoicePackExporter
-from csv_parameter_loader import CSVParameterLoader
+import webbrowser
+from datetime import datetime
+
+with timed_import('gradio'):
+    import gradio as gr
+with timed_import('database, file_manager, action_parameters, csv_parameter_loader'):
+    from database import get_database
+    from file_manager import CharacterFileManager
+    from action_parameters import ALL_ACTION_PARAMS
+    from csv_parameter_loader import CSVParameterLoader
+    from dialogue_table import DialogueTable
+    import voice_pipeline
+    from job_scheduler import get_scheduler
+with timed_import('dialogue_generation_ui_v2'):
+    from dialogue_generation_ui_v2 import build_dialogue_generation_ui
+with timed_import('voice_pack_exporter'):
+    from voice_pack_exporter import VoicePackExporter
+with timed_import('device_registry'):
+    from device_registry import DeviceRegistry
+with timed_import('metrics'):
+    import metrics
+    import profiling
+
+# pandas在首次使用表格时才导入（gradio自身已导入时不再产生额外开销）
+pd = lazy_import('pandas')
 
 # 设置日志配置
 def setup_logging():
@@ -77,7 +94,7 @@ def patched_json_schema_to_python_type(schema):
 gradio_client.utils.json_schema_to_python_type = patched_json_schema_to_python_type
 
 # Initialize database and file manager
-db = CharacterDatabase()
+db = get_database()
 file_manager = CharacterFileManager()
 
 def get_language_encoding(language):
@@ -1123,37 +1140,25 @@ def dialogue_generation_ui():
             if not character_id or not llm_config_id:
                 return df_data, "Error: Character and LLM Configuration must be selected."
         
-            df = pd.DataFrame(df_data)
-            if df.empty:
-                return df, "Error: Dialogue table is empty."
-        
-            # 强制确保数据类型正确，防止nan问题
-            if '动作参数' in df.columns:
-                df['动作参数'] = df['动作参数'].astype(str).fillna('')
-            if '选择' in df.columns:
-                df['选择'] = df['选择'].astype(str)
-            
-            # 确保台词列是字符串类型
-            for col in df.columns:
-                if col not in ['选择', '动作参数']:
-                    df[col] = df[col].astype(str).fillna('')
+            # 只在界面边界转换一次：按动作参数索引的台词表，单行更新为O(1)，缺失值统一为空字符串
+            table = DialogueTable.from_payload(df_data)
+            if not len(table):
+                return table.to_dataframe(), "Error: Dialogue table is empty."
         
             client, system_prompt, user_prompt_template, generation_params = get_llm_client_and_prompts(llm_config_id)
             if not client:
-                return df, "Error: LLM client not configured."
+                return table.to_dataframe(), "Error: LLM client not configured."
         
             # Find selected rows
-            selected_indices = []
-            for index, row in df.iterrows():
-                if str(row.get("选择", "")).lower() in ["true", "1", "yes"]:
-                    selected_indices.append(index)
+            selected_rows = table.selected_rows()
         
-            if not selected_indices:
-                return df, "No dialogues selected for regeneration."
+            if not selected_rows:
+                return table.to_dataframe(), "No dialogues selected for regeneration."
         
             # Regenerate selected dialogues
-            for index in selected_indices:
-                action_param = df.at[index, "动作参数"]
+            column = table.add_column(language)
+            for row in selected_rows:
+                action_param = row.action
                 language_map = {"中文": "Chinese", "English": "English", "日本語": "Japanese"}
                 pronoun_map = {"中文": "你", "English": "you", "日本語": "あなた"}
                 target_language = language_map.get(language, "Chinese")
@@ -1189,15 +1194,16 @@ def dialogue_generation_ui():
                     )
                     
                     generated_content = response.choices[0].message.content
-                    df.at[index, language] = generated_content
+                    row.cells[column] = generated_content
         
                 except Exception as e:
-                    df.at[index, language] = f"ERROR: {e}"
+                    row.cells[column] = f"ERROR: {e}"
         
+            df = table.to_dataframe()
             # Auto-save after regeneration
             auto_save_after_generation(character_id, df)
             
-            return df, f"Regenerated {len(selected_indices)} selected dialogues."
+            return df, f"Regenerated {len(selected_rows)} selected dialogues."
 
         def toggle_regenerate_button(df_value):
             try:
@@ -1904,83 +1910,13 @@ def voice_generation_ui():
         
         def call_single_tts_api(text, filename, voice_group_id, character_name):
             """调用单条TTS生成接口"""
-            import requests
-            import base64
-            import os
-            
-            try:
-                # 准备单条TTS请求数据
-                payload = {
-                    "text": text,
-                    "filename": filename,
-                    "voice_group_id": voice_group_id
-                }
-                
-                # 发送单条TTS请求
-                response = requests.post(
-                    "https://tts.ioioioioio.com:1120/breathvoice/single-tts",
-                    json=payload,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=60,  # 单条请求超时时间
-                    verify=False  # 忽略SSL证书验证
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("success", False):
-                        # 获取base64编码的音频数据
-                        audio_data = result.get("audio_data", "")
-                        if audio_data:
-                            # 解码base64音频数据
-                            audio_bytes = base64.b64decode(audio_data)
-                            
-                            # 创建角色临时文件夹路径（直接在角色文件夹下）
-                            character_dir = f"/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE/Characters/{character_name}"
-                            temp_dir = os.path.join(character_dir, "temp")
-                            os.makedirs(temp_dir, exist_ok=True)
-                            
-                            # 创建临时音频文件
-                            audio_file_path = os.path.join(temp_dir, filename)
-                            with open(audio_file_path, 'wb') as f:
-                                f.write(audio_bytes)
-                            
-                            return {
-                                "success": True,
-                                "audio_path": audio_file_path,
-                                "message": "生成成功"
-                            }
-                        else:
-                            return {
-                                "success": False,
-                                "message": "API返回的音频数据为空"
-                            }
-                    else:
-                        error_msg = result.get("error", "未知错误")
-                        return {
-                            "success": False,
-                            "message": f"API错误: {error_msg}"
-                        }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"HTTP错误: {response.status_code}"
-                    }
-                    
-            except requests.exceptions.Timeout:
-                return {
-                    "success": False,
-                    "message": "请求超时"
-                }
-            except requests.exceptions.RequestException as e:
-                return {
-                    "success": False,
-                    "message": f"网络错误: {str(e)}"
-                }
-            except Exception as e:
-                return {
-                    "success": False,
-                    "message": f"生成失败: {str(e)}"
-                }
+            # 音频写入角色文件夹下的temp文件夹
+            character_dir = f"/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE/Characters/{character_name}"
+            # 通过调度器的TTS资源池执行，限制所有操作者对TTS服务的总并发
+            return get_scheduler().run(
+                'tts', voice_pipeline.call_single_tts_api, text, filename, voice_group_id, character_dir,
+                owner='ui', character=character_name, label=f"TTS {filename}"
+            )
 
         def stop_generation():
             """停止当前的语音生成过程"""
@@ -1991,6 +1927,7 @@ def voice_generation_ui():
                 gr.update(value="用户已停止生成过程")  # 更新状态文本
             )
 
+        @profiling.profiled('tts', lambda a: os.path.join(file_manager.base_path, a['character_name']))
         def generate_selected_voices_sequential(character_name, voice_id, current_data, *checkbox_values):
             """逐条生成选中的语音（支持停止控制和即时音频更新）"""
             # 重置停止标志并显示停止按钮
@@ -2126,42 +2063,9 @@ def voice_generation_ui():
             if not os.path.exists(temp_dir):
                 return gr.update(value="临时文件夹不存在")
             
-            # 定义关键词到文件夹的映射（移除breath和moan）
-            keyword_mapping = {
-                "greeting": "greeting",
-                "impact": "impact", 
-                "reaction": "reaction",
-                "tease": "tease",
-                "long": "touch",
-                "short": "touch",
-                "orgasm": "orgasm"
-            }
-            
-            saved_count = 0
-            moved_files = {}  # 记录移动的文件：原路径 -> 新路径
-            import shutil
-            
-            # 遍历temp文件夹中的所有文件
-            for filename in os.listdir(temp_dir):
-                if filename.endswith('.wav'):
-                    source_path = os.path.join(temp_dir, filename)
-                    
-                    # 检查文件名中包含的关键词
-                    for keyword, folder_name in keyword_mapping.items():
-                        if keyword in filename.lower():
-                            # 创建目标文件夹（直接在角色目录下）
-                            target_folder = os.path.join(character_dir, folder_name)
-                            os.makedirs(target_folder, exist_ok=True)
-                        
-                            # 移动文件到目标文件夹
-                            target_path = os.path.join(target_folder, filename)
-                            try:
-                                shutil.move(source_path, target_path)
-                                moved_files[source_path] = target_path
-                                saved_count += 1
-                                break  # 找到匹配的关键词后跳出循环
-                            except Exception as e:
-                                print(f"移动文件失败 {filename}: {e}")
+            # 按文件名关键词移动到对应子文件夹（breath和moan由素材包提供）
+            moved_files = voice_pipeline.classify_audio_files(character_dir)  # 原路径 -> 新路径
+            saved_count = len(moved_files)
             
             # 更新界面中的音频播放器路径
             updated_outputs = []
@@ -2304,7 +2208,7 @@ def export_ui():
             target_path_input = gr.Textbox(
                 label="📁 目标文件夹路径",
                 value="/Volumes/NO NAME/LB",
-                placeholder="请输入完整的文件夹路径，例如：/Users/username/Desktop/breathKIT",
+                placeholder="请输入完整的文件夹路径，例如：/Users/username/Desktop/breathKIT；多台设备用分号分隔",
                 scale=2,
                 interactive=True
             )
@@ -2332,6 +2236,14 @@ def export_ui():
         
         # 初始化语音包导出器
         voice_exporter = VoicePackExporter()
+        
+        # 设备注册表：缓存目标路径检查和设备发现结果，后台轮询挂载点变化
+        try:
+            device_registry = DeviceRegistry(poll_interval=2.0)
+            device_registry.start()
+        except Exception as e:
+            logger.warning(f"设备注册表启动失败，目标路径将实时检查: {e}")
+            device_registry = None
 
         def get_characters():
             """获取角色列表"""
@@ -2355,6 +2267,9 @@ def export_ui():
             
             return gr.update(choices=material_packs)
 
+        # 角色ID -> (子文件夹修改时间签名, 检查结果)
+        voice_files_cache = {}
+
         def check_voice_files_exist(character_id):
             """检查角色是否有可导出的语音文件"""
             if not character_id:
@@ -2374,6 +2289,19 @@ def export_ui():
                 
                 # 检查指定的子文件夹中是否有wav文件
                 target_folders = ['greeting', 'orgasm', 'reaction', 'tease', 'impact', 'touch']
+                
+                # 子文件夹的修改时间未变化时直接使用上次的结果（增删文件会更新文件夹修改时间）
+                signature = [character_dir]
+                for folder in target_folders:
+                    try:
+                        signature.append(os.stat(os.path.join(character_dir, folder)).st_mtime_ns)
+                    except OSError:
+                        signature.append(None)
+                signature = tuple(signature)
+                cached = voice_files_cache.get(character_id)
+                if cached is not None and cached[0] == signature:
+                    return cached[1]
+                
                 has_wav_files = False
                 
                 for folder in target_folders:
@@ -2388,9 +2316,11 @@ def export_ui():
                             break
                 
                 if not has_wav_files:
-                    return False, "该角色尚不存在可导出的语音。"
-                
-                return True, "角色已选择，可以导出语音包"
+                    result = (False, "该角色尚不存在可导出的语音。")
+                else:
+                    result = (True, "角色已选择，可以导出语音包")
+                voice_files_cache[character_id] = (signature, result)
+                return result
                 
             except Exception as e:
                 return False, f"检查语音文件时出错: {str(e)}"
@@ -2453,12 +2383,40 @@ def export_ui():
             
             return gr.update(interactive=can_inject), gr.update(value=status_msg)
 
-        def validate_target_path(path):
-            """验证目标路径是否有效"""
-            if not path or path.strip() == "":
+        def parse_target_paths(path):
+            """解析目标路径，多台设备的路径用分号或换行分隔"""
+            if not path:
+                return []
+            paths = []
+            for item in path.replace("\n", ";").split(";"):
+                item = item.strip()
+                if item and item not in paths:
+                    paths.append(item)
+            return paths
+
+        def validate_target_path(path, fresh=False):
+            """验证目标路径是否有效（支持多个路径）；fresh为True时跳过缓存重新检查"""
+            paths = parse_target_paths(path)
+            if device_registry is not None:
+                device_registry.set_current_paths(paths)
+            if not paths:
                 return "❌ 请输入目标文件夹路径", False
             
-            path = path.strip()
+            if len(paths) > 1:
+                for item in paths:
+                    status_msg, is_valid = validate_single_target_path(item, fresh)
+                    if not is_valid:
+                        return f"{status_msg}: {item}", False
+                return f"✅ {len(paths)} 个目标文件夹路径均可用", True
+            
+            return validate_single_target_path(paths[0], fresh)
+
+        def validate_single_target_path(path, fresh=False):
+            """验证单个目标路径是否有效（界面事件直接读取设备注册表缓存）"""
+            if device_registry is not None:
+                if fresh:
+                    device_registry.invalidate_path(path)
+                return device_registry.validate_path(path)
             
             # 检查路径是否存在
             if not os.path.exists(path):
@@ -2488,7 +2446,7 @@ def export_ui():
         inject_stop_flag = threading.Event()
         inject_in_progress = threading.Event()
         
-        def inject_to_breathkit(character_id, material_pack, target_path, progress=gr.Progress()):
+        def inject_to_breathkit(character_id, material_pack, target_path, progress=gr.Progress(), request: gr.Request = None):
             """注入语音包到breathKIT设备"""
             if not character_id or not material_pack or not target_path:
                 inject_in_progress.clear()
@@ -2499,8 +2457,8 @@ def export_ui():
                 )
             
             try:
-                # 验证目标路径
-                status_msg, is_valid_path = validate_target_path(target_path)
+                # 验证目标路径（注入前重新检查，不使用缓存）
+                status_msg, is_valid_path = validate_target_path(target_path, fresh=True)
                 if not is_valid_path:
                     inject_in_progress.clear()
                     return (
@@ -2543,15 +2501,37 @@ def export_ui():
                         return file_info
                     return ""
                 
-                # 执行直接拷贝到目标目录
-                result = voice_exporter.copy_voice_pack_to_directory(
-                    source_voices_dir=character_dir,
-                    target_directory=target_path,
-                    character_name=character_name,
-                    progress_callback=progress_callback,
-                    material_pack=material_pack,
-                    stop_flag=inject_stop_flag
-                )
+                target_paths = parse_target_paths(target_path)
+                # 在调度器的设备I/O资源池中执行
+                job_options = {
+                    'owner': getattr(request, 'session_hash', None) or 'local',
+                    'character': character_name,
+                    'label': "注入breathKIT"
+                }
+                if len(target_paths) > 1:
+                    # 多台设备：转换一次，并发写入所有设备
+                    result = get_scheduler().run(
+                        'io', voice_exporter.copy_voice_pack_to_directories,
+                        source_voices_dir=character_dir,
+                        target_directories=target_paths,
+                        character_name=character_name,
+                        progress_callback=progress_callback,
+                        material_pack=material_pack,
+                        stop_flag=inject_stop_flag,
+                        **job_options
+                    )
+                else:
+                    # 执行直接拷贝到目标目录
+                    result = get_scheduler().run(
+                        'io', voice_exporter.copy_voice_pack_to_directory,
+                        source_voices_dir=character_dir,
+                        target_directory=target_paths[0],
+                        character_name=character_name,
+                        progress_callback=progress_callback,
+                        material_pack=material_pack,
+                        stop_flag=inject_stop_flag,
+                        **job_options
+                    )
                 
                 inject_in_progress.clear()
                 
@@ -2562,6 +2542,23 @@ def export_ui():
                         gr.update(visible=False)
                     )
                 
+                if len(target_paths) > 1 and 'targets' in result['details']:
+                    details = result['details']
+                    status_lines = [("✅ " if result['success'] else "⚠️ ") + result['message'].split("\n")[0]]
+                    for target in target_paths:
+                        target_result = details['targets'][target]
+                        icon = "✅" if target_result['success'] else "❌"
+                        status_lines.append(f"{icon} {target}: {target_result['message'].splitlines()[0]}")
+                    status_lines.append(
+                        f"📊 音频文件: {details['audio_files']['processed']}/{details['audio_files']['total']} 处理成功，"
+                        f"BRE文件: {details['bre_files']['converted']}/{details['bre_files']['total']} 转换成功"
+                    )
+                    return (
+                        gr.update(value="\n".join(status_lines)),
+                        gr.update(value="🚀 注入breathKIT", variant="primary", interactive=True),
+                        gr.update(visible=False)
+                    )
+                
                 if result['success']:
                     details = result['details']
                     success_msg = (
@@ -2619,7 +2616,7 @@ def export_ui():
             else:
                 return gr.update(value="🚀 注入breathKIT", variant="primary")
 
-        def export_voice_pack_with_progress(character_id, material_pack, progress=gr.Progress()):
+        def export_voice_pack_with_progress(character_id, material_pack, progress=gr.Progress(), request: gr.Request = None):
             """带进度显示的语音包导出功能"""
             if not character_id:
                 return (
@@ -2666,13 +2663,17 @@ def export_ui():
                         progress_value = 0
                     progress(progress_value, desc=message)
                 
-                # 执行导出，传入素材包选择
-                result = voice_exporter.export_voice_pack(
+                # 执行导出，传入素材包选择（在调度器的CPU资源池中执行）
+                result = get_scheduler().run(
+                    'cpu', voice_exporter.export_voice_pack,
                     character_name=character_name,
                     source_voices_dir=character_dir,
                     output_dir=output_dir,
                     progress_callback=progress_callback,
-                    material_pack=material_pack
+                    material_pack=material_pack,
+                    owner=getattr(request, 'session_hash', None) or 'local',
+                    character=character_name,
+                    label="导出语音包"
                 )
                 
                 if result['success']:
@@ -2727,8 +2728,13 @@ def export_ui():
             outputs=[export_button, status_text]
         )
         
-        # 目标路径变化时更新注入按钮状态
-        target_path_input.change(
+        # 目标路径输入完成（回车或离开输入框）时更新注入按钮状态，不在每次按键时检查路径
+        target_path_input.submit(
+            update_inject_button_state,
+            inputs=[character_dropdown, material_pack_radio, target_path_input],
+            outputs=[inject_breathkit_button, inject_status_text]
+        )
+        target_path_input.blur(
             update_inject_button_state,
             inputs=[character_dropdown, material_pack_radio, target_path_input],
             outputs=[inject_breathkit_button, inject_status_text]
@@ -2755,12 +2761,6 @@ def export_ui():
             show_progress=True
         )
         
-        target_path_input.change(
-            update_inject_button_state,
-            inputs=[character_dropdown, material_pack_radio, target_path_input],
-            outputs=[inject_breathkit_button, inject_status_text]
-        )
-        
         # 动态按钮点击处理
         def handle_inject_button_click(character_id, material_pack, target_path):
             """处理注入按钮点击事件"""
@@ -2812,6 +2812,9 @@ def export_ui():
 
 if __name__ == "__main__":
     logger.info("=== 开始启动 breathVOICE 应用程序 ===")
+    # --profile：导出、台词生成和语音生成时写出性能分析文件（同 BREATHVOICE_PROFILE=1）
+    if '--profile' in sys.argv:
+        profiling.set_mode('full')
     
     # 启动时自动同步参数
     try:
@@ -2826,14 +2829,6 @@ if __name__ == "__main__":
         print(f"参数同步失败: {e}")
         print("参数同步完成！")
     
-    try:
-        logger.info("正在初始化数据库...")
-        db.initialize_database()
-        logger.info("数据库初始化完成")
-    except Exception as e:
-        logger.error(f"数据库初始化失败: {e}", exc_info=True)
-        raise
-
     try:
         logger.info("正在创建Gradio界面...")
         iface = gr.TabbedInterface([
@@ -2868,18 +2863,17 @@ if __name__ == "__main__":
             "/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE"
         ]
     
-    # 添加启动前的延迟，确保系统准备就绪
-    import time
-    logger.info("等待2秒以确保系统准备就绪...")
-    time.sleep(2)
-    
-    try:
-        logger.info(f"尝试在端口 {port} 启动Gradio服务器...")
-        iface.launch(
-            inbrowser=True,  # 修改为True，自动打开浏览器
-            server_port=port, 
-            share=False, 
-            server_name="127.0.0.1",
+    def launch(server_port):
+        """启动服务器（不阻塞），等待首页返回HTTP 200后再打开浏览器并阻塞主线程"""
+        host = "127.0.0.1"
+        # 就绪检查替代固定延迟：端口被上一个实例占用时最多等待2秒
+        if not wait_for_port_free(host, server_port, timeout=2.0):
+            raise OSError(f"端口 {server_port} 已被占用")
+        fastapi_app, _, _ = iface.launch(
+            inbrowser=False,  # 服务器就绪后再打开浏览器
+            server_port=server_port,
+            share=False,
+            server_name=host,
             allowed_paths=allowed_paths,
             app_kwargs={
                 "docs_url": None,
@@ -2887,10 +2881,30 @@ if __name__ == "__main__":
             },
             show_error=True,
             quiet=False,
-            prevent_thread_lock=False,
+            prevent_thread_lock=True,
             favicon_path="/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE/icon/breathVOICE_rounded.png"
         )
-        logger.info(f"Gradio服务器成功启动在 http://127.0.0.1:{port}")
+        # 各阶段耗时指标：/metrics（Prometheus文本）和 /metrics/jobs（最近任务JSON）
+        try:
+            metrics.mount(fastapi_app)
+        except Exception as e:
+            logger.warning(f"挂载指标接口失败: {e}")
+        url = f"http://{host}:{server_port}/"
+        ready_after = wait_for_http_ready(url, timeout=30.0)
+        if ready_after is None:
+            logger.warning(f"服务器在30秒内未返回HTTP 200: {url}")
+        else:
+            logger.info(f"服务器就绪，启动总耗时 {elapsed_since_start():.2f} s（launch后 {ready_after:.2f} s）")
+        logger.info(import_report())
+        # BREATHVOICE_NO_BROWSER=1 时不自动打开浏览器（无界面环境）
+        if os.environ.get('BREATHVOICE_NO_BROWSER', '0') != '1':
+            webbrowser.open(url)
+        logger.info(f"Gradio服务器成功启动在 {url}")
+        iface.block_thread()
+
+    try:
+        logger.info(f"尝试在端口 {port} 启动Gradio服务器...")
+        launch(port)
     except Exception as e:
         logger.error(f"Gradio启动失败: {e}", exc_info=True)
         print(f"Gradio启动失败: {e}")
@@ -2898,24 +2912,9 @@ if __name__ == "__main__":
         try:
             backup_port = port + 1
             logger.info(f"尝试在备用端口 {backup_port} 启动...")
-            iface.launch(
-                inbrowser=True,  # 修改为True，自动打开浏览器
-                server_port=backup_port, 
-                share=False, 
-                server_name="127.0.0.1",
-                allowed_paths=allowed_paths,
-                app_kwargs={
-                    "docs_url": None,
-                    "redoc_url": None,
-                },
-                show_error=True,
-                quiet=False,
-                prevent_thread_lock=False,
-                favicon_path="/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE/icon/breathVOICE_rounded.png"
-            )
-            logger.info(f"Gradio服务器成功启动在备用端口 http://127.0.0.1:{backup_port}")
+            launch(backup_port)
         except Exception as e2:
             logger.error(f"备用启动也失败: {e2}", exc_info=True)
             print(f"备用启动也失败: {e2}")
             print("请手动检查网络连接和端口占用情况")
-            raise
\ No newline at end of file
+            raise
@@ -4,7 +4,7 @@ import openai
 import json
 import zipfile
 import shutil
-import database as db
+from database import get_database
 import os
 from datetime import datetime
 import unicodedata
@@ -14,6 +14,11 @@ import tempfile
 import threading
 import time
 from dialogue_generator import DialogueGenerator
+from dialogue_journal import DialogueJournal, find_orphaned_journals
+from job_scheduler import get_scheduler
+
+# 进程内共享的数据库实例
+db = get_database()
 
 # 写入临时CSV的锁，避免并发读写冲突
 write_lock = threading.Lock()
@@ -23,6 +28,10 @@ TEMPLATE_CSV_PATH = "/Users/Saga/breathVOICE/台词模版.csv"
 
 # 全局状态变量
 current_temp_file = None
+# 临时CSV对应的内存表 + 追加日志
+current_journal = None
+# 最近一次创建临时CSV时从崩溃遗留日志中恢复的临时文件（未恢复时为None）
+recovered_temp_file = None
 generation_state = {"is_running": False, "stop_requested": False}
 
 # 动作参数列表
@@ -168,16 +177,30 @@ def _normalize_template_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         print(f"规范化模板DataFrame失败: {e}")
     return df
 
+def _temp_csv_prefix(character_name):
+    return f"breathvoice_temp_{character_name}_"
+
 def create_temp_csv_file(character_name):
-    """为角色创建临时CSV文件：以模板CSV复制生成临时副本"""
-    global current_temp_file
+    """为角色创建临时CSV文件：上次会话未正常关闭时恢复其临时CSV和日志，否则以模板CSV复制生成临时副本"""
+    global current_temp_file, recovered_temp_file
     
     # 清理之前的临时文件
     cleanup_temp_file()
+    recovered_temp_file = None
     
-    # 创建新的临时文件
     temp_dir = tempfile.gettempdir()
-    temp_filename = f"breathvoice_temp_{character_name}_{int(time.time())}.csv"
+    # 崩溃或强制退出后遗留的日志：恢复最近的一份（重放日志中尚未压缩的台词）
+    for orphan in find_orphaned_journals(temp_dir, _temp_csv_prefix(character_name)):
+        current_temp_file = orphan
+        replayed = _open_journal()
+        if current_journal is not None:
+            recovered_temp_file = orphan
+            print(f"已恢复上次未正常关闭的临时CSV: {orphan}（重放 {replayed} 条日志）")
+            return current_temp_file
+        current_temp_file = None
+    
+    # 创建新的临时文件
+    temp_filename = f"{_temp_csv_prefix(character_name)}{int(time.time())}.csv"
     current_temp_file = os.path.join(temp_dir, temp_filename)
     
     try:
@@ -198,20 +221,45 @@ def create_temp_csv_file(character_name):
             df.to_csv(current_temp_file, index=False, encoding='utf-8')
     except Exception as e:
         print(f"复制模板为临时CSV失败: {e}")
+    _open_journal()
     return current_temp_file
 
+def _open_journal():
+    """为当前临时CSV建立内存表和追加日志，返回重放的日志条数"""
+    global current_journal
+    
+    if current_journal is not None:
+        current_journal.close()
+        current_journal = None
+    if not current_temp_file or not os.path.exists(current_temp_file):
+        return 0
+    try:
+        journal = DialogueJournal(current_temp_file)
+        replayed = journal.load(_read_csv_as_dataframe(current_temp_file))
+        current_journal = journal
+        return replayed
+    except Exception as e:
+        print(f"建立临时CSV日志失败: {e}")
+        return 0
+
+def _read_csv_as_dataframe(target_path):
+    """读取并规范化CSV文件"""
+    df = pd.read_csv(target_path, encoding='utf-8')
+    if '动作参数' in df.columns:
+        df['动作参数'] = df['动作参数'].astype(str).fillna('')
+    return _normalize_template_dataframe(df)
+
 def load_temp_csv_as_dataframe():
-    """加载临时CSV文件为DataFrame"""
+    """加载临时CSV文件为DataFrame（有内存表时直接返回内存快照，不读取磁盘）"""
     global current_temp_file
     
+    if current_journal is not None:
+        return current_journal.snapshot()
+    
     target_path = current_temp_file if (current_temp_file and os.path.exists(current_temp_file)) else TEMPLATE_CSV_PATH
     if target_path and os.path.exists(target_path):
         try:
-                df = pd.read_csv(target_path, encoding='utf-8')
-                if '动作参数' in df.columns:
-                    df['动作参数'] = df['动作参数'].astype(str).fillna('')
-                df = _normalize_template_dataframe(df)
-                return df
+            return _read_csv_as_dataframe(target_path)
         except Exception as e:
             print(f"加载临时CSV文件失败: {e}")
     
@@ -226,6 +274,14 @@ def save_dataframe_to_temp_csv(df):
     """保存DataFrame到临时CSV文件"""
     global current_temp_file
     
+    if current_journal is not None and df is not None:
+        try:
+            current_journal.replace_all(_normalize_template_dataframe(df.copy()))
+            return True
+        except Exception as e:
+            print(f"保存到临时CSV文件失败: {e}")
+            return False
+    
     if current_temp_file and df is not None:
         try:
             # 移除选择列进行保存
@@ -254,12 +310,13 @@ def create_temp_copy_from_existing_csv(character_name, csv_filename):
     
     # 创建临时文件
     temp_dir = tempfile.gettempdir()
-    temp_filename = f"breathvoice_temp_{character_name}_{int(time.time())}.csv"
+    temp_filename = f"{_temp_csv_prefix(character_name)}{int(time.time())}.csv"
     current_temp_file = os.path.join(temp_dir, temp_filename)
     
     try:
         # 复制文件
         shutil.copy2(source_file, current_temp_file)
+        _open_journal()
         return current_temp_file
     except Exception as e:
         print(f"创建临时副本失败: {e}")
@@ -268,7 +325,14 @@ def create_temp_copy_from_existing_csv(character_name, csv_filename):
 
 def cleanup_temp_file():
     """清理临时文件"""
-    global current_temp_file
+    global current_temp_file, current_journal
+    
+    if current_journal is not None:
+        try:
+            current_journal.close()
+        except Exception as e:
+            print(f"关闭临时CSV日志失败: {e}")
+        current_journal = None
     
     if current_temp_file and os.path.exists(current_temp_file):
         try:
@@ -380,10 +444,14 @@ def dialogue_generation_ui():
                     csv_list_text = "\n".join(csv_files)
                     # 状态提示包含任务总数
                     total_tasks = len(df["动作参数"]) if "动作参数" in df.columns else 0
+                    if recovered_temp_file:
+                        status = f"已恢复角色 {character_name} 上次未保存的临时CSV；任务数 {total_tasks}"
+                    else:
+                        status = f"已为角色 {character_name} 创建临时CSV；任务数 {total_tasks}"
                     return (
                         gr.update(value=df, column_widths=_compute_column_widths(df)),
                         csv_list_text,
-                        f"已为角色 {character_name} 创建临时CSV；任务数 {total_tasks}"
+                        status
                     )
                 else:
                     df = load_temp_csv_as_dataframe()
@@ -489,7 +557,7 @@ def dialogue_generation_ui():
                 df = load_temp_csv_as_dataframe()
                 return gr.update(value=df, column_widths=_compute_column_widths(df))
         
-        def run_generation_with_temp_file(character_id, llm_config_id, language):
+        def run_generation_with_temp_file(character_id, llm_config_id, language, request: gr.Request = None):
             """运行生成并写入临时文件"""
             global generation_state
             
@@ -502,7 +570,7 @@ def dialogue_generation_ui():
             generation_state["is_running"] = True
             generation_state["stop_requested"] = False
             
-            # 启动后台线程执行生成并实时写入临时CSV
+            # 在调度器的LLM资源池中执行生成并实时写入临时CSV
             def _bg_worker(cid: int, lid: int, lang: str):
                 try:
                     # 确保已有临时文件可写
@@ -524,19 +592,23 @@ def dialogue_generation_ui():
                         return generation_state.get("stop_requested", False)
                     
                     def table_update_callback(action: str, dialogue: str):
-                        # 将生成内容写入临时CSV对应动作参数行
+                        # 更新内存表对应动作参数行，并追加到日志（定期压缩为临时CSV）
                         try:
                             with write_lock:
-                                df = load_temp_csv_as_dataframe()
-                                if "动作参数" in df.columns and "台词" in df.columns:
-                                    mask = df["动作参数"] == action
-                                    if mask.any():
-                                        df.loc[mask, "台词"] = dialogue
-                                    else:
-                                        # 若不存在该动作参数行，追加一行
-                                        new_row = {"选择": False, "动作参数": action, "台词": dialogue}
-                                        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                                    save_dataframe_to_temp_csv(df)
+                                if current_journal is not None:
+                                    current_journal.set_dialogue(str(action).strip(), dialogue)
+                                else:
+                                    # 日志未能建立时回退为直接读写临时CSV，避免丢失生成结果
+                                    df = load_temp_csv_as_dataframe()
+                                    if "动作参数" in df.columns and "台词" in df.columns:
+                                        mask = df["动作参数"] == str(action).strip()
+                                        if mask.any():
+                                            df.loc[mask, "台词"] = dialogue
+                                        else:
+                                            # 若不存在该动作参数行，追加一行
+                                            new_row = {"选择": False, "动作参数": action, "台词": dialogue}
+                                            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+                                        save_dataframe_to_temp_csv(df)
                         except Exception as e:
                             print(f"写入临时CSV失败: {e}")
                     
@@ -554,10 +626,22 @@ def dialogue_generation_ui():
                 except Exception as e:
                     print(f"后台生成线程错误: {e}")
                 finally:
+                    # 生成结束时压缩日志，临时CSV与内存表一致
+                    if current_journal is not None:
+                        try:
+                            current_journal.compact()
+                        except Exception as e:
+                            print(f"压缩临时CSV日志失败: {e}")
                     generation_state["is_running"] = False
                     generation_state["stop_requested"] = False
             
-            threading.Thread(target=_bg_worker, args=(character_id, llm_config_id, language), daemon=True).start()
+            char = db.get_character(character_id)
+            get_scheduler().submit(
+                'llm', _bg_worker, character_id, llm_config_id, language,
+                owner=getattr(request, 'session_hash', None) or 'local',
+                character=char[1] if char else None,
+                label="台词生成"
+            )
             return "生成已开始...（实时写入临时CSV）"
         
         def stop_generation():
@@ -651,8 +735,6 @@ def export_ui():
     return export_interface
 
 if __name__ == "__main__":
-    db.initialize_database()
-
     iface = gr.TabbedInterface([
         character_ui(),
         llm_config_ui(),
@@ -662,4 +744,4 @@ if __name__ == "__main__":
     ], ["Character Management", "LLM Configuration", "Generate Dialogue", "Voice Generation", "Export Voice Pack"])
 
     port = int(os.environ.get('GRADIO_SERVER_PORT', 7866))
-    iface.launch(inbrowser=True, server_port=port, share=True)
\ No newline at end of file
+    iface.launch(inbrowser=os.environ.get('BREATHVOICE_NO_BROWSER', '0') != '1', server_port=port, share=True)
\ No newline at end of file
@@ -61,7 +61,7 @@ if __name__ == "__main__":
     # 启动应用程序
     port = int(os.environ.get('GRADIO_SERVER_PORT', 7866))
     app.launch(
-        inbrowser=True, 
+        inbrowser=os.environ.get('BREATHVOICE_NO_BROWSER', '0') != '1',  # 无界面环境可关闭自动打开浏览器
         server_port=port, 
         share=False,
         server_name="127.0.0.1"
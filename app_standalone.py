@@ -32,7 +32,7 @@ if RESOURCE_DIR not in sys.path:
     sys.path.insert(0, RESOURCE_DIR)
 
 try:
-    from database import CharacterDatabase
+    from database import get_database
     from file_manager import CharacterFileManager
     from action_parameters import ALL_ACTION_PARAMS
     from dialogue_generation_ui_v2 import build_dialogue_generation_ui
@@ -111,7 +111,7 @@ def open_browser_delayed(url, delay=3):
 
 # 初始化数据库和文件管理器
 try:
-    db = CharacterDatabase()
+    db = get_database()
     file_manager = CharacterFileManager()
     print("✅ 数据库和文件管理器初始化成功")
 except Exception as e:
@@ -315,15 +315,6 @@ def main():
     # 确保目录存在
     ensure_directories()
     
-    # 初始化数据库
-    try:
-        db.initialize_database()
-        print("✅ 数据库初始化成功")
-    except Exception as e:
-        print(f"❌ 数据库初始化失败: {e}")
-        input("按回车键退出...")
-        return
-    
     # 创建界面
     try:
         print("🎨 正在创建用户界面...")
@@ -352,8 +343,9 @@ def main():
         print("⚠️  关闭此窗口将停止程序")
         print("=" * 50)
         
-        # 延迟打开浏览器
-        open_browser_delayed(server_url)
+        # 延迟打开浏览器（BREATHVOICE_NO_BROWSER=1 时不打开）
+        if os.environ.get('BREATHVOICE_NO_BROWSER', '0') != '1':
+            open_browser_delayed(server_url)
         
         # 启动Gradio服务器
         iface.launch(
@@ -0,0 +1,348 @@
+import math
+import logging
+
+from startup import lazy_import
+
+np = lazy_import('numpy')
+
+# 标准化算法版本，增益计算或限幅方式发生变化时递增（缓存签名使用）
+NORMALIZER_VERSION = 2
+
+
+class AudioNormalizer:
+    """音频电平标准化引擎
+
+    单次扫描计算RMS与峰值（不产生整段临时数组），增益原地施加；
+    支持可选的LUFS响度目标、软限幅、真峰值估计，以及整批文件统一响度。
+    """
+
+    # ITU-R BS.1770 门限参数
+    ABSOLUTE_GATE_LUFS = -70.0
+    RELATIVE_GATE_LU = -10.0
+
+    def __init__(self, target_dbfs=-10.0, target_lufs=None, limiter_threshold=None,
+                 peak_ceiling=1.0, true_peak=False, true_peak_oversample=4):
+        """
+        Args:
+            target_dbfs (float): RMS目标电平（dBFS），未设置LUFS目标时使用
+            target_lufs (float): 可选的LUFS响度目标，设置后优先于target_dbfs
+            limiter_threshold (float): 软限幅起始电平（线性幅度，如0.9）；None表示不限幅，超峰值时整体降增益
+            peak_ceiling (float): 峰值上限（线性幅度）
+            true_peak (bool): 是否使用过采样估计真峰值
+            true_peak_oversample (int): 真峰值估计的过采样倍数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.target_dbfs = target_dbfs
+        self.target_lufs = target_lufs
+        self.limiter_threshold = limiter_threshold
+        self.peak_ceiling = peak_ceiling
+        self.true_peak = true_peak
+        self.true_peak_oversample = true_peak_oversample
+
+    def signature(self, target_dbfs=None):
+        """标准化参数签名：算法版本和所有影响输出的参数"""
+        return (f"normalizer=v{NORMALIZER_VERSION};"
+                f"dbfs={self.target_dbfs if target_dbfs is None else target_dbfs};lufs={self.target_lufs};"
+                f"limiter={self.limiter_threshold};ceiling={self.peak_ceiling};"
+                f"true_peak={self.true_peak};oversample={self.true_peak_oversample}")
+
+    @staticmethod
+    def _as_float_array(audio_data, in_place):
+        """转换为浮点数组；in_place=False时总是返回副本"""
+        if in_place and isinstance(audio_data, np.ndarray) and audio_data.dtype.kind == 'f' \
+                and audio_data.flags.writeable:
+            return audio_data
+        dtype = audio_data.dtype if getattr(audio_data, 'dtype', None) is not None \
+            and audio_data.dtype.kind == 'f' else np.float32
+        return np.array(audio_data, dtype=dtype, copy=True)
+
+    def measure(self, audio_data, sample_rate=None):
+        """
+        单次扫描测量RMS、峰值和（可选）LUFS响度
+
+        Args:
+            audio_data (numpy.ndarray): 音频数据，单声道(n,)或多声道(n, ch)
+            sample_rate (int): 采样率，计算LUFS或真峰值时需要
+
+        Returns:
+            dict: {'rms', 'peak', 'dbfs', 'lufs', 'samples'}
+        """
+        flat = np.ravel(audio_data)
+        samples = flat.size
+        if samples == 0:
+            return {'rms': 0.0, 'peak': 0.0, 'dbfs': -math.inf, 'lufs': None, 'samples': 0}
+
+        # 点积求能量、max/min求峰值，均为归约运算，不分配整段临时数组
+        energy = float(np.dot(flat, flat))
+        rms = math.sqrt(energy / samples)
+        peak = max(abs(float(flat.max())), abs(float(flat.min())))
+
+        if self.true_peak and sample_rate:
+            peak = max(peak, self.estimate_true_peak(audio_data))
+
+        lufs = None
+        if self.target_lufs is not None and sample_rate:
+            lufs = self.integrated_loudness(audio_data, sample_rate)
+
+        return {
+            'rms': rms,
+            'peak': peak,
+            'dbfs': 20 * math.log10(rms) if rms > 0 else -math.inf,
+            'lufs': lufs,
+            'samples': samples
+        }
+
+    def compute_gain(self, stats, target_dbfs=None, target_lufs=None):
+        """
+        根据测量结果计算线性增益（未施加峰值约束）
+
+        Returns:
+            float: 线性增益；静音时返回1.0
+        """
+        if stats['rms'] == 0:
+            return 1.0
+        target_lufs = self.target_lufs if target_lufs is None else target_lufs
+        if target_lufs is not None and stats.get('lufs') is not None and math.isfinite(stats['lufs']):
+            gain_db = target_lufs - stats['lufs']
+        else:
+            target_dbfs = self.target_dbfs if target_dbfs is None else target_dbfs
+            gain_db = target_dbfs - stats['dbfs']
+        return 10 ** (gain_db / 20)
+
+    def apply_gain(self, audio_data, gain, peak):
+        """
+        原地施加增益，并按峰值上限降增益或软限幅
+
+        Args:
+            audio_data (numpy.ndarray): 可写的浮点音频数据
+            gain (float): 线性增益
+            peak (float): 施加增益前的峰值
+
+        Returns:
+            numpy.ndarray: 处理后的音频数据（与输入为同一数组）
+        """
+        if self.limiter_threshold is None and peak * gain > self.peak_ceiling:
+            # 防止削波：整体降低增益，使峰值恰好等于上限
+            gain = self.peak_ceiling / peak
+        if gain != 1.0:
+            np.multiply(audio_data, gain, out=audio_data)
+        if self.limiter_threshold is not None and peak * gain > self.limiter_threshold:
+            self.soft_limit(audio_data)
+        return audio_data
+
+    def soft_limit(self, audio_data):
+        """
+        原地软限幅：超过阈值的部分以tanh曲线平滑压缩到峰值上限以内
+
+        只对超过阈值的样本做计算，通常只占很小比例。
+        """
+        threshold = self.limiter_threshold
+        knee = self.peak_ceiling - threshold
+        if knee <= 0:
+            np.clip(audio_data, -self.peak_ceiling, self.peak_ceiling, out=audio_data)
+            return audio_data
+        flat = audio_data.reshape(-1)
+        idx = np.flatnonzero((flat > threshold) | (flat < -threshold))
+        if idx.size:
+            values = flat[idx]
+            magnitude = np.abs(values)
+            limited = threshold + knee * np.tanh((magnitude - threshold) / knee)
+            flat[idx] = np.copysign(limited, values)
+            if not np.shares_memory(flat, audio_data):
+                # 非连续数组reshape得到的是副本，需要写回
+                audio_data[...] = flat.reshape(audio_data.shape)
+        return audio_data
+
+    def normalize(self, audio_data, sample_rate=None, target_dbfs=None, target_lufs=None, in_place=False):
+        """
+        将音频标准化到目标电平
+
+        Args:
+            audio_data (numpy.ndarray): 输入音频数据
+            sample_rate (int): 采样率（LUFS目标或真峰值时需要）
+            target_dbfs (float): 覆盖默认的RMS目标
+            target_lufs (float): 覆盖默认的LUFS目标
+            in_place (bool): 为True且输入为可写浮点数组时直接在输入上修改
+
+        Returns:
+            numpy.ndarray: 标准化后的音频数据
+        """
+        data = self._as_float_array(audio_data, in_place)
+        if target_lufs is not None and self.target_lufs is None:
+            stats = AudioNormalizer(
+                target_lufs=target_lufs, true_peak=self.true_peak,
+                true_peak_oversample=self.true_peak_oversample
+            ).measure(data, sample_rate)
+        else:
+            stats = self.measure(data, sample_rate)
+
+        # 避免除零错误
+        if stats['rms'] == 0:
+            return data
+
+        gain = self.compute_gain(stats, target_dbfs=target_dbfs, target_lufs=target_lufs)
+        return self.apply_gain(data, gain, stats['peak'])
+
+    def normalize_batch(self, audio_list, sample_rates=None, target_dbfs=None, target_lufs=None, in_place=False):
+        """
+        将一批音频标准化到统一响度
+
+        先对整批做一次测量扫描；未指定目标时以整批的能量平均响度作为共同目标，
+        然后逐个施加增益，使不同台词之间电平一致。
+
+        Args:
+            audio_list (list): 音频数组列表
+            sample_rates (list or int): 对应的采样率
+            target_dbfs (float): 共同RMS目标，None时使用整批平均值
+            target_lufs (float): 共同LUFS目标（需要采样率）
+            in_place (bool): 是否原地修改输入数组
+
+        Returns:
+            tuple: (标准化后的音频列表, 统计信息dict)
+        """
+        if sample_rates is None or isinstance(sample_rates, int):
+            sample_rates = [sample_rates] * len(audio_list)
+
+        measurer = self
+        if target_lufs is not None and self.target_lufs is None:
+            measurer = AudioNormalizer(target_lufs=target_lufs, true_peak=self.true_peak,
+                                       true_peak_oversample=self.true_peak_oversample)
+        use_lufs = measurer.target_lufs is not None and all(sample_rates)
+
+        arrays = [self._as_float_array(a, in_place) for a in audio_list]
+        stats_list = [measurer.measure(a, sr) for a, sr in zip(arrays, sample_rates)]
+
+        # 未指定共同目标时，计算整批的能量平均响度
+        if use_lufs:
+            common_target = target_lufs if target_lufs is not None else self.target_lufs
+        elif target_dbfs is not None:
+            common_target = target_dbfs
+        else:
+            total_energy = sum(s['rms'] ** 2 * s['samples'] for s in stats_list)
+            total_samples = sum(s['samples'] for s in stats_list)
+            mean_rms = math.sqrt(total_energy / total_samples) if total_samples else 0.0
+            common_target = 20 * math.log10(mean_rms) if mean_rms > 0 else self.target_dbfs
+
+        results = []
+        peak_limited = 0
+        for data, stats in zip(arrays, stats_list):
+            if stats['rms'] == 0:
+                results.append(data)
+                continue
+            if use_lufs:
+                gain = measurer.compute_gain(stats, target_lufs=common_target)
+            else:
+                gain = self.compute_gain(stats, target_dbfs=common_target)
+            if self.limiter_threshold is None and stats['peak'] * gain > self.peak_ceiling:
+                peak_limited += 1
+            results.append(self.apply_gain(data, gain, stats['peak']))
+
+        return results, {
+            'target': common_target,
+            'unit': 'LUFS' if use_lufs else 'dBFS',
+            'files': len(arrays),
+            'peak_limited': peak_limited,
+            'measurements': stats_list
+        }
+
+    def estimate_true_peak(self, audio_data):
+        """通过FFT过采样估计真峰值（inter-sample peak）"""
+        data = np.asarray(audio_data, dtype=np.float64)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        n = data.shape[0]
+        if n < 2:
+            return float(np.max(np.abs(data))) if n else 0.0
+        factor = self.true_peak_oversample
+        peak = 0.0
+        for ch in range(data.shape[1]):
+            spectrum = np.fft.rfft(data[:, ch])
+            upsampled = np.fft.irfft(spectrum, n=n * factor)
+            upsampled *= factor
+            peak = max(peak, abs(float(upsampled.max())), abs(float(upsampled.min())))
+        return peak
+
+    @staticmethod
+    def _k_weighting_response(freqs, sample_rate):
+        """BS.1770 K加权（高架滤波 + 高通）在给定频点的功率响应"""
+        def biquad_power(b, a):
+            w = 2 * np.pi * freqs / sample_rate
+            z1 = np.exp(-1j * w)
+            z2 = z1 * z1
+            h = (b[0] + b[1] * z1 + b[2] * z2) / (a[0] + a[1] * z1 + a[2] * z2)
+            return np.abs(h) ** 2
+
+        # 高架滤波：G=4dB, Q=1/sqrt(2), fc=1500Hz
+        gain_db, q, fc = 4.0, 1 / math.sqrt(2), 1500.0
+        A = 10 ** (gain_db / 40)
+        w0 = 2 * math.pi * fc / sample_rate
+        alpha = math.sin(w0) / (2 * q)
+        cos_w0 = math.cos(w0)
+        shelf_b = (A * ((A + 1) + (A - 1) * cos_w0 + 2 * math.sqrt(A) * alpha),
+                   -2 * A * ((A - 1) + (A + 1) * cos_w0),
+                   A * ((A + 1) + (A - 1) * cos_w0 - 2 * math.sqrt(A) * alpha))
+        shelf_a = ((A + 1) - (A - 1) * cos_w0 + 2 * math.sqrt(A) * alpha,
+                   2 * ((A - 1) - (A + 1) * cos_w0),
+                   (A + 1) - (A - 1) * cos_w0 - 2 * math.sqrt(A) * alpha)
+
+        # 高通滤波：Q=0.5, fc=38Hz
+        q, fc = 0.5, 38.0
+        w0 = 2 * math.pi * fc / sample_rate
+        alpha = math.sin(w0) / (2 * q)
+        cos_w0 = math.cos(w0)
+        hp_b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+        hp_a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+
+        return biquad_power(shelf_b, shelf_a) * biquad_power(hp_b, hp_a)
+
+    def integrated_loudness(self, audio_data, sample_rate):
+        """
+        计算BS.1770积分响度（LUFS）
+
+        K加权在频域完成（避免逐样本IIR循环），门限块为400ms、步长100ms。
+
+        Returns:
+            float: 积分响度，静音时返回-inf
+        """
+        data = np.asarray(audio_data)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        n = data.shape[0]
+        if n == 0:
+            return -math.inf
+
+        step = max(1, int(sample_rate * 0.1))
+        freqs = np.fft.rfftfreq(n, d=1.0 / sample_rate)
+        response = self._k_weighting_response(freqs, sample_rate)
+
+        # 各声道K加权后的100ms子块能量（声道权重均为1.0）
+        sub_blocks = n // step
+        sub_energy = None
+        for ch in range(data.shape[1]):
+            weighted = np.fft.irfft(np.fft.rfft(data[:, ch]) * response, n=n)
+            if sub_blocks > 0:
+                weighted = weighted[:sub_blocks * step]
+                np.square(weighted, out=weighted)
+                energy = weighted.reshape(sub_blocks, step).sum(axis=1)
+            else:
+                energy = np.array([float(np.dot(weighted, weighted))])
+            sub_energy = energy if sub_energy is None else sub_energy + energy
+
+        # 400ms门限块 = 连续4个100ms子块（75%重叠）
+        if sub_energy.size >= 4:
+            block_energy = np.convolve(sub_energy, np.ones(4), mode='valid') / (4 * step)
+        else:
+            samples_used = sub_blocks * step if sub_blocks else n
+            block_energy = np.array([sub_energy.sum() / samples_used])
+
+        with np.errstate(divide='ignore'):
+            block_loudness = -0.691 + 10 * np.log10(block_energy)
+
+        gated = block_energy[block_loudness > self.ABSOLUTE_GATE_LUFS]
+        if gated.size == 0:
+            return -math.inf
+        relative_gate = -0.691 + 10 * math.log10(gated.mean()) + self.RELATIVE_GATE_LU
+        gated = block_energy[(block_loudness > self.ABSOLUTE_GATE_LUFS) & (block_loudness > relative_gate)]
+        if gated.size == 0:
+            return -math.inf
+        return -0.691 + 10 * math.log10(gated.mean())
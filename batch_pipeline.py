@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+breathVOICE 无界面批处理：为一个或多个角色运行完整流程
+    dialogue（LLM生成台词集） → tts（逐条语音合成） → classify（按关键词分类音频）
+    → export（导出语音包ZIP） → inject（写入breathKIT设备/目标目录）
+
+- 每个阶段单独限制并发（--llm-workers、--tts-workers、--export-workers、--inject-workers）
+- 状态文件记录每个角色已完成的阶段，重新运行时自动跳过（--restart 忽略状态重新开始）；
+  TTS阶段跳过已生成的音频文件
+- 进度以JSON Lines输出到stdout（或 --progress-file），日志输出到stderr
+- --profile 为tts/export/dialogue阶段在角色文件夹的profiles目录写出pstats和折叠栈
+
+用法:
+    python batch_pipeline.py 角色A 角色B --llm-config-id 1 --voice-id ChineseWoman --material-pack 素材包
+    python batch_pipeline.py --all --stages tts,classify,export --voice-id ChineseWoman --material-pack 素材包
+    python batch_pipeline.py --all --stages export,inject --material-pack 素材包 --target /Volumes/BREATHKIT/LB
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import signal
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from job_scheduler import JobScheduler, PRIORITY_LOW
+import profiling
+
+STAGES = ['dialogue', 'tts', 'classify', 'export', 'inject']
+# 各阶段使用的调度器资源池（tts阶段本身在角色线程中运行，逐条请求提交到tts池）
+STAGE_POOLS = {'dialogue': 'llm', 'classify': 'cpu', 'export': 'cpu', 'inject': 'io'}
+# 各阶段必需的命令行参数
+STAGE_REQUIRED_ARGS = {
+    'dialogue': ['llm_config_id'],
+    'tts': ['voice_id'],
+    'export': ['material_pack'],
+    'inject': ['material_pack', 'target'],
+}
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '台词模版.csv')
+
+logger = logging.getLogger('batch_pipeline')
+
+
+class ProgressStream:
+    """线程安全的JSON Lines进度输出"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, character=None, stage=None, **fields):
+        record = {'time': round(time.time(), 3), 'event': event}
+        if character is not None:
+            record['character'] = character
+        if stage is not None:
+            record['stage'] = stage
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+class PipelineState:
+    """
+    可恢复的运行状态：{角色名: {阶段: {'status': 'done'|'failed', 'finished_at': float, 'result': dict}}}
+
+    每次阶段结束立即原子写入文件，进程中断后重新运行会跳过已完成的阶段。
+    """
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {}
+        if not restart and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"状态文件损坏，将重新开始: {path}: {e}")
+
+    def is_done(self, character, stage):
+        with self._lock:
+            return self.data.get(character, {}).get(stage, {}).get('status') == 'done'
+
+    def result(self, character, stage):
+        with self._lock:
+            return self.data.get(character, {}).get(stage, {}).get('result', {})
+
+    def record(self, character, stage, status, result):
+        with self._lock:
+            self.data.setdefault(character, {})[stage] = {
+                'status': status,
+                'finished_at': time.time(),
+                'result': result
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def invalidate_after(self, character, stage):
+        """某阶段重新运行后，其后的阶段需要重新运行"""
+        with self._lock:
+            stages = self.data.get(character, {})
+            for later in STAGES[STAGES.index(stage) + 1:]:
+                stages.pop(later, None)
+
+
+class StageError(Exception):
+    """阶段执行失败"""
+
+
+class BatchPipeline:
+    """批处理流程：每个角色一个线程依次执行各阶段，阶段在调度器对应的资源池中执行以限制并发"""
+
+    def __init__(self, args, progress, state):
+        self.args = args
+        self.progress = progress
+        self.state = state
+        self.stop_event = threading.Event()
+        self.characters_dir = args.characters_dir
+        # 各阶段在调度器的资源池中执行：dialogue→llm，tts→tts（所有角色共享），classify/export→cpu，inject→io
+        self.scheduler = JobScheduler({
+            'llm': args.llm_workers,
+            'tts': args.tts_workers,
+            'cpu': args.export_workers,
+            'io': args.inject_workers,
+        })
+        self._db = None
+        self._exporter = None
+        self._exporter_lock = threading.Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            from database import get_database
+            self._db = get_database()
+        return self._db
+
+    @property
+    def exporter(self):
+        with self._exporter_lock:
+            if self._exporter is None:
+                from voice_pack_exporter import VoicePackExporter
+                self._exporter = VoicePackExporter()
+            return self._exporter
+
+    def character_dir(self, character):
+        return os.path.join(self.characters_dir, character)
+
+    # ---- 各阶段 ----
+
+    def run_dialogue(self, character):
+        from dialogue_generator import DialogueGenerator
+        from voice_pipeline import write_dialogue_csv
+
+        row = next((c for c in self.db.get_characters() if c[1] == character), None)
+        if row is None:
+            raise StageError(f"数据库中没有角色: {character}")
+
+        # 生成器按“选择,动作参数,台词”格式的临时CSV读取动作参数
+        with open(self.args.template, 'r', encoding='utf-8-sig', newline='') as f:
+            actions = [r.get('动作参数', '').strip() for r in csv.DictReader(f)]
+        actions = [a for a in actions if a]
+        fd, task_csv = tempfile.mkstemp(suffix='.csv', prefix=f'{character}_')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['选择', '动作参数', '台词'])
+                writer.writerows([False, a, ''] for a in actions)
+
+            dialogues = DialogueGenerator().generate_dialogues_with_progress(
+                row[0], self.args.llm_config_id, self.args.language, task_csv,
+                status_callback=lambda msg: self.progress.emit('status', character, 'dialogue', message=msg),
+                stop_check=self.stop_event.is_set
+            )
+        finally:
+            os.remove(task_csv)
+
+        if self.stop_event.is_set():
+            raise StageError("已停止")
+        if not dialogues:
+            raise StageError("没有生成任何台词")
+        errors = sum(1 for _, text in dialogues if str(text).startswith("生成错误"))
+        script_path = write_dialogue_csv(os.path.join(self.character_dir(character), 'script'),
+                                         self.args.language, dialogues)
+        set_name = os.path.splitext(os.path.basename(script_path))[0]
+        set_id = DialogueGenerator().save_dialogues_to_db(row[0], set_name, dialogues)
+        return {'script_path': script_path, 'dialogue_set_id': set_id,
+                'dialogues': len(dialogues), 'errors': errors}
+
+    @profiling.profiled('tts', lambda a: a['self'].character_dir(a['character']))
+    def run_tts(self, character):
+        from voice_pipeline import (
+            call_single_tts_api, find_generated_audio, read_dialogue_csv, latest_dialogue_csv
+        )
+
+        character_dir = self.character_dir(character)
+        script_path = (self.args.script
+                       or self.state.result(character, 'dialogue').get('script_path')
+                       or latest_dialogue_csv(os.path.join(character_dir, 'script')))
+        if not script_path or not os.path.exists(script_path):
+            raise StageError("没有可用的台词集CSV")
+
+        dialogues = read_dialogue_csv(script_path)
+        pending = [(action, text) for action, text in dialogues
+                   if not find_generated_audio(character_dir, f"{action}.wav")]
+        total = len(dialogues)
+        done = total - len(pending)
+        self.progress.emit('progress', character, 'tts', current=done, total=total,
+                           message=f"{done} 条已存在，待生成 {len(pending)} 条")
+
+        def synthesize(action, text):
+            if self.stop_event.is_set():
+                return action, {'success': False, 'message': '已停止'}
+            return action, call_single_tts_api(text, f"{action}.wav", self.args.voice_id, character_dir)
+
+        failures = {}
+        futures = [self.scheduler.submit('tts', synthesize, action, text, owner='batch', character=character,
+                                         priority=PRIORITY_LOW, label=f"TTS {action}")
+                   for action, text in pending]
+        for future in as_completed(futures):
+            action, result = future.result()
+            done += 1
+            if not result['success']:
+                failures[action] = result['message']
+            self.progress.emit('progress', character, 'tts', current=done, total=total,
+                               item=action, ok=result['success'], message=result['message'])
+
+        if self.stop_event.is_set():
+            raise StageError("已停止")
+        if failures:
+            raise StageError(f"{len(failures)} 条语音生成失败: " +
+                             "; ".join(f"{a}: {m}" for a, m in list(failures.items())[:5]))
+        return {'script_path': script_path, 'total': total, 'generated': len(pending)}
+
+    def run_classify(self, character):
+        from voice_pipeline import classify_audio_files
+        moved_files = classify_audio_files(self.character_dir(character))
+        return {'moved': len(moved_files)}
+
+    def run_export(self, character):
+        result = self.exporter.export_voice_pack(
+            character_name=character,
+            source_voices_dir=self.character_dir(character),
+            output_dir=self.args.output_dir,
+            progress_callback=lambda current, total, message: self.progress.emit(
+                'progress', character, 'export', current=current, total=total, message=message),
+            material_pack=self.args.material_pack,
+            stop_flag=self.stop_event
+        )
+        if not result['success']:
+            raise StageError(result['message'])
+        stats = result['stats']
+        return {'zip_path': result['zip_path'], 'success_count': stats['success_count'],
+                'total_count': stats['total_count'], 'errors': len(stats['errors'])}
+
+    def run_inject(self, character):
+        result = self.exporter.copy_voice_pack_to_directories(
+            self.character_dir(character), self.args.target, character,
+            progress_callback=lambda percent, message: self.progress.emit(
+                'progress', character, 'inject', current=percent, total=100, message=message),
+            material_pack=self.args.material_pack,
+            stop_flag=self.stop_event
+        )
+        if not result['success']:
+            raise StageError(result['message'])
+        return {'targets': len(self.args.target), 'message': result['message']}
+
+    # ---- 调度 ----
+
+    def _run_stage(self, character, stage):
+        """在资源池的工作线程中执行阶段"""
+        self.progress.emit('stage_started', character, stage)
+        return getattr(self, f'run_{stage}')(character)
+
+    def run_character(self, character):
+        """依次执行一个角色的各阶段，返回是否全部成功"""
+        if not os.path.isdir(self.character_dir(character)):
+            self.progress.emit('character_failed', character, error=f"角色目录不存在: {self.character_dir(character)}")
+            return False
+
+        for stage in self.args.stages:
+            if self.stop_event.is_set():
+                return False
+            if self.state.is_done(character, stage):
+                self.progress.emit('stage_skipped', character, stage, reason='已完成（状态文件）')
+                continue
+
+            pool = STAGE_POOLS.get(stage)
+            start = time.monotonic()
+            try:
+                if pool is None:
+                    self.progress.emit('stage_started', character, stage)
+                    result = getattr(self, f'run_{stage}')(character)
+                else:
+                    self.progress.emit('stage_queued', character, stage, pool=pool)
+                    result = self.scheduler.run(pool, self._run_stage, character, stage,
+                                                owner='batch', character=character,
+                                                priority=PRIORITY_LOW, label=stage)
+            except Exception as e:
+                if not isinstance(e, StageError):
+                    logger.error(f"{character} {stage} 阶段出错", exc_info=True)
+                self.state.record(character, stage, 'failed', {'error': str(e)})
+                self.progress.emit('stage_failed', character, stage, error=str(e),
+                                   elapsed=round(time.monotonic() - start, 3))
+                return False
+
+            self.state.invalidate_after(character, stage)
+            self.state.record(character, stage, 'done', result)
+            self.progress.emit('stage_done', character, stage, result=result,
+                               elapsed=round(time.monotonic() - start, 3))
+
+        self.progress.emit('character_done', character)
+        return True
+
+    def run(self, characters):
+        """并行处理所有角色，返回 {角色名: 是否成功}"""
+        self.progress.emit('run_started', characters=characters, stages=self.args.stages)
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.args.max_characters, len(characters))),
+                                    thread_name_prefix='character') as executor:
+                futures = {executor.submit(self.run_character, c): c for c in characters}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        finally:
+            self.scheduler.shutdown(wait=True, cancel_queued=True)
+        self.progress.emit('run_finished', succeeded=sorted(c for c, ok in results.items() if ok),
+                           failed=sorted(c for c, ok in results.items() if not ok),
+                           stopped=self.stop_event.is_set())
+        return results
+
+
+def parse_stages(value):
+    stages = [s.strip() for s in value.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知阶段: {', '.join(unknown)}（可选: {', '.join(STAGES)}）")
+    # 按流程顺序执行
+    return [s for s in STAGES if s in stages]
+
+
+def list_characters(characters_dir):
+    if not os.path.isdir(characters_dir):
+        return []
+    return sorted(d for d in os.listdir(characters_dir)
+                  if not d.startswith('.') and os.path.isdir(os.path.join(characters_dir, d)))
+
+
+def main(argv=None):
+    from file_manager import CharacterFileManager
+
+    parser = argparse.ArgumentParser(description="breathVOICE 无界面批处理流程")
+    parser.add_argument('characters', nargs='*', help="角色名（Characters目录下的文件夹名）")
+    parser.add_argument('--all', action='store_true', help="处理Characters目录下的所有角色")
+    parser.add_argument('--characters-dir', default=None, help="角色根目录（默认与界面相同）")
+    parser.add_argument('--stages', type=parse_stages, default=list(STAGES),
+                        help=f"要运行的阶段，逗号分隔（默认全部: {','.join(STAGES)}）")
+    parser.add_argument('--llm-config-id', type=int, help="dialogue阶段使用的LLM配置ID")
+    parser.add_argument('--language', default='中文', choices=['中文', 'English', '日本語'])
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help="动作参数模板CSV")
+    parser.add_argument('--script', help="tts阶段使用的台词集CSV（默认使用dialogue阶段结果或最新的台词集）")
+    parser.add_argument('--voice-id', help="tts阶段使用的语音ID")
+    parser.add_argument('--material-pack', help="export/inject阶段使用的素材包")
+    parser.add_argument('--output-dir', default='output', help="语音包ZIP输出目录")
+    parser.add_argument('--target', action='append', default=[], help="inject目标目录，可重复指定")
+    parser.add_argument('--max-characters', type=int, default=4, help="同时处理的角色数")
+    parser.add_argument('--llm-workers', type=int, default=2, help="同时生成台词的角色数")
+    parser.add_argument('--tts-workers', type=int, default=4, help="所有角色共享的TTS并发请求数")
+    parser.add_argument('--export-workers', type=int, default=2, help="同时分类/导出的角色数")
+    parser.add_argument('--inject-workers', type=int, default=1, help="同时写入设备的角色数")
+    parser.add_argument('--state-file', default=os.path.join('output', 'pipeline_state.json'),
+                        help="可恢复状态文件")
+    parser.add_argument('--restart', action='store_true', help="忽略状态文件，所有阶段重新运行")
+    parser.add_argument('--progress-file', help="进度JSON Lines写入文件（默认stdout）")
+    parser.add_argument('--profile', nargs='?', const='full', choices=profiling.PROFILE_MODES,
+                        help="为台词生成、语音生成和导出写出性能分析文件到角色文件夹的profiles目录"
+                             "（默认full；同 BREATHVOICE_PROFILE）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.profile:
+        profiling.set_mode(args.profile)
+    if args.characters_dir is None:
+        args.characters_dir = CharacterFileManager().base_path
+    characters = list_characters(args.characters_dir) if args.all else args.characters
+    if not characters:
+        parser.error("请指定角色名或使用 --all")
+    for stage in args.stages:
+        missing = [name for name in STAGE_REQUIRED_ARGS.get(stage, []) if not getattr(args, name)]
+        if missing:
+            parser.error(f"{stage}阶段需要 " + "、".join('--' + name.replace('_', '-') for name in missing))
+
+    progress_stream = open(args.progress_file, 'a', encoding='utf-8') if args.progress_file else sys.stdout
+    try:
+        pipeline = BatchPipeline(args, ProgressStream(progress_stream), PipelineState(args.state_file, args.restart))
+
+        # Ctrl+C：停止提交新的工作，正在进行的请求结束后退出，已完成的阶段保留在状态文件中
+        def handle_sigint(signum, frame):
+            logger.warning("收到中断信号，正在停止...")
+            pipeline.stop_event.set()
+        signal.signal(signal.SIGINT, handle_sigint)
+
+        results = pipeline.run(characters)
+    finally:
+        if progress_stream is not sys.stdout:
+            progress_stream.close()
+    return 0 if results and all(results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CharacterDatabase CRUD微基准：对比每次调用新建连接（旧实现）与连接池（WAL）的耗时
+
+读取行直接调用不经过读缓存的查询方法，只反映连接开销；命中读缓存的耗时单独列出。
+
+用法:
+    python benchmarks/bench_database.py [--iterations 2000] [--threads 8]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from database import CharacterDatabase
+
+
+class UnpooledDatabase(CharacterDatabase):
+    """旧实现：每次调用都新建连接，默认回滚日志模式"""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def seed(db):
+    character_ids = [db.create_character(f"角色{i}", f"描述{i}") for i in range(20)]
+    for i in range(5):
+        db.add_llm_config(f"配置{i}", 'http://localhost', 'key', 'model')
+    return character_ids
+
+
+def time_it(label, func, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed * 1000:9.1f} ms  ({elapsed / iterations * 1e6:8.1f} us/次)")
+    return elapsed
+
+
+def time_threaded(label, func, iterations, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(func, range(iterations)))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed * 1000:9.1f} ms  ({iterations / elapsed:9.0f} 次/秒, {threads} 线程)")
+    return elapsed
+
+
+def run(db_class, iterations, threads):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = db_class(os.path.join(temp_dir, 'bench.db'))
+        character_ids = seed(db)
+        results = {}
+        # 绕过读缓存，每次都实际查询数据库
+        results['get_character'] = time_it(
+            'get_character', lambda i: db._query_character(character_ids[i % len(character_ids)]), iterations)
+        results['get_llm_config'] = time_it(
+            'get_llm_config', lambda i: db._query_llm_config(i % 5 + 1), iterations)
+        results['update_character'] = time_it(
+            'update_character',
+            lambda i: db.update_character(character_ids[i % len(character_ids)], f"角色{i % len(character_ids)}", f"新描述{i}"),
+            iterations // 4)
+        results['add_dialogue_set'] = time_it(
+            'add_dialogue_set',
+            lambda i: db.add_dialogue_set(character_ids[i % len(character_ids)], f"set{i}",
+                                          [(f"action{j}", f"台词{j}") for j in range(50)]),
+            iterations // 20)
+        results['mixed_threaded'] = time_threaded(
+            'mixed (读写混合)',
+            lambda i: db._query_character(character_ids[i % len(character_ids)]) if i % 10 else
+            db.update_character(character_ids[i % len(character_ids)], f"角色{i % len(character_ids)}", f"描述{i}"),
+            iterations, threads)
+        if hasattr(db, 'close'):
+            db.close()
+        return results
+
+
+def run_cached(iterations):
+    """读缓存命中时的耗时（不访问数据库）"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = CharacterDatabase(os.path.join(temp_dir, 'bench.db'))
+        character_ids = seed(db)
+        db.clear_cache()
+        time_it('get_character (缓存)', lambda i: db.get_character(character_ids[i % len(character_ids)]), iterations)
+        time_it('get_llm_config (缓存)', lambda i: db.get_llm_config(i % 5 + 1), iterations)
+        print(f"  缓存命中 {db.cache_stats['hits']} 次，未命中 {db.cache_stats['misses']} 次")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CharacterDatabase CRUD微基准")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print("每次新建连接（旧实现）:")
+    baseline = run(UnpooledDatabase, args.iterations, args.threads)
+    print("连接池 + WAL:")
+    pooled = run(CharacterDatabase, args.iterations, args.threads)
+
+    print("加速比:")
+    for key in baseline:
+        print(f"  {key:<24} {baseline[key] / pooled[key]:6.2f}x")
+
+    print("读缓存命中（连接池实现）:")
+    run_cached(args.iterations)
+
+
+if __name__ == '__main__':
+    main()
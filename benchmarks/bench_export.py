@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语音包导出基准：生成合成WAV语料（混合采样率、单/双声道、按文件夹的典型时长），
+逐文件测量 convert_audio_format、normalize_audio_to_dbfs、BRE转换，
+再测量 create_voice_pack_zip 和完整的 export_voice_pack，输出耗时、吞吐和峰值内存的JSON
+
+- 每个阶段的峰值内存用tracemalloc测量（numpy数组也计入），另记录进程峰值RSS
+- convert_audio_format内部的读取/重采样/标准化/写入拆分来自metrics模块的计时区间
+- wav_to_bre程序不可执行时（例如非macOS环境）BRE和端到端阶段记为跳过，可用 --bre-tool 指定
+
+用法:
+    python benchmarks/bench_export.py [--files-per-folder 10] [--scale 1.0] [--seed 1]
+        [--bre-tool voice_packs/wav_to_bre_single] [--json result.json] [--keep DIR]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import wave
+import array
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import metrics
+from voice_pack_exporter import VoicePackExporter
+
+SAMPLE_RATES = [22050, 24000, 44100, 48000]
+CHANNELS = [1, 2]
+# 各文件夹的典型时长范围（秒）
+FOLDER_DURATIONS = {
+    'greeting': (1.5, 4.0),
+    'orgasm': (4.0, 10.0),
+    'reaction': (1.0, 3.0),
+    'tease': (2.0, 5.0),
+    'impact': (0.5, 1.5),
+    'touch': (0.8, 3.0),
+}
+# 合成信号的幅度档位，使标准化阶段需要不同的增益
+AMPLITUDES = [0.05, 0.2, 0.6]
+CHARACTER_NAME = 'BenchCharacter'
+
+
+def _base_block(sample_rate, channels, amplitude):
+    """生成1秒的16bit PCM块：基频随时间滑动的谐波叠加加少量噪声，近似人声的频谱"""
+    rng = random.Random(sample_rate * 10 + channels)
+    samples = array.array('h')
+    for n in range(sample_rate):
+        t = n / sample_rate
+        f0 = 180 + 40 * math.sin(2 * math.pi * 3 * t)
+        value = (math.sin(2 * math.pi * f0 * t) + 0.5 * math.sin(4 * math.pi * f0 * t)
+                 + 0.25 * math.sin(6 * math.pi * f0 * t)) / 1.75
+        value = value * (0.6 + 0.4 * math.sin(2 * math.pi * 5 * t)) + rng.uniform(-0.02, 0.02)
+        sample = int(max(-1.0, min(1.0, value * amplitude)) * 32767)
+        for _ in range(channels):
+            samples.append(sample)
+    return samples.tobytes()
+
+
+def generate_corpus(root, files_per_folder, scale, seed):
+    """
+    在 root/<文件夹> 下生成WAV语料
+
+    Returns:
+        list: 每个文件的 {'path', 'folder', 'sample_rate', 'channels', 'duration', 'bytes'}
+    """
+    rng = random.Random(seed)
+    blocks = {}
+    corpus = []
+    for folder, (low, high) in FOLDER_DURATIONS.items():
+        folder_path = os.path.join(root, folder)
+        os.makedirs(folder_path, exist_ok=True)
+        for i in range(files_per_folder):
+            sample_rate = SAMPLE_RATES[(i + len(corpus)) % len(SAMPLE_RATES)]
+            channels = CHANNELS[i % len(CHANNELS)]
+            amplitude = rng.choice(AMPLITUDES)
+            duration = rng.uniform(low, high) * scale
+            key = (sample_rate, channels, amplitude)
+            if key not in blocks:
+                blocks[key] = _base_block(sample_rate, channels, amplitude)
+            frame_bytes = 2 * channels
+            total_bytes = int(duration * sample_rate) * frame_bytes
+            block = blocks[key]
+            data = (block * (total_bytes // len(block) + 1))[:total_bytes]
+
+            path = os.path.join(folder_path, f"{folder}_{i:03d}.wav")
+            with wave.open(path, 'wb') as f:
+                f.setnchannels(channels)
+                f.setsampwidth(2)
+                f.setframerate(sample_rate)
+                f.writeframes(data)
+            corpus.append({'path': path, 'folder': folder, 'sample_rate': sample_rate,
+                           'channels': channels, 'duration': round(duration, 3),
+                           'bytes': os.path.getsize(path)})
+    return corpus
+
+
+def describe(values):
+    """耗时列表的统计摘要（秒）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        'count': len(values),
+        'total': round(sum(values), 6),
+        'mean': round(statistics.mean(values), 6),
+        'p50': round(ordered[len(ordered) // 2], 6),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 6),
+        'max': round(ordered[-1], 6),
+    }
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存（MB），不支持时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS单位为字节，Linux为KB
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+class Phase:
+    """一个基准阶段：记录墙钟时间、tracemalloc峰值和metrics计时区间的汇总"""
+
+    def __init__(self, name, output_dir):
+        self.name = name
+        self.output_dir = output_dir
+        self.result = {}
+
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self._job = metrics.job(f"bench_{self.name}", output_dir=self.output_dir)
+        self._trace = self._job.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        wall = time.perf_counter() - self._start
+        self._job.__exit__(exc_type, exc_val, exc_tb)
+        self.result.update({
+            'wall_seconds': round(wall, 6),
+            'peak_traced_mb': round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2),
+            'spans': self._trace.summary(),
+        })
+        return False
+
+
+def bench_convert(exporter, corpus, stage_dir, output_dir):
+    """逐文件转换为48kHz/16bit/单声道WAV，输出到 stage_dir/<角色>/<文件夹>"""
+    with Phase('convert', output_dir) as phase:
+        times = []
+        failures = 0
+        for item in corpus:
+            target_folder = os.path.join(stage_dir, CHARACTER_NAME, item['folder'])
+            os.makedirs(target_folder, exist_ok=True)
+            item['converted'] = os.path.join(target_folder, os.path.basename(item['path']))
+            start = time.perf_counter()
+            ok = exporter.convert_audio_format(item['path'], item['converted'])
+            item['convert_s'] = round(time.perf_counter() - start, 6)
+            times.append(item['convert_s'])
+            failures += 0 if ok else 1
+    audio_seconds = sum(item['duration'] for item in corpus)
+    phase.result.update({
+        'per_file': describe(times),
+        'failures': failures,
+        'audio_seconds_per_second': round(audio_seconds / sum(times), 2) if sum(times) else None,
+    })
+    for rate in SAMPLE_RATES:
+        rate_times = [item['convert_s'] for item in corpus if item['sample_rate'] == rate]
+        phase.result.setdefault('per_sample_rate', {})[str(rate)] = describe(rate_times)
+    return phase.result
+
+
+def bench_normalize(exporter, corpus, output_dir):
+    """对已解码的float32单声道数据单独测量标准化（不含读写）"""
+    import numpy as np
+    import soundfile as sf
+
+    decoded = []
+    for item in corpus:
+        data, _ = sf.read(item['path'], dtype='float32')
+        if data.ndim > 1:
+            data = np.mean(data, axis=1, dtype=np.float32)
+        decoded.append((item, data))
+
+    with Phase('normalize', output_dir) as phase:
+        times = []
+        for item, data in decoded:
+            start = time.perf_counter()
+            exporter.normalize_audio_to_dbfs(data, target_dbfs=-10.0)
+            item['normalize_s'] = round(time.perf_counter() - start, 6)
+            times.append(item['normalize_s'])
+    phase.result['per_file'] = describe(times)
+    return phase.result
+
+
+def bench_bre(exporter, corpus, output_dir):
+    """将转换后的WAV转为BRE（保留WAV，供打包阶段使用）"""
+    with Phase('bre', output_dir) as phase:
+        times = []
+        failures = 0
+        for item in corpus:
+            if not os.path.exists(item.get('converted', '')):
+                continue
+            bre_path = item['converted'][:-len('.wav')] + '.bre'
+            start = time.perf_counter()
+            ok = exporter.convert_wav_to_bre(item['converted'], bre_path)
+            item['bre_s'] = round(time.perf_counter() - start, 6)
+            times.append(item['bre_s'])
+            failures += 0 if ok else 1
+    phase.result.update({'per_file': describe(times), 'failures': failures})
+    return phase.result
+
+
+def bench_zip(exporter, stage_dir, workdir, output_dir, include_wav):
+    """打包 stage_dir/<角色>；有BRE时只打包BRE（与实际导出一致），否则打包转换后的WAV"""
+    character_dir = os.path.join(stage_dir, CHARACTER_NAME)
+    if not include_wav:
+        for root, _, files in os.walk(character_dir):
+            for name in files:
+                if name.endswith('.wav'):
+                    os.remove(os.path.join(root, name))
+    input_bytes = sum(os.path.getsize(os.path.join(root, name))
+                      for root, _, files in os.walk(character_dir) for name in files)
+    zip_path = os.path.join(workdir, f"{CHARACTER_NAME}.zip")
+    with Phase('zip', output_dir) as phase:
+        ok = exporter.create_voice_pack_zip(stage_dir, zip_path, CHARACTER_NAME)
+    phase.result.update({
+        'success': ok,
+        'input': 'wav' if include_wav else 'bre',
+        'input_bytes': input_bytes,
+        'output_bytes': os.path.getsize(zip_path) if os.path.exists(zip_path) else None,
+    })
+    phase.result['mb_per_second'] = (round(input_bytes / (1024 * 1024) / phase.result['wall_seconds'], 1)
+                                     if phase.result['wall_seconds'] else None)
+    return phase.result
+
+
+def bench_end_to_end(exporter, source_dir, workdir, output_dir):
+    """完整的export_voice_pack（转换、BRE、流式打包并行）"""
+    export_dir = os.path.join(workdir, 'export')
+    with Phase('end_to_end', output_dir) as phase:
+        result = exporter.export_voice_pack(CHARACTER_NAME, source_dir, export_dir)
+    phase.result.update({
+        'success': result['success'],
+        'files': result['stats']['success_count'],
+        'errors': result['stats']['errors'][:5],
+    })
+    return phase.result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="breathVOICE 语音包导出基准")
+    parser.add_argument('--files-per-folder', type=int, default=10, help="每个文件夹生成的WAV数量")
+    parser.add_argument('--scale', type=float, default=1.0, help="时长缩放系数")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子（相同种子生成相同语料）")
+    parser.add_argument('--bre-tool', help="wav_to_bre程序路径（默认使用导出器中的路径）")
+    parser.add_argument('--json', help="将结果写入JSON文件")
+    parser.add_argument('--keep', help="保留语料和中间文件到该目录（默认使用临时目录并删除）")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.keep) if args.keep else tempfile.mkdtemp(prefix='bench_export_')
+    os.makedirs(workdir, exist_ok=True)
+    tracemalloc.start()
+    try:
+        source_dir = os.path.join(workdir, 'source')
+        stage_dir = os.path.join(workdir, 'stage')
+        jobs_dir = os.path.join(workdir, 'jobs')
+
+        start = time.perf_counter()
+        corpus = generate_corpus(source_dir, args.files_per_folder, args.scale, args.seed)
+        print(f"生成语料: {len(corpus)} 个文件，{sum(i['duration'] for i in corpus):.1f} 秒音频，"
+              f"{sum(i['bytes'] for i in corpus) / (1024 * 1024):.1f} MB（{time.perf_counter() - start:.1f} s）")
+
+        exporter = VoicePackExporter()
+        if args.bre_tool:
+            exporter.wav_to_bre_path = os.path.abspath(args.bre_tool)
+        bre_available = os.path.isfile(exporter.wav_to_bre_path) and os.access(exporter.wav_to_bre_path, os.X_OK)
+
+        phases = {}
+        phases['convert'] = bench_convert(exporter, corpus, stage_dir, jobs_dir)
+        phases['normalize'] = bench_normalize(exporter, corpus, jobs_dir)
+        skipped = f"wav_to_bre不可执行: {exporter.wav_to_bre_path}"
+        phases['bre'] = bench_bre(exporter, corpus, jobs_dir) if bre_available else {'skipped': skipped}
+        phases['zip'] = bench_zip(exporter, stage_dir, workdir, jobs_dir, include_wav=not bre_available)
+        phases['end_to_end'] = (bench_end_to_end(exporter, source_dir, workdir, jobs_dir)
+                                if bre_available else {'skipped': skipped})
+
+        results = {
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'corpus': {
+                'files': len(corpus),
+                'files_per_folder': args.files_per_folder,
+                'scale': args.scale,
+                'seed': args.seed,
+                'audio_seconds': round(sum(i['duration'] for i in corpus), 3),
+                'bytes': sum(i['bytes'] for i in corpus),
+            },
+            'phases': phases,
+            'peak_rss_mb': peak_rss_mb(),
+            'files': [{key: value for key, value in item.items() if key not in ('path', 'converted')}
+                      for item in corpus],
+        }
+    finally:
+        tracemalloc.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'阶段':<12} {'墙钟 s':>9} {'单文件均值 ms':>13} {'p95 ms':>9} {'峰值 MB':>9}")
+    for name, phase in phases.items():
+        if 'skipped' in phase:
+            print(f"{name:<12} 跳过（{phase['skipped']}）")
+            continue
+        per_file = phase.get('per_file') or {}
+        mean = f"{per_file['mean'] * 1000:13.2f}" if per_file else f"{'-':>13}"
+        p95 = f"{per_file['p95'] * 1000:9.2f}" if per_file else f"{'-':>9}"
+        print(f"{name:<12} {phase['wall_seconds']:9.2f} {mean} {p95} {phase['peak_traced_mb']:9.1f}")
+    print(f"进程峰值RSS: {results['peak_rss_mb']} MB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+台词生成流程基准：启动本地模拟LLM接口（mock_llm_server），用临时数据库中的角色和LLM配置
+对 台词模版.csv 的全部动作参数运行 generate_dialogues_with_progress，报告
+请求数（含429和SDK自动重试）、墙钟时间、首块延迟、解析层级分布和完整度
+
+完整度 = 得到正确台词（包含对应动作参数标记）的动作参数数 / 模板中的动作参数总数，
+用于离线比较分批大小、补齐轮数和解析策略的改动。
+
+用法:
+    python benchmarks/bench_llm.py [--runs 3] [--json result.json]
+        [--latency 0.2] [--tokens-per-second 400] [--drop-rate 0.1] [--malformed-rate 0.1]
+        [--fence-rate 0.2] [--rate-limit-rate 0.05] [--script 429,ok,fenced,malformed,drop]
+        [--min-completeness 1.0]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import metrics
+from mock_llm_server import MockLLMServer, add_config_arguments, config_from_args
+
+DEFAULT_TEMPLATE = os.path.join(REPO_ROOT, '台词模版.csv')
+CHARACTER_NAME = '基准角色'
+
+
+def load_template_actions(template_path):
+    """读取模板CSV第一列的动作参数"""
+    with open(template_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row[0].strip() for row in reader if row and row[0].strip()]
+
+
+def write_editor_csv(path, actions):
+    """按台词编辑器的临时CSV格式（选择, 动作参数, 台词）写出任务列表"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['选择', '动作参数', '台词'])
+        for action in actions:
+            writer.writerow([False, action, ''])
+
+
+def parse_tier_counts():
+    return {dict(labels).get('tier', ''): value
+            for labels, value in metrics.counter_values('llm_parse_total').items()}
+
+
+def run_once(args, run_index, workdir, actions, csv_path):
+    """启动一个新的模拟接口并运行一次完整生成，返回结果字典"""
+    # 在临时工作目录中导入：共享数据库和Characters目录都使用相对路径，避免改动仓库中的文件
+    import dialogue_generator
+    from database import CharacterDatabase
+
+    config = config_from_args(args)
+    config.seed = args.seed + run_index
+    server = MockLLMServer(config).start()
+    try:
+        db = CharacterDatabase(os.path.join(workdir, f'bench_{run_index}.db'))
+        character_id = db.create_character(CHARACTER_NAME, f"{{{{char}}}}是用于基准测试的角色。")
+        db.add_llm_config('mock', server.base_url, 'mock-key', 'mock-model')
+        llm_config_id = db.get_llm_configs()[-1][0]
+        # 生成流程通过模块级db读取角色和LLM配置
+        dialogue_generator.db = db
+
+        table = {}
+        tiers_before = parse_tier_counts()
+        output = sys.stdout if args.verbose else open(os.devnull, 'w', encoding='utf-8')
+        start = time.perf_counter()
+        try:
+            with metrics.job('bench_llm', character=CHARACTER_NAME, output_dir=os.path.join(workdir, 'jobs')) as trace, \
+                    contextlib.redirect_stdout(output):
+                dialogues = dialogue_generator.DialogueGenerator().generate_dialogues_with_progress(
+                    character_id=character_id,
+                    llm_config_id=llm_config_id,
+                    language=args.language,
+                    csv_path=csv_path,
+                    table_update_callback=lambda action, text: table.__setitem__(action, text),
+                )
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        wall = time.perf_counter() - start
+        tiers_after = parse_tier_counts()
+        server_stats = server.snapshot()
+    finally:
+        server.stop()
+
+    produced = {}
+    for action, text in dialogues:
+        produced.setdefault(action, text)
+    correct = [action for action in actions
+               if isinstance(produced.get(action), str) and f"【{action}】" in produced[action]]
+    errors = [action for action in actions if str(produced.get(action, '')).startswith('生成错误')]
+    llm_spans = [span for span in trace.spans if span['name'] == 'llm_request']
+    ttfb = [span['attrs']['ttfb'] for span in llm_spans if span['attrs'].get('ttfb')]
+    return {
+        'wall_seconds': round(wall, 3),
+        'actions': len(actions),
+        'completed': len(correct),
+        'completeness': round(len(correct) / len(actions), 4) if actions else None,
+        'missing': [action for action in actions if action not in produced][:20],
+        'errors': len(errors),
+        'duplicates': len(dialogues) - len(produced),
+        'table_updates': len(table),
+        'requests': server_stats['requests'],
+        'stream_requests': server_stats['stream_requests'],
+        'behaviors': server_stats['behaviors'],
+        'dropped_keys': server_stats['dropped_keys'],
+        'tokens_streamed': server_stats['tokens'],
+        'completion_tokens_reported': sum(span['attrs'].get('completion_tokens') or 0 for span in llm_spans),
+        'llm_requests_completed': len(llm_spans),
+        'ttfb_mean_seconds': round(statistics.mean(ttfb), 4) if ttfb else None,
+        'llm_request_mean_seconds': (round(statistics.mean(span['duration'] for span in llm_spans), 4)
+                                     if llm_spans else None),
+        'parse_tiers': {tier: count - tiers_before.get(tier, 0) for tier, count in tiers_after.items()
+                        if count - tiers_before.get(tier, 0)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="breathVOICE 台词生成流程基准（本地模拟LLM接口）")
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help="动作参数模板CSV")
+    parser.add_argument('--limit', type=int, help="只使用模板中的前N个动作参数")
+    parser.add_argument('--language', default='中文', choices=['中文', 'English', '日本語'])
+    parser.add_argument('--runs', type=int, default=1, help="运行次数（每次使用不同的随机种子）")
+    parser.add_argument('--json', help="将结果写入JSON文件")
+    parser.add_argument('--verbose', action='store_true', help="显示生成流程的输出")
+    parser.add_argument('--min-completeness', type=float, default=0.0,
+                        help="最低完整度（0-1），任一次运行低于该值时返回非零退出码")
+    add_config_arguments(parser)
+    # 默认模拟不稳定的接口，覆盖所有补齐和解析路径
+    parser.set_defaults(drop_rate=0.1, malformed_rate=0.1, fence_rate=0.2, rate_limit_rate=0.05)
+    args = parser.parse_args()
+
+    actions = load_template_actions(args.template)
+    if args.limit:
+        actions = actions[:args.limit]
+
+    runs = []
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='bench_llm_') as workdir:
+        os.chdir(workdir)
+        try:
+            csv_path = os.path.join(workdir, 'tasks.csv')
+            write_editor_csv(csv_path, actions)
+            print(f"{'运行':<4} {'墙钟 s':>8} {'请求':>6} {'429':>5} {'完整度':>8} {'首块 s':>8} {'解析层级'}")
+            for run_index in range(max(1, args.runs)):
+                result = run_once(args, run_index, workdir, actions, csv_path)
+                runs.append(result)
+                tiers = ', '.join(f"{tier}={count}" for tier, count in sorted(result['parse_tiers'].items()))
+                ttfb = f"{result['ttfb_mean_seconds']:8.3f}" if result['ttfb_mean_seconds'] is not None else f"{'-':>8}"
+                print(f"{run_index + 1:<4} {result['wall_seconds']:8.2f} {result['requests']:6d} "
+                      f"{result['behaviors']['429']:5d} {result['completeness']:8.1%} {ttfb} {tiers}")
+        finally:
+            os.chdir(original_cwd)
+
+    summary = {
+        'wall_seconds_median': statistics.median(r['wall_seconds'] for r in runs),
+        'requests_median': statistics.median(r['requests'] for r in runs),
+        'completeness_min': min(r['completeness'] for r in runs),
+    }
+    print(f"中位墙钟 {summary['wall_seconds_median']:.2f} s，中位请求数 {summary['requests_median']}，"
+          f"最低完整度 {summary['completeness_min']:.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': config_from_args(args).to_dict(), 'template': args.template,
+                       'actions': len(actions), 'summary': summary, 'runs': runs},
+                      f, ensure_ascii=False, indent=2)
+    if summary['completeness_min'] < args.min_completeness:
+        print(f"完整度低于要求的 {args.min_completeness:.1%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动基准：无界面启动各入口（以及可选的PyInstaller打包程序），测量
+导入完成时间、Blocks构建完成时间、首个HTTP 200时间和峰值内存，超出预算时返回非零退出码
+
+每个入口启动两个全新进程：
+    import 阶段：只执行入口模块顶层代码（run_name不是__main__），测导入耗时
+    launch 阶段：按__main__运行入口；Blocks.launch被替换为不打开浏览器、不share、不阻塞的版本，
+                调用launch的时刻即Blocks构建完成，父进程轮询首页直到HTTP 200
+时间均从父进程创建子进程开始计算（包含解释器启动）。峰值内存读取 /proc/<pid>/status 的VmHWM（Linux）。
+
+用法:
+    python benchmarks/bench_startup.py [app.py app_simple.py ...] [--repeat 3]
+        [--budget benchmarks/startup_budget.json] [--bundle dist/breathVOICE/breathVOICE] [--json result.json]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import argparse
+import statistics
+import subprocess
+import threading
+import urllib.request
+import urllib.error
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DEFAULT_ENTRIES = ['app.py', 'app_standalone.py', 'app_simple.py', 'app_csv_editor.py']
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+EVENT_PREFIX = '[bench_startup] '
+METRICS = ['import_s', 'blocks_s', 'ready_s', 'peak_rss_mb']
+
+
+def emit(event):
+    """子进程向父进程报告事件（墙钟时间，父进程据此计算相对耗时）"""
+    sys.stdout.write(EVENT_PREFIX + json.dumps({'event': event, 'time': time.time()}) + '\n')
+    sys.stdout.flush()
+
+
+def run_child(phase, entry):
+    """子进程：import阶段执行入口顶层代码后退出；launch阶段运行入口直到被父进程终止"""
+    import runpy
+    entry_path = os.path.join(REPO_ROOT, entry)
+    sys.path.insert(0, REPO_ROOT)
+    sys.argv = [entry_path]
+
+    if phase == 'import':
+        runpy.run_path(entry_path, run_name='__bench_import__')
+        emit('imported')
+        os._exit(0)
+
+    import webbrowser
+    import gradio as gr
+
+    webbrowser.open = lambda *args, **kwargs: False
+    original_launch = gr.Blocks.launch
+    port = int(os.environ['GRADIO_SERVER_PORT'])
+
+    def bench_launch(self, *args, **kwargs):
+        emit('blocks')
+        kwargs.update(inbrowser=False, share=False, server_name='127.0.0.1',
+                      server_port=port, prevent_thread_lock=True)
+        original_launch(self, *args, **kwargs)
+        emit('launched')
+        while True:
+            time.sleep(1)
+
+    gr.Blocks.launch = bench_launch
+    runpy.run_path(entry_path, run_name='__main__')
+    # 入口没有调用launch就返回了
+    emit('exited')
+    os._exit(1)
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _child_pids(pid):
+    """列出pid及其所有子孙进程（PyInstaller单文件模式下引导进程会再启动一个子进程）"""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(p) for p in f.read().split()]
+    except OSError:
+        children = []
+    for child in children:
+        pids.extend(_child_pids(child))
+    return pids
+
+
+def peak_rss_mb(pid):
+    """进程树的峰值常驻内存（MB），读取VmHWM；不支持时返回None"""
+    total_kb = 0
+    found = False
+    for p in _child_pids(pid):
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        total_kb += int(line.split()[1])
+                        found = True
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024 if found else None
+
+
+class ChildProcess:
+    """启动子进程并在后台读取输出中的事件"""
+
+    def __init__(self, cmd, env):
+        self.events = {}
+        self.output = []
+        self.start_time = time.time()
+        self.proc = subprocess.Popen(
+            cmd, cwd=REPO_ROOT, env=env, stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding='utf-8', errors='replace', start_new_session=True
+        )
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            if line.startswith(EVENT_PREFIX):
+                try:
+                    event = json.loads(line[len(EVENT_PREFIX):])
+                except ValueError:
+                    continue
+                self.events[event['event']] = event['time'] - self.start_time
+            else:
+                self.output.append(line)
+                del self.output[:-40]
+
+    def wait_event(self, name, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if name in self.events:
+                return self.events[name]
+            if self.proc.poll() is not None:
+                self._reader.join(timeout=1)
+                return self.events.get(name)
+            time.sleep(0.01)
+        return None
+
+    def wait_http_200(self, url, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                return None
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return time.time() - self.start_time
+            except (urllib.error.URLError, OSError):
+                pass
+            time.sleep(0.02)
+        return None
+
+    def stop(self):
+        if self.proc.poll() is None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGTERM)
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+                self.proc.wait()
+            except ProcessLookupError:
+                pass
+        self._reader.join(timeout=1)
+
+
+def child_env(port):
+    env = dict(os.environ)
+    env.update({
+        'GRADIO_SERVER_PORT': str(port),
+        'GRADIO_ANALYTICS_ENABLED': 'False',
+        'BREATHVOICE_NO_BROWSER': '1',
+        'PYTHONUNBUFFERED': '1',
+    })
+    return env
+
+
+def measure_entry(entry, timeout):
+    """测量一个Python入口，返回 {import_s, blocks_s, ready_s, peak_rss_mb, error}"""
+    result = {'import_s': None, 'blocks_s': None, 'ready_s': None, 'peak_rss_mb': None, 'error': None}
+    this_file = os.path.abspath(__file__)
+
+    child = ChildProcess([sys.executable, this_file, '--child', 'import', entry], child_env(free_port()))
+    result['import_s'] = child.wait_event('imported', timeout)
+    child.stop()
+    if result['import_s'] is None:
+        result['error'] = '导入失败: ' + ''.join(child.output[-5:]).strip()
+        return result
+
+    port = free_port()
+    child = ChildProcess([sys.executable, this_file, '--child', 'launch', entry], child_env(port))
+    try:
+        result['blocks_s'] = child.wait_event('blocks', timeout)
+        if result['blocks_s'] is None:
+            result['error'] = '未调用launch: ' + ''.join(child.output[-5:]).strip()
+            return result
+        result['ready_s'] = child.wait_http_200(f'http://127.0.0.1:{port}/', timeout)
+        if result['ready_s'] is None:
+            result['error'] = f'{timeout:.0f}秒内未返回HTTP 200'
+        # 首页加载后稍等，让内存峰值包含首个请求的处理
+        time.sleep(0.5)
+        result['peak_rss_mb'] = peak_rss_mb(child.proc.pid)
+    finally:
+        child.stop()
+    return result
+
+
+def measure_bundle(executable, timeout):
+    """测量PyInstaller打包程序：只能从外部测首个HTTP 200和峰值内存"""
+    result = {'import_s': None, 'blocks_s': None, 'ready_s': None, 'peak_rss_mb': None, 'error': None}
+    port = free_port()
+    child = ChildProcess([os.path.abspath(executable)], child_env(port))
+    try:
+        result['ready_s'] = child.wait_http_200(f'http://127.0.0.1:{port}/', timeout)
+        if result['ready_s'] is None:
+            result['error'] = f'{timeout:.0f}秒内未返回HTTP 200'
+        time.sleep(0.5)
+        result['peak_rss_mb'] = peak_rss_mb(child.proc.pid)
+    finally:
+        child.stop()
+    return result
+
+
+def summarize(runs):
+    """多次运行取中位数；任一次出错时保留第一个错误"""
+    summary = {'error': next((r['error'] for r in runs if r['error']), None)}
+    for metric in METRICS:
+        values = [r[metric] for r in runs if r[metric] is not None]
+        summary[metric] = statistics.median(values) if values else None
+    return summary
+
+
+def check_budget(name, summary, budget):
+    """返回超出预算的描述列表"""
+    violations = []
+    if summary['error']:
+        violations.append(f"{name}: {summary['error']}")
+    for metric, limit in budget.get(name, {}).items():
+        value = summary.get(metric)
+        if value is not None and value > limit:
+            violations.append(f"{name}: {metric} = {value:.2f} 超出预算 {limit}")
+    return violations
+
+
+def format_value(value, precision):
+    return f"{'-':>9}" if value is None else f"{value:9.{precision}f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="breathVOICE 启动基准")
+    parser.add_argument('entries', nargs='*', default=DEFAULT_ENTRIES, help="要测量的入口文件")
+    parser.add_argument('--repeat', type=int, default=3, help="每个入口重复次数（取中位数）")
+    parser.add_argument('--timeout', type=float, default=120.0, help="每个阶段的超时（秒）")
+    parser.add_argument('--budget', default=DEFAULT_BUDGET, help="预算配置JSON，空字符串表示不检查")
+    parser.add_argument('--bundle', help="PyInstaller打包后的可执行文件（如 dist/breathVOICE/breathVOICE）")
+    parser.add_argument('--json', help="将结果写入JSON文件")
+    parser.add_argument('--child', choices=['import', 'launch'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.entries[0])
+        return 0
+
+    budget = {}
+    if args.budget:
+        with open(args.budget, 'r', encoding='utf-8') as f:
+            budget = json.load(f)
+
+    targets = [(entry, lambda entry=entry: measure_entry(entry, args.timeout)) for entry in args.entries]
+    if args.bundle:
+        targets.append(('bundle', lambda: measure_bundle(args.bundle, args.timeout)))
+
+    results = {}
+    print(f"{'入口':<20} {'import s':>9} {'blocks s':>9} {'ready s':>9} {'峰值 MB':>9}")
+    for name, measure in targets:
+        summary = summarize([measure() for _ in range(max(1, args.repeat))])
+        results[name] = summary
+        print(f"{name:<20} {format_value(summary['import_s'], 2)} {format_value(summary['blocks_s'], 2)} "
+              f"{format_value(summary['ready_s'], 2)} {format_value(summary['peak_rss_mb'], 0)}"
+              + (f"  ❌ {summary['error']}" if summary['error'] else ''))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'budget': budget}, f, ensure_ascii=False, indent=2)
+
+    violations = []
+    for name in results:
+        violations.extend(check_budget(name, results[name], budget))
+    if violations:
+        print("超出启动预算:")
+        for violation in violations:
+            print(f"  {violation}")
+        return 1
+    if budget:
+        print("全部入口均在启动预算内")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟的OpenAI兼容接口（/v1/chat/completions，支持流式），用于离线测量台词生成流程
+
+脚本化行为（每个请求按概率或按 --script 顺序选择）：
+    latency     首个内容块前的延迟（秒）
+    tokens/s    流式输出速度
+    drop        随机省略部分请求的动作参数
+    malformed   输出不合法的JSON（尾随逗号、单引号、无引号键名、截断）
+    fenced      用 ```json 代码块包裹输出
+    429         返回速率限制错误（带retry-after-ms头）
+
+请求中的动作参数从提示词JSON的 batch_parameters 字段读取，回复的台词包含动作参数本身，
+便于校验结果是否对应。
+
+用法:
+    python benchmarks/mock_llm_server.py --port 8765 --drop-rate 0.1 --malformed-rate 0.1 --rate-limit-rate 0.05
+    python benchmarks/mock_llm_server.py --script 429,ok,fenced,malformed,drop   # 按顺序循环
+    GET /stats 返回各行为的计数
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BEHAVIORS = ('ok', 'drop', 'malformed', 'fenced', '429')
+MALFORMED_VARIANTS = ('trailing_comma', 'single_quotes', 'unquoted_keys', 'truncated')
+
+
+class MockConfig:
+    """模拟服务器的行为配置"""
+
+    def __init__(self, latency=0.2, jitter=0.05, tokens_per_second=400.0, chars_per_token=2,
+                 drop_rate=0.0, drop_fraction=0.3, malformed_rate=0.0, fence_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=0.05, script=None, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.chars_per_token = chars_per_token
+        self.drop_rate = drop_rate
+        self.drop_fraction = drop_fraction
+        self.malformed_rate = malformed_rate
+        self.fence_rate = fence_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.script = list(script or [])
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class MockLLMServer:
+    """
+    在后台线程运行的模拟服务器
+
+    用法：
+        server = MockLLMServer(MockConfig(drop_rate=0.1)).start()
+        base_url = server.base_url      # http://127.0.0.1:<端口>/v1
+        ...
+        server.stop()
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._script_index = 0
+        self.stats = {'requests': 0, 'stream_requests': 0, 'tokens': 0, 'dropped_keys': 0,
+                      'behaviors': {name: 0 for name in BEHAVIORS}}
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    # ---- 行为选择与回复内容 ----
+
+    def choose_behavior(self, scripted=True):
+        """按脚本顺序或按概率选择本次请求的行为；scripted为False时（连接测试）始终正常回复"""
+        config = self.config
+        with self._lock:
+            if not scripted:
+                behavior = 'ok'
+            elif config.script:
+                behavior = config.script[self._script_index % len(config.script)]
+                self._script_index += 1
+            else:
+                roll = self._rng.random()
+                behavior = 'ok'
+                for name, rate in (('429', config.rate_limit_rate), ('malformed', config.malformed_rate),
+                                   ('drop', config.drop_rate), ('fenced', config.fence_rate)):
+                    if roll < rate:
+                        behavior = name
+                        break
+                    roll -= rate
+            self.stats['requests'] += 1
+            self.stats['behaviors'][behavior] += 1
+            return behavior, random.Random(self._rng.random())
+
+    def build_content(self, keys, behavior, rng):
+        """生成回复文本：每个动作参数一条包含该参数的台词"""
+        if behavior == 'drop' and keys:
+            dropped = max(1, int(len(keys) * self.config.drop_fraction))
+            kept = set(rng.sample(keys, len(keys) - dropped))
+            keys = [key for key in keys if key in kept]
+            with self._lock:
+                self.stats['dropped_keys'] += dropped
+        data = {key: f"【{key}】模拟台词{rng.randint(1, 999)}，呼吸渐渐急促" for key in keys}
+        content = json.dumps(data, ensure_ascii=False, indent=2)
+
+        if behavior == 'malformed':
+            variant = rng.choice(MALFORMED_VARIANTS)
+            if variant == 'trailing_comma':
+                content = content[:content.rfind('}')].rstrip() + ',\n}'
+            elif variant == 'single_quotes':
+                content = content.replace('"', "'")
+            elif variant == 'unquoted_keys':
+                content = re.sub(r'"([^"]+)":', r'\1:', content)
+            else:
+                content = content[:max(1, int(len(content) * 0.8))]
+        elif behavior == 'fenced':
+            content = f"以下是生成的台词：\n```json\n{content}\n```\n希望符合要求。"
+        return content
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip('/') == '/stats':
+                    self._send_json(200, server.snapshot())
+                else:
+                    self._send_json(404, {'error': {'message': 'not found'}})
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, {'error': {'message': 'not found'}})
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._send_json(400, {'error': {'message': 'invalid json'}})
+                    return
+                server.handle_completion(self, request)
+
+        return Handler
+
+    def handle_completion(self, handler, request):
+        config = self.config
+        keys = extract_batch_parameters(request.get('messages', []))
+        behavior, rng = self.choose_behavior(scripted=bool(keys))
+        if behavior == '429':
+            handler._send_json(429, {'error': {'message': 'Rate limit exceeded (mock)', 'type': 'rate_limit_error',
+                                               'code': 'rate_limit_exceeded'}},
+                               headers={'retry-after-ms': str(int(config.retry_after * 1000))})
+            return
+
+        model = request.get('model', 'mock')
+        created = int(time.time())
+        completion_id = f"chatcmpl-mock-{created}-{rng.randint(0, 1 << 30)}"
+        time.sleep(max(0.0, config.latency + rng.uniform(-config.jitter, config.jitter)))
+
+        if not request.get('stream'):
+            # 连接测试等非流式请求
+            content = self.build_content(keys, behavior, rng) if keys else "OK"
+            handler._send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(content) // config.chars_per_token,
+                          'total_tokens': len(content) // config.chars_per_token},
+            })
+            return
+
+        with self._lock:
+            self.stats['stream_requests'] += 1
+        content = self.build_content(keys, behavior, rng)
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+
+        def send_chunk(delta, finish_reason=None):
+            payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                       'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+            handler.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+            handler.wfile.flush()
+
+        step = max(1, config.chars_per_token)
+        interval = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        try:
+            send_chunk({'role': 'assistant', 'content': ''})
+            next_time = time.perf_counter()
+            for i in range(0, len(content), step):
+                send_chunk({'content': content[i:i + step]})
+                with self._lock:
+                    self.stats['tokens'] += 1
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            send_chunk({}, 'stop')
+            if (request.get('stream_options') or {}).get('include_usage'):
+                # 与OpenAI接口一致：请求了用量时在[DONE]前追加一个choices为空、带usage的块
+                tokens = (len(content) + step - 1) // step
+                payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                           'choices': [], 'usage': {'prompt_tokens': 0, 'completion_tokens': tokens,
+                                                    'total_tokens': tokens}}
+                handler.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端中途停止
+            pass
+
+
+def extract_batch_parameters(messages):
+    """从用户消息中的提示词JSON读取 batch_parameters"""
+    for message in messages:
+        if message.get('role') != 'user':
+            continue
+        text = message.get('content') or ''
+        match = re.search(r'"batch_parameters"\s*:\s*(\[.*?\])', text, re.DOTALL)
+        if match:
+            try:
+                return [str(key) for key in json.loads(match.group(1))]
+            except ValueError:
+                pass
+    return []
+
+
+def add_config_arguments(parser):
+    """命令行参数（基准脚本共用）"""
+    parser.add_argument('--latency', type=float, default=0.2, help="首个内容块前的延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.05, help="延迟的随机抖动（秒）")
+    parser.add_argument('--tokens-per-second', type=float, default=400.0, help="流式输出速度")
+    parser.add_argument('--chars-per-token', type=int, default=2, help="每个流式块的字符数")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="省略部分动作参数的请求比例")
+    parser.add_argument('--drop-fraction', type=float, default=0.3, help="省略时丢弃的动作参数比例")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="输出不合法JSON的请求比例")
+    parser.add_argument('--fence-rate', type=float, default=0.0, help="用```json代码块包裹的请求比例")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="返回429的请求比例")
+    parser.add_argument('--retry-after', type=float, default=0.05, help="429响应的retry-after（秒）")
+    parser.add_argument('--script', type=lambda value: [v.strip() for v in value.split(',') if v.strip()],
+                        help=f"按顺序循环的行为列表（{','.join(BEHAVIORS)}），指定时忽略各比例")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+
+
+def config_from_args(args):
+    for behavior in args.script or []:
+        if behavior not in BEHAVIORS:
+            raise SystemExit(f"未知的行为: {behavior}（可选: {', '.join(BEHAVIORS)}）")
+    return MockConfig(
+        latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second,
+        chars_per_token=args.chars_per_token, drop_rate=args.drop_rate, drop_fraction=args.drop_fraction,
+        malformed_rate=args.malformed_rate, fence_rate=args.fence_rate, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, script=args.script, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟的OpenAI兼容流式接口")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer(config_from_args(args), args.host, args.port).start()
+    print(f"模拟LLM接口已启动: {server.base_url}（Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.snapshot(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,21 +2,50 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+import json
+import time
 import shutil
 import platform
+import plistlib
 import subprocess
+import threading
 import psutil
 import tempfile
-import struct
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple
 
+from wav_reader import read_wav_info
+from device_sync import (
+    DeviceSync, entries_from_zip, entries_from_folder, benchmark_device_writes,
+    DEFAULT_BUFFER_SIZE, DEFAULT_MAX_WRITERS, DEFAULT_FSYNC_POLICY
+)
+from export_preflight import (
+    ExportPreflightIndex, BRE_SAMPLE_RATE, BRE_HEADER_SIZE,
+    CHARACTER_VOICE_FOLDERS, MATERIAL_VOICE_FOLDERS
+)
+
+# 设备测速结果文件在进程内共享，多台设备并发测速时串行读改写
+_device_profiles_lock = threading.Lock()
+
 
 class BreathKitExporter:
     """breathKIT导出器 - 处理USB设备检测和bre文件导出"""
     
     def __init__(self):
         self.system = platform.system()
+        # 导出预检索引（WAV头部信息缓存，增量并行扫描）
+        self.preflight = ExportPreflightIndex()
+        # 设备写入测速结果缓存，首次写入某个设备时测速并选择拷贝策略
+        self.auto_tune_copy = True
+        # (挂载点, st_dev) -> 卷标识
+        self._volume_identities = {}
+        if hasattr(sys, '_MEIPASS'):
+            self.device_profiles_path = os.path.expanduser(
+                '~/Library/Application Support/breathVOICE/cache/device_profiles.json')
+        else:
+            self.device_profiles_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'cache', 'device_profiles.json')
     
     def detect_usb_devices(self) -> List[Dict[str, str]]:
         """检测所有USB存储设备"""
@@ -99,6 +128,167 @@ class BreathKitExporter:
         
         return breathkit_devices
     
+    @staticmethod
+    def _mountpoint_of(path: str) -> str:
+        """路径所在卷的挂载点"""
+        path = os.path.abspath(path)
+        while not os.path.ismount(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return path
+    
+    def _volume_identity(self, lb_path: str) -> str:
+        """
+        卷标识：优先使用卷序列号/UUID（同一挂载点、同容量的不同U盘也能区分），取不到时使用st_dev
+        
+        结果按 (挂载点, st_dev) 缓存，避免每次获取拷贝策略都调用系统命令
+        """
+        mountpoint = self._mountpoint_of(lb_path)
+        try:
+            st_dev = os.stat(lb_path).st_dev
+        except OSError:
+            st_dev = 0
+        cached = self._volume_identities.get((mountpoint, st_dev))
+        if cached:
+            return cached
+        
+        identity = None
+        try:
+            if self.system == "Darwin":
+                result = subprocess.run(['diskutil', 'info', '-plist', mountpoint],
+                                        capture_output=True, timeout=5)
+                if result.returncode == 0:
+                    info = plistlib.loads(result.stdout)
+                    volume_id = info.get('VolumeUUID') or info.get('DiskUUID')
+                    if volume_id:
+                        identity = f"uuid:{volume_id}"
+            elif self.system == "Windows":
+                import ctypes
+                serial = ctypes.c_uint32()
+                root = os.path.splitdrive(mountpoint)[0] + '\\'
+                if ctypes.windll.kernel32.GetVolumeInformationW(
+                        ctypes.c_wchar_p(root), None, 0, ctypes.byref(serial), None, None, None, 0):
+                    identity = f"serial:{serial.value:08X}"
+            else:
+                # Linux：按挂载的块设备在 /dev/disk/by-uuid 中查找文件系统UUID
+                device = next((p.device for p in psutil.disk_partitions(all=True)
+                               if p.mountpoint == mountpoint), None)
+                by_uuid = '/dev/disk/by-uuid'
+                if device and os.path.isdir(by_uuid):
+                    device = os.path.realpath(device)
+                    for name in os.listdir(by_uuid):
+                        if os.path.realpath(os.path.join(by_uuid, name)) == device:
+                            identity = f"uuid:{name}"
+                            break
+        except Exception as e:
+            print(f"获取卷标识失败，使用设备号: {e}")
+        
+        identity = identity or f"dev:{st_dev}"
+        self._volume_identities[(mountpoint, st_dev)] = identity
+        return identity
+    
+    def _device_profile_key(self, lb_path: str, fstype: str = '') -> str:
+        """设备缓存键：路径 + 文件系统 + 容量 + 卷标识（同一挂载点换了U盘时重新测速）"""
+        try:
+            total = shutil.disk_usage(lb_path).total
+        except OSError:
+            total = 0
+        return f"{os.path.abspath(lb_path)}|{fstype.lower()}|{total}|{self._volume_identity(lb_path)}"
+    
+    def _load_device_profiles(self) -> Dict:
+        try:
+            with open(self.device_profiles_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_device_profiles(self, profiles: Dict):
+        os.makedirs(os.path.dirname(self.device_profiles_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.device_profiles-', suffix='.tmp',
+                                        dir=os.path.dirname(self.device_profiles_path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.device_profiles_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def benchmark_device(self, lb_path: str, fstype: str = '', **kwargs) -> Dict:
+        """
+        测量设备的顺序写入和小文件写入吞吐量，选择拷贝策略并按设备缓存
+        
+        Args:
+            lb_path (str): 设备上的LB文件夹
+            fstype (str): 文件系统类型，FAT系列不复制元数据
+            **kwargs: 传给benchmark_device_writes的测速参数
+            
+        Returns:
+            dict: 拷贝策略 {'buffer_size', 'max_writers', 'fsync_policy', 'copy_metadata',
+                           'sequential_mb_s', 'small_files_per_s', 'measured_at'}
+        """
+        result = benchmark_device_writes(lb_path, **kwargs)
+        strategy = {
+            'buffer_size': result['buffer_size'],
+            'max_writers': result['max_writers'],
+            'fsync_policy': result['fsync_policy'],
+            'copy_metadata': not self.is_fat32_filesystem({'fstype': fstype}) and fstype != '',
+            'sequential_mb_s': result['sequential_mb_s'],
+            'small_files_per_s': result['small_files_per_s'],
+            'measured_at': time.time()
+        }
+        key = self._device_profile_key(lb_path, fstype)
+        with _device_profiles_lock:
+            profiles = self._load_device_profiles()
+            profiles[key] = strategy
+            try:
+                self._save_device_profiles(profiles)
+            except OSError as e:
+                print(f"保存设备测速结果失败: {e}")
+        print(f"设备测速: 顺序写入 {strategy['sequential_mb_s']} MB/s，小文件 {strategy['small_files_per_s']} 个/s，"
+              f"缓冲区 {strategy['buffer_size'] // 1024}KB，写入线程 {strategy['max_writers']}，"
+              f"刷盘策略 {strategy['fsync_policy']}")
+        return strategy
+    
+    def get_copy_strategy(self, lb_path: str, fstype: str = '', refresh: bool = False) -> Dict:
+        """获取设备的拷贝策略：优先使用缓存，未测速过的设备先测速，测速失败时使用默认值"""
+        default = {
+            'buffer_size': DEFAULT_BUFFER_SIZE,
+            'max_writers': DEFAULT_MAX_WRITERS,
+            'fsync_policy': DEFAULT_FSYNC_POLICY,
+            'copy_metadata': False
+        }
+        if not self.auto_tune_copy and not refresh:
+            return default
+        
+        if not refresh:
+            cached = self._load_device_profiles().get(self._device_profile_key(lb_path, fstype))
+            if cached:
+                return cached
+        
+        try:
+            # 测速需要少量空闲空间
+            if shutil.disk_usage(lb_path).free < 64 * 1024 * 1024:
+                return default
+            return self.benchmark_device(lb_path, fstype)
+        except Exception as e:
+            print(f"设备测速失败，使用默认拷贝策略: {e}")
+            return default
+    
+    def create_device_sync(self, lb_path: str, fstype: str = '') -> DeviceSync:
+        """按设备的拷贝策略创建同步器"""
+        strategy = self.get_copy_strategy(lb_path, fstype)
+        return DeviceSync(
+            lb_path,
+            buffer_size=strategy['buffer_size'],
+            max_writers=strategy['max_writers'],
+            fsync_policy=strategy['fsync_policy'],
+            copy_metadata=strategy['copy_metadata']
+        )
+    
     def get_bre_files_from_zip(self, zip_path: str) -> List[str]:
         """从导出的ZIP文件中提取bre文件列表"""
         import zipfile
@@ -132,69 +322,33 @@ class BreathKitExporter:
             return False
     
     def copy_bre_files_to_breathkit(self, zip_path: str, device_info: Dict[str, str], 
-                                   progress_callback=None) -> Tuple[bool, str, Dict]:
-        """将bre文件从ZIP包复制到breathKIT设备"""
-        import tempfile
-        import zipfile
-        
+                                   progress_callback=None, byte_progress_callback=None) -> Tuple[bool, str, Dict]:
+        """将bre文件从ZIP包直接流式复制到breathKIT设备（不经过临时目录）"""
         try:
             lb_path = device_info['lb_path']
             
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 解压bre文件到临时目录
-                if not self.extract_bre_files_to_temp(zip_path, temp_dir):
-                    return False, "解压bre文件失败", {}
-                
-                # 统计文件
-                total_files = 0
-                copied_files = 0
-                errors = []
-                
-                # 遍历临时目录中的所有bre文件
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        if file.endswith('.bre'):
-                            total_files += 1
-                
-                if total_files == 0:
-                    return False, "ZIP文件中没有找到bre文件", {}
-                
-                # 复制文件
-                current_file = 0
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        if file.endswith('.bre'):
-                            current_file += 1
-                            
-                            if progress_callback:
-                                progress_callback(current_file, total_files, f"复制文件: {file}")
-                            
-                            try:
-                                src_path = os.path.join(root, file)
-                                
-                                # 保持目录结构
-                                rel_path = os.path.relpath(root, temp_dir)
-                                if rel_path == '.':
-                                    dst_dir = lb_path
-                                else:
-                                    dst_dir = os.path.join(lb_path, rel_path)
-                                
-                                os.makedirs(dst_dir, exist_ok=True)
-                                dst_path = os.path.join(dst_dir, file)
-                                
-                                shutil.copy2(src_path, dst_path)
-                                copied_files += 1
-                                
-                            except Exception as e:
-                                error_msg = f"复制文件 {file} 失败: {str(e)}"
-                                errors.append(error_msg)
-                                print(error_msg)
+            source_entries = entries_from_zip(zip_path)
+            total_files = len(source_entries)
+            if total_files == 0:
+                return False, "ZIP文件中没有找到bre文件", {}
+            
+            # 全量写入，同时更新设备清单，后续增量同步可直接复用
+            syncer = self.create_device_sync(lb_path, device_info.get('fstype', ''))
+            report = syncer.sync(
+                source_entries,
+                progress_callback=progress_callback,
+                delete_stale=False,
+                byte_progress_callback=byte_progress_callback,
+                force=True
+            )
+            errors = report['errors']
+            copied_files = total_files - len(errors)
             
             # 返回结果
             stats = {
                 'total_files': total_files,
                 'copied_files': copied_files,
+                'bytes_written': report['bytes_written'],
                 'errors': errors
             }
             
@@ -209,8 +363,48 @@ class BreathKitExporter:
         except Exception as e:
             return False, f"导出到breathKIT时出错: {str(e)}", {}
     
-    def export_to_breathkit(self, zip_path: str, progress_callback=None) -> Tuple[bool, str, Dict]:
-        """导出bre文件到breathKIT设备"""
+    def format_sync_report(self, report: Dict) -> str:
+        """生成增量同步的文字报告"""
+        prefix = "[预演] " if report.get('dry_run') else ""
+        lines = [
+            f"{prefix}新增 {len(report['added'])} 个，更新 {len(report['updated'])} 个，"
+            f"删除 {len(report['deleted'])} 个，未变化 {report['unchanged']} 个"
+        ]
+        if report.get('dry_run'):
+            lines.append(f"预计写入 {report.get('bytes_to_write', 0) / (1024**2):.1f} MB")
+        else:
+            lines.append(f"实际写入 {report['bytes_written'] / (1024**2):.1f} MB")
+        for label, key in (("新增", 'added'), ("更新", 'updated'), ("删除", 'deleted')):
+            for rel in report[key][:20]:
+                lines.append(f"  {label}: {rel}")
+            if len(report[key]) > 20:
+                lines.append(f"  ... 还有 {len(report[key]) - 20} 个{label}文件")
+        return "\n".join(lines)
+    
+    def sync_bre_files_to_breathkit(self, zip_path: str, device_info: Dict[str, str],
+                                    progress_callback=None, dry_run: bool = False,
+                                    byte_progress_callback=None) -> Tuple[bool, str, Dict]:
+        """增量同步ZIP包中的bre文件到breathKIT设备：只写入新增或变化的文件，并删除过期文件"""
+        try:
+            source_entries = entries_from_zip(zip_path)
+            if not source_entries:
+                return False, "ZIP文件中没有找到bre文件", {}
+            
+            syncer = self.create_device_sync(device_info['lb_path'], device_info.get('fstype', ''))
+            report = syncer.sync(source_entries, progress_callback=progress_callback, dry_run=dry_run,
+                                 byte_progress_callback=byte_progress_callback)
+            
+            message = self.format_sync_report(report)
+            if report['errors']:
+                message += f"\n{len(report['errors'])} 个文件同步失败"
+            return not report['errors'], message, report
+            
+        except Exception as e:
+            return False, f"同步到breathKIT时出错: {str(e)}", {}
+    
+    def export_to_breathkit(self, zip_path: str, progress_callback=None, sync: bool = True,
+                            dry_run: bool = False, byte_progress_callback=None) -> Tuple[bool, str, Dict]:
+        """导出bre文件到breathKIT设备（默认增量同步，sync=False时完整复制）"""
         # 查找breathKIT设备
         devices = self.find_breathkit_devices()
         
@@ -228,8 +422,89 @@ class BreathKitExporter:
         if not os.path.exists(zip_path):
             return False, f"ZIP文件不存在: {zip_path}", {}
         
-        # 执行复制
-        return self.copy_bre_files_to_breathkit(zip_path, device, progress_callback)
+        # 执行同步或复制
+        if sync:
+            return self.sync_bre_files_to_breathkit(zip_path, device, progress_callback, dry_run=dry_run,
+                                                    byte_progress_callback=byte_progress_callback)
+        return self.copy_bre_files_to_breathkit(zip_path, device, progress_callback, byte_progress_callback)
+    
+    def export_to_multiple_devices(self, zip_path: str, devices: Optional[List[Dict[str, str]]] = None,
+                                   progress_callback=None, sync: bool = True, verify: bool = True) -> Dict:
+        """
+        将同一个语音包并发写入多台breathKIT设备
+        
+        ZIP目录只读取一次，每台设备一个写入线程（设备内部仍按各自的拷贝策略并行写入），
+        总耗时接近最慢的设备。每台设备独立报告进度、错误和校验结果。
+        
+        Args:
+            zip_path (str): 语音包ZIP文件路径
+            devices (list): 目标设备列表，省略时使用find_breathkit_devices()的结果
+            progress_callback (callable): 进度回调函数，接收(device_info, current, total, message)
+            sync (bool): 增量同步，False时全量写入
+            verify (bool): 写入后校验并重新写入不一致的文件
+            
+        Returns:
+            dict: {'success': bool, 'message': str, 'devices': {lb_path: 单台设备结果}}
+        """
+        if devices is None:
+            devices = self.find_breathkit_devices()
+        if not devices:
+            return {'success': False, 'message': "未找到符合要求的breathKIT设备（需要FAT32格式且包含LB文件夹）", 'devices': {}}
+        
+        try:
+            source_entries = entries_from_zip(zip_path)
+        except Exception as e:
+            return {'success': False, 'message': f"读取语音包失败: {str(e)}", 'devices': {}}
+        if not source_entries:
+            return {'success': False, 'message': "ZIP文件中没有找到bre文件", 'devices': {}}
+        
+        def export_one(device):
+            fstype = device.get('fstype', '')
+            syncer = self.create_device_sync(device['lb_path'], fstype)
+            callback = (lambda current, total, message: progress_callback(device, current, total, message)) \
+                if progress_callback else None
+            report = syncer.sync(source_entries, progress_callback=callback, delete_stale=sync, force=not sync)
+            result = {
+                'success': not report['errors'],
+                'message': self.format_sync_report(report),
+                'sync_report': report,
+                'verify_report': None
+            }
+            if report['errors']:
+                result['message'] += f"\n{len(report['errors'])} 个文件写入失败"
+            elif verify:
+                verify_ok, verify_msg, verify_report = self.verify_device_files(
+                    source_entries, device['lb_path'],
+                    (lambda fraction, message: progress_callback(device, fraction, 1.0, message))
+                    if progress_callback else None,
+                    fstype=fstype
+                )
+                result['success'] = verify_ok
+                result['message'] += f"\n{verify_msg}"
+                result['verify_report'] = verify_report
+            return result
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            futures = {executor.submit(export_one, device): device for device in devices}
+            for future in as_completed(futures):
+                device = futures[future]
+                try:
+                    results[device['lb_path']] = future.result()
+                except Exception as e:
+                    results[device['lb_path']] = {
+                        'success': False,
+                        'message': f"写入设备时出错: {str(e)}",
+                        'sync_report': None,
+                        'verify_report': None
+                    }
+        
+        succeeded = sum(1 for result in results.values() if result['success'])
+        message = f"成功写入 {succeeded}/{len(devices)} 台breathKIT设备"
+        for lb_path, result in results.items():
+            if not result['success']:
+                message += f"\n{lb_path}: {result['message']}"
+        return {'success': succeeded == len(devices), 'message': message, 'devices': results}
     
     def get_folder_size(self, folder_path):
         """
@@ -253,49 +528,8 @@ class BreathKitExporter:
         return total_size
     
     def get_wav_info(self, wav_path):
-        """获取WAV文件信息"""
-        try:
-            with open(wav_path, 'rb') as f:
-                # 读取WAV头部
-                riff = f.read(4)
-                if riff != b'RIFF':
-                    return None
-                
-                file_size = struct.unpack('<I', f.read(4))[0]
-                wave = f.read(4)
-                if wave != b'WAVE':
-                    return None
-                
-                fmt_chunk = f.read(4)
-                if fmt_chunk != b'fmt ':
-                    return None
-                
-                fmt_size = struct.unpack('<I', f.read(4))[0]
-                audio_format = struct.unpack('<H', f.read(2))[0]
-                num_channels = struct.unpack('<H', f.read(2))[0]
-                sample_rate = struct.unpack('<I', f.read(4))[0]
-                byte_rate = struct.unpack('<I', f.read(4))[0]
-                block_align = struct.unpack('<H', f.read(2))[0]
-                bits_per_sample = struct.unpack('<H', f.read(2))[0]
-                
-                data_chunk = f.read(4)
-                if data_chunk != b'data':
-                    return None
-                
-                data_size = struct.unpack('<I', f.read(4))[0]
-                
-                return {
-                    'file_size': file_size,
-                    'audio_format': audio_format,
-                    'num_channels': num_channels,
-                    'sample_rate': sample_rate,
-                    'bits_per_sample': bits_per_sample,
-                    'data_size': data_size,
-                    'header_size': 44  # 标准WAV头部大小
-                }
-        except Exception as e:
-            print(f"Error reading {wav_path}: {e}")
-            return None
+        """获取WAV文件信息（逐块解析RIFF头部，兼容LIST/fact等附加块）"""
+        return read_wav_info(wav_path)
 
     def calculate_bre_size(self, wav_path):
         """计算转换为BRE后的文件大小"""
@@ -304,25 +538,44 @@ class BreathKitExporter:
             return 0
         
         # 根据C代码分析：
-        # 1. WAV头部保持不变 (44字节)
-        # 2. 音频数据大小保持不变 (只是从int16_t转换为uint16_t)
-        # 3. BRE文件大小 = WAV文件大小
-        return info['header_size'] + info['data_size']
+        # 1. 导出时先转换为48kHz/16bit/单声道WAV，再转为BRE
+        # 2. WAV头部保持不变 (44字节)，音频数据大小保持不变 (只是从int16_t转换为uint16_t)
+        # 3. BRE文件大小 = 转换后WAV文件大小
+        output_frames = int(info['num_frames'] * BRE_SAMPLE_RATE / info['sample_rate'])
+        return BRE_HEADER_SIZE + output_frames * 2
 
     def calculate_bre_folder_size(self, folder_path):
-        """计算文件夹中所有WAV文件转换为BRE后的总大小"""
-        total_size = 0
+        """计算文件夹中所有WAV文件转换为BRE后的总大小（使用预检索引，只读取变化文件的头部）"""
         try:
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                for filename in filenames:
-                    if filename.endswith('.wav'):
-                        file_path = os.path.join(dirpath, filename)
-                        if os.path.exists(file_path):
-                            bre_size = self.calculate_bre_size(file_path)
-                            total_size += bre_size
+            return self.preflight.scan(folder_path)['total_bre_size']
         except Exception as e:
             print(f"计算BRE文件夹大小失败: {str(e)}")
-        return total_size
+            return 0
+    
+    def preflight_export(self, character_folder, material_pack_folder=None):
+        """
+        导出前预检：汇总预估BRE大小，并在转换前标记损坏或格式不支持的文件
+        
+        Args:
+            character_folder (str): 角色文件夹路径
+            material_pack_folder (str): 素材包文件夹路径（可选）
+            
+        Returns:
+            dict: {'total_bre_size': int, 'files': int, 'problems': list[(路径, 问题描述)]}
+        """
+        reports = [self.preflight.scan(character_folder, CHARACTER_VOICE_FOLDERS)]
+        if material_pack_folder:
+            reports.append(self.preflight.scan(material_pack_folder, MATERIAL_VOICE_FOLDERS))
+        
+        problems = []
+        for report in reports:
+            problems.extend((os.path.join(report['folder'], rel), msg) for rel, msg in report['problems'])
+        
+        return {
+            'total_bre_size': sum(r['total_bre_size'] for r in reports),
+            'files': sum(r['files'] for r in reports),
+            'problems': problems
+        }
     
     def get_disk_free_space(self, path):
         """
@@ -493,7 +746,74 @@ class BreathKitExporter:
         except Exception as e:
             return False, f"移动文件夹时出错: {str(e)}"
     
-    def export_to_device_path(self, zip_path: str, character_name: str, lb_path: str, progress_callback=None) -> Dict:
+    def sync_folder_with_progress(self, source_folder, target_folder, progress_callback=None, dry_run=False):
+        """
+        增量同步文件夹到设备：只写入变化的文件，删除目标中多余的文件
+        
+        Args:
+            source_folder (str): 源文件夹路径
+            target_folder (str): 目标文件夹路径（例如 LB/角色名）
+            progress_callback (callable): 进度回调函数，接收(progress, desc)参数
+            dry_run (bool): 只生成报告，不修改设备
+            
+        Returns:
+            tuple: (bool, str, dict) - (是否成功, 消息, 同步报告)
+        """
+        try:
+            source_entries = entries_from_folder(source_folder, prefix=os.path.basename(target_folder))
+            if not source_entries:
+                return False, "源文件夹为空", {}
+            
+            os.makedirs(os.path.dirname(target_folder), exist_ok=True)
+            syncer = self.create_device_sync(os.path.dirname(target_folder))
+            report = syncer.sync(
+                source_entries,
+                progress_callback=(lambda current, total, message: progress_callback(current / total, message))
+                if progress_callback else None,
+                dry_run=dry_run
+            )
+            
+            message = self.format_sync_report(report)
+            if report['errors']:
+                return False, f"同步失败: {'; '.join(report['errors'][:3])}", report
+            return True, message, report
+            
+        except Exception as e:
+            return False, f"同步文件夹时出错: {str(e)}", {}
+    
+    def verify_device_files(self, source_entries, lb_path, progress_callback=None, repair=True, fstype: str = ''):
+        """
+        写入后校验：并行计算设备上文件的CRC32并与导出时记录的值比对，不一致的文件重新写入
+        
+        Args:
+            source_entries (dict): entries_from_folder / entries_from_zip 的结果
+            lb_path (str): LB文件夹路径
+            progress_callback (callable): 进度回调函数，接收(progress, desc)参数
+            repair (bool): 是否重新写入不一致的文件（需要源文件仍然存在）
+            fstype (str): 文件系统类型
+            
+        Returns:
+            tuple: (bool, str, dict) - (是否全部一致, 消息, 校验报告)
+        """
+        try:
+            syncer = self.create_device_sync(lb_path, fstype)
+            report = syncer.verify(
+                source_entries,
+                progress_callback=(lambda current, total, message: progress_callback(current / total, message))
+                if progress_callback else None,
+                repair=repair
+            )
+            bad = len(report['mismatched']) + len(report['missing'])
+            if bad == 0:
+                return True, f"校验通过: {report['verified']} 个文件与语音包一致", report
+            if repair and len(report['repaired']) == bad and not report['errors']:
+                return True, f"校验发现 {bad} 个文件不一致，已重新写入并校验通过", report
+            return False, f"校验失败: {bad} 个文件不一致，{len(report['repaired'])} 个已修复", report
+        except Exception as e:
+            return False, f"校验设备文件时出错: {str(e)}", {}
+    
+    def export_to_device_path(self, zip_path: str, character_name: str, lb_path: str, progress_callback=None,
+                              sync: bool = True, dry_run: bool = False, verify: bool = True) -> Dict:
         """
         导出到指定的LB文件夹路径（移动文件夹而非复制ZIP）
         
@@ -502,6 +822,9 @@ class BreathKitExporter:
             character_name (str): 角色名称
             lb_path (str): LB文件夹路径
             progress_callback (callable): 进度回调函数
+            sync (bool): 增量同步（只写入变化的文件），False时删除后整体移动
+            dry_run (bool): 仅增量同步时有效，只返回同步报告不修改设备
+            verify (bool): 写入后校验设备上的文件，并重新写入不一致的文件
             
         Returns:
             Dict: 导出结果
@@ -558,15 +881,56 @@ class BreathKitExporter:
             # 目标路径
             target_folder = os.path.join(lb_path, character_name)
             
+            if sync:
+                sync_success, sync_msg, sync_report = self.sync_folder_with_progress(
+                    character_folder, target_folder, progress_callback, dry_run=dry_run
+                )
+                verify_report = None
+                if sync_success and not dry_run:
+                    if verify:
+                        verify_ok, verify_msg, verify_report = self.verify_device_files(
+                            entries_from_folder(character_folder, prefix=character_name), lb_path, progress_callback
+                        )
+                        sync_msg += f"\n{verify_msg}"
+                        sync_success = verify_ok
+                    if sync_success:
+                        # 同步完成后删除源文件夹，保持"移动"语义
+                        shutil.rmtree(character_folder)
+                return {
+                    'success': sync_success,
+                    'message': f"角色文件夹已同步到: {target_folder}\n{sync_msg}" if sync_success else sync_msg,
+                    'device': {
+                        'device': 'manual',
+                        'fstype': 'unknown',
+                        'lb_path': lb_path
+                    } if sync_success else None,
+                    'sync_report': sync_report,
+                    'verify_report': verify_report
+                }
+            
             # 如果目标文件夹已存在，询问是否覆盖（这里直接覆盖）
             if os.path.exists(target_folder):
                 shutil.rmtree(target_folder)
             
+            # 移动前记录文件CRC32，用于移动后校验（源文件夹会被删除，不一致时无法重新写入）
+            source_entries = entries_from_folder(character_folder, prefix=character_name) if verify else None
+            
             # 移动文件夹
             move_success, move_msg = self.move_folder_with_progress(
                 character_folder, target_folder, progress_callback
             )
             
+            if move_success and verify:
+                verify_ok, verify_msg, _ = self.verify_device_files(
+                    source_entries, lb_path, progress_callback, repair=False
+                )
+                if not verify_ok:
+                    return {
+                        'success': False,
+                        'message': f"角色文件夹已移动到: {target_folder}，但{verify_msg}",
+                        'device': None
+                    }
+            
             if move_success:
                 return {
                     'success': True,
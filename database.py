@@ -2,6 +2,162 @@ import sqlite3
 import json
 import os
 import sys
+import queue
+import threading
+from contextlib import contextmanager
+
+# 连接池参数：Gradio线程池并发处理请求，连接复用以保留预编译语句缓存
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _migrate_base_schema(conn):
+    """版本1：基础表结构；旧数据库缺少的列在这里补齐"""
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS characters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            description TEXT,
+            avatar_path TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # 早期版本的characters表缺少这些列
+    # SQLite的ALTER TABLE不允许非常量默认值（CURRENT_TIMESTAMP），时间列先以NULL添加再回填
+    existing = _table_columns(conn, 'characters')
+    for column, definition in (
+        ('description', 'TEXT'),
+        ('avatar_path', 'TEXT'),
+        ('created_at', 'TIMESTAMP'),
+        ('updated_at', 'TIMESTAMP'),
+    ):
+        if column not in existing:
+            c.execute(f"ALTER TABLE characters ADD COLUMN {column} {definition}")
+            if definition == 'TIMESTAMP':
+                c.execute(f"UPDATE characters SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS llm_configs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            base_url TEXT,
+            api_key TEXT,
+            model TEXT,
+            system_prompt TEXT,
+            user_prompt_template TEXT,
+            generation_params TEXT -- Store as JSON string
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS dialogue_sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            character_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            FOREIGN KEY (character_id) REFERENCES characters (id)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS dialogues (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            set_id INTEGER NOT NULL,
+            action_parameter TEXT NOT NULL,
+            dialogue TEXT NOT NULL,
+            FOREIGN KEY (set_id) REFERENCES dialogue_sets (id)
+        )
+    ''')
+
+
+def _migrate_dialogue_indexes(conn):
+    """版本2：按角色查对话集、按对话集查台词的二级索引"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dialogue_sets_character_id ON dialogue_sets (character_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dialogues_set_id ON dialogues (set_id)")
+
+
+# 结构迁移列表：(版本号, 迁移函数)，只能在末尾追加，已发布的迁移不要修改
+MIGRATIONS = [
+    (1, _migrate_base_schema),
+    (2, _migrate_dialogue_indexes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# 本进程内已确认结构为最新版本的数据库文件，之后的实例不再检查
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+# 进程内共享的数据库实例
+_shared_databases = {}
+_shared_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """线程安全的SQLite连接池：WAL模式，连接在线程间复用（同一时刻只被一个线程持有）"""
+
+    def __init__(self, db_name, max_size=POOL_SIZE, busy_timeout_ms=BUSY_TIMEOUT_MS):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        # WAL模式下读写互不阻塞；synchronous=NORMAL在WAL下仍保证数据库一致性
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def acquire(self):
+        """取出一个空闲连接；池未满时新建，已满时等待其他线程归还"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("数据库连接池已耗尽，等待空闲连接超时")
+
+    def release(self, conn):
+        """归还连接"""
+        self._idle.put(conn)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
 
 class CharacterDatabase:
     def __init__(self, db_name='voice_pack_workflow.db'):
@@ -13,96 +169,115 @@ class CharacterDatabase:
             self.db_name = os.path.join(db_dir, db_name)
         else:
             self.db_name = db_name
+        self.pool = ConnectionPool(self.db_name)
+        # 角色和LLM配置的读缓存，写方法按命名空间整体失效
+        self._cache = {}
+        self._cache_generation = {}
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {'hits': 0, 'misses': 0}
         self.initialize_database()
 
+    @contextmanager
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
-
-    def initialize_database(self):
-        with self.get_connection() as conn:
-            c = conn.cursor()
-            # Create characters table
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS characters (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    description TEXT,
-                    avatar_path TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Add missing columns to existing characters table if they don't exist
-            try:
-                c.execute("ALTER TABLE characters ADD COLUMN description TEXT")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
-            try:
-                c.execute("ALTER TABLE characters ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-                
-            try:
-                c.execute("ALTER TABLE characters ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            # Create llm_configs table with new fields
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS llm_configs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    base_url TEXT,
-                    api_key TEXT,
-                    model TEXT,
-                    system_prompt TEXT,
-                    user_prompt_template TEXT,
-                    generation_params TEXT -- Store as JSON string
-                )
-            ''')
-            # Create dialogue_sets table
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS dialogue_sets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    character_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    FOREIGN KEY (character_id) REFERENCES characters (id)
-                )
-            ''')
-            # Create dialogues table
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS dialogues (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    set_id INTEGER NOT NULL,
-                    action_parameter TEXT NOT NULL,
-                    dialogue TEXT NOT NULL,
-                    FOREIGN KEY (set_id) REFERENCES dialogue_sets (id)
-                )
-            ''')
+        """从连接池取出连接；正常退出时提交，异常时回滚，最后归还连接池"""
+        conn = self.pool.acquire()
+        try:
+            yield conn
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.release(conn)
+
+    def close(self):
+        """关闭连接池中的连接"""
+        self.pool.close()
+
+    def _cached(self, namespace, key, loader):
+        """读缓存：命中时直接返回，未命中时调用loader查询并缓存"""
+        with self._cache_lock:
+            bucket = self._cache.get(namespace)
+            if bucket is not None and key in bucket:
+                self.cache_stats['hits'] += 1
+                return bucket[key]
+            self.cache_stats['misses'] += 1
+            generation = self._cache_generation.get(namespace, 0)
+        value = loader()
+        with self._cache_lock:
+            # 查询期间有写入时不缓存，避免存入旧数据
+            if self._cache_generation.get(namespace, 0) == generation:
+                self._cache.setdefault(namespace, {})[key] = value
+        return value
+
+    def _invalidate(self, namespace):
+        with self._cache_lock:
+            self._cache.pop(namespace, None)
+            self._cache_generation[namespace] = self._cache_generation.get(namespace, 0) + 1
+
+    def clear_cache(self):
+        """清空读缓存（外部直接修改了数据库文件时使用）"""
+        for namespace in list(self._cache_generation) + list(self._cache):
+            self._invalidate(namespace)
+
+    def initialize_database(self, force=False):
+        """
+        按PRAGMA user_version执行尚未执行的结构迁移
+
+        结构已是最新版本时只读取一次user_version，不获取写锁；同一进程内每个数据库文件只检查一次。
+        """
+        key = os.path.abspath(self.db_name)
+        if not force and key in _schema_ready:
+            return
+        with _schema_lock:
+            if not force and key in _schema_ready:
+                return
+            with self.get_connection() as conn:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                if current < SCHEMA_VERSION:
+                    # 获取写锁后重新读取版本，其他进程可能已经完成迁移
+                    conn.execute("BEGIN IMMEDIATE")
+                    current = conn.execute("PRAGMA user_version").fetchone()[0]
+                    for version, migrate in MIGRATIONS:
+                        if version <= current:
+                            continue
+                        migrate(conn)
+                        # PRAGMA不支持参数绑定，version来自代码中的常量
+                        conn.execute(f"PRAGMA user_version = {int(version)}")
+                    conn.commit()
+            _schema_ready.add(key)
 
     # Character Management
     def create_character(self, name, description, avatar_path=None):
         with self.get_connection() as conn:
             c = conn.cursor()
-            c.execute("INSERT INTO characters (name, description, avatar_path) VALUES (?, ?, ?)", (name, description, avatar_path))
+            # 显式写入时间：旧数据库迁移后的时间列没有默认值
+            c.execute("INSERT INTO characters (name, description, avatar_path, created_at, updated_at) "
+                      "VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)", (name, description, avatar_path))
             conn.commit()
-            return c.lastrowid
+        self._invalidate('characters')
+        return c.lastrowid
 
     def add_character(self, name):
         with self.get_connection() as conn:
             c = conn.cursor()
-            c.execute("INSERT INTO characters (name) VALUES (?)", (name,))
+            c.execute("INSERT INTO characters (name, created_at, updated_at) VALUES (?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)", (name,))
             conn.commit()
+        self._invalidate('characters')
 
     def get_characters(self):
+        return list(self._cached('characters', None, self._query_characters))
+
+    def _query_characters(self):
         with self.get_connection() as conn:
             c = conn.cursor()
             c.execute("SELECT * FROM characters")
             return c.fetchall()
 
     def get_character(self, character_id):
+        return self._cached('characters', character_id, lambda: self._query_character(character_id))
+
+    def _query_character(self, character_id):
         with self.get_connection() as conn:
             c = conn.cursor()
             c.execute("SELECT * FROM characters WHERE id = ?", (character_id,))
@@ -114,13 +289,16 @@ class CharacterDatabase:
             c.execute("UPDATE characters SET name = ?, description = ?, avatar_path = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", 
                      (new_name, description, avatar_path, character_id))
             conn.commit()
+        self._invalidate('characters')
 
     def delete_character(self, character_id):
         with self.get_connection() as conn:
             c = conn.cursor()
+            c.execute("DELETE FROM dialogues WHERE set_id IN (SELECT id FROM dialogue_sets WHERE character_id = ?)", (character_id,))
             c.execute("DELETE FROM dialogue_sets WHERE character_id = ?", (character_id,))
             c.execute("DELETE FROM characters WHERE id = ?", (character_id,))
             conn.commit()
+        self._invalidate('characters')
 
     # LLM Configuration Management
     def add_llm_config(self, name, base_url='', api_key='', model='', system_prompt='', user_prompt_template='', generation_params='{}'):
@@ -129,14 +307,21 @@ class CharacterDatabase:
             c.execute("INSERT INTO llm_configs (name, base_url, api_key, model, system_prompt, user_prompt_template, generation_params) VALUES (?, ?, ?, ?, ?, ?, ?)",
                       (name, base_url, api_key, model, system_prompt, user_prompt_template, generation_params))
             conn.commit()
+        self._invalidate('llm_configs')
 
     def get_llm_configs(self):
+        return list(self._cached('llm_configs', None, self._query_llm_configs))
+
+    def _query_llm_configs(self):
         with self.get_connection() as conn:
             c = conn.cursor()
             c.execute("SELECT * FROM llm_configs")
             return c.fetchall()
 
     def get_llm_config(self, config_id):
+        return self._cached('llm_configs', config_id, lambda: self._query_llm_config(config_id))
+
+    def _query_llm_config(self, config_id):
         with self.get_connection() as conn:
             c = conn.cursor()
             c.execute("SELECT * FROM llm_configs WHERE id = ?", (config_id,))
@@ -148,21 +333,32 @@ class CharacterDatabase:
             c.execute("UPDATE llm_configs SET name = ?, base_url = ?, api_key = ?, model = ?, system_prompt = ?, user_prompt_template = ?, generation_params = ? WHERE id = ?",
                       (name, base_url, api_key, model, system_prompt, user_prompt_template, generation_params, config_id))
             conn.commit()
+        self._invalidate('llm_configs')
 
     def delete_llm_config(self, config_id):
         with self.get_connection() as conn:
             c = conn.cursor()
             c.execute("DELETE FROM llm_configs WHERE id = ?", (config_id,))
             conn.commit()
+        self._invalidate('llm_configs')
 
     # Dialogue Set Management
     def add_dialogue_set(self, character_id, name, dialogues):
+        """在一个事务中创建对话集并批量写入台词，返回对话集ID"""
         with self.get_connection() as conn:
             c = conn.cursor()
             c.execute("INSERT INTO dialogue_sets (character_id, name) VALUES (?, ?)", (character_id, name))
             set_id = c.lastrowid
-            for action_param, dialogue in dialogues:
-                c.execute("INSERT INTO dialogues (set_id, action_parameter, dialogue) VALUES (?, ?, ?)", (set_id, action_param, dialogue))
+            c.executemany("INSERT INTO dialogues (set_id, action_parameter, dialogue) VALUES (?, ?, ?)",
+                          ((set_id, action_param, dialogue) for action_param, dialogue in dialogues))
+            conn.commit()
+            return set_id
+
+    def add_dialogues(self, set_id, dialogues):
+        """向已有对话集批量追加台词"""
+        with self.get_connection() as conn:
+            conn.executemany("INSERT INTO dialogues (set_id, action_parameter, dialogue) VALUES (?, ?, ?)",
+                             ((set_id, action_param, dialogue) for action_param, dialogue in dialogues))
             conn.commit()
 
     def get_dialogue_sets(self, character_id):
@@ -184,6 +380,17 @@ class CharacterDatabase:
             c.execute("DELETE FROM dialogue_sets WHERE id = ?", (set_id,))
             conn.commit()
 
+
+def get_database(db_name='voice_pack_workflow.db'):
+    """获取进程内共享的CharacterDatabase实例，同一数据库文件只创建一个连接池"""
+    with _shared_lock:
+        db = _shared_databases.get(db_name)
+        if db is None:
+            db = CharacterDatabase(db_name)
+            _shared_databases[db_name] = db
+        return db
+
+
 if __name__ == '__main__':
     db = CharacterDatabase()
     print("Database initialized.")
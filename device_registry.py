@@ -0,0 +1,199 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class DeviceRegistry:
+    """
+    breathKIT设备注册表：缓存设备发现和目标路径检查的结果，后台轮询挂载点变化
+
+    只有挂载点集合变化时才重新枚举分区并检查LB文件夹和文件系统；
+    界面回调通过get_devices()/validate_path()直接读取缓存，不访问文件系统。
+    路径缓存是容量有限的LRU，轮询只重新检查当前选中的路径。
+    """
+
+    def __init__(self, exporter=None, poll_interval=2.0, max_cached_paths=32):
+        """
+        Args:
+            exporter (BreathKitExporter): 用于完整设备发现的导出器，省略时自动创建
+            poll_interval (float): 轮询间隔（秒）
+            max_cached_paths (int): 路径检查结果最多缓存的条数
+        """
+        if exporter is None:
+            from breathkit_exporter import BreathKitExporter
+            exporter = BreathKitExporter()
+        self.exporter = exporter
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._mount_signature = None
+        self._devices = []
+        self._devices_by_lb_path = {}
+        self.max_cached_paths = max_cached_paths
+        self._path_status = OrderedDict()
+        self._current_paths = set()
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.last_refresh = 0.0
+
+    def _current_mount_signature(self):
+        """获取当前挂载点集合（只列出挂载点，不检查内容）"""
+        if psutil is not None:
+            try:
+                return frozenset((p.mountpoint, p.fstype) for p in psutil.disk_partitions())
+            except Exception:
+                pass
+        if os.path.isdir('/Volumes'):
+            try:
+                return frozenset(os.listdir('/Volumes'))
+            except OSError:
+                pass
+        return frozenset()
+
+    @staticmethod
+    def _check_path(path):
+        """检查单个目标路径（会访问文件系统，只在刷新时调用）"""
+        if not os.path.exists(path):
+            return "❌ 目标文件夹路径不存在", False
+        if not os.path.isdir(path):
+            return "❌ 路径不是文件夹", False
+        if not os.access(path, os.W_OK):
+            return "❌ 目标文件夹没有写入权限", False
+        return "✅ 目标文件夹路径可用", True
+
+    def refresh(self, force=False):
+        """
+        刷新注册表：挂载点变化（或force）时重新发现设备；每次都重新检查当前选中的目标路径
+
+        Returns:
+            bool: 设备列表是否发生变化
+        """
+        signature = self._current_mount_signature()
+        changed = False
+        added = removed = []
+
+        if force or signature != self._mount_signature:
+            try:
+                devices = self.exporter.find_breathkit_devices()
+            except Exception as e:
+                self.logger.error(f"设备发现失败: {e}")
+                devices = []
+            by_lb_path = {os.path.normpath(d['lb_path']): d for d in devices}
+            with self._lock:
+                old_paths = set(self._devices_by_lb_path)
+                new_paths = set(by_lb_path)
+                added = [by_lb_path[p] for p in sorted(new_paths - old_paths)]
+                removed = [self._devices_by_lb_path[p] for p in sorted(old_paths - new_paths)]
+                self._devices = devices
+                self._devices_by_lb_path = by_lb_path
+                self._mount_signature = signature
+                changed = bool(added or removed)
+
+        # 重新检查当前选中的目标路径（只有少量stat调用，在轮询线程中执行）
+        with self._lock:
+            current_paths = [path for path in self._current_paths if path in self._path_status]
+        statuses = {path: self._check_path(path) for path in current_paths}
+        with self._lock:
+            for path, status in statuses.items():
+                if path in self._path_status:
+                    self._path_status[path] = status
+
+        self.last_refresh = time.time()
+        if changed:
+            self.logger.info(f"breathKIT设备变化: 新增 {len(added)} 台，移除 {len(removed)} 台")
+            for listener in list(self._listeners):
+                try:
+                    listener(added, removed)
+                except Exception as e:
+                    self.logger.error(f"设备变化回调出错: {e}")
+        return changed
+
+    def get_devices(self):
+        """获取缓存的breathKIT设备列表"""
+        with self._lock:
+            return list(self._devices)
+
+    def get_device(self, lb_path):
+        """按LB路径查找设备，不存在时返回None"""
+        return self._devices_by_lb_path.get(os.path.normpath(lb_path))
+
+    def set_current_paths(self, paths):
+        """设置界面当前选中的目标路径，轮询只重新检查这些路径"""
+        with self._lock:
+            self._current_paths = {os.path.normpath(path) for path in paths}
+
+    def validate_path(self, path):
+        """
+        验证目标路径：已缓存时直接返回结果，首次查询时检查一次并缓存（超出容量时淘汰最久未用的）
+
+        Returns:
+            tuple: (状态信息, 是否可用)
+        """
+        path = os.path.normpath(path)
+        with self._lock:
+            status = self._path_status.get(path)
+            if status is not None:
+                self._path_status.move_to_end(path)
+                return status
+        if self.get_device(path) is not None:
+            status = ("✅ 目标文件夹路径可用", True)
+        else:
+            status = self._check_path(path)
+        with self._lock:
+            self._path_status[path] = status
+            self._path_status.move_to_end(path)
+            while len(self._path_status) > self.max_cached_paths:
+                self._path_status.popitem(last=False)
+        return status
+
+    def invalidate_path(self, path=None):
+        """清除目标路径缓存（path为None时全部清除）"""
+        with self._lock:
+            if path is None:
+                self._path_status.clear()
+            else:
+                self._path_status.pop(os.path.normpath(path), None)
+
+    def add_listener(self, callback):
+        """注册设备变化回调，接收(新增设备列表, 移除设备列表)"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _poll_loop(self):
+        # 首次完整刷新也在轮询线程中执行，不阻塞界面构建
+        try:
+            self.refresh(force=True)
+        except Exception as e:
+            self.logger.error(f"设备轮询出错: {e}")
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"设备轮询出错: {e}")
+
+    def start(self):
+        """启动后台轮询线程（首次刷新在线程中立即执行）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name="DeviceRegistryPoller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台轮询线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
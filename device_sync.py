@@ -0,0 +1,639 @@
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import logging
+import zipfile
+import tempfile
+import threading
+import metrics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 设备上的同步清单文件（位于LB根目录）
+MANIFEST_NAME = '.breathvoice_manifest.json'
+MANIFEST_VERSION = 1
+
+# 默认读写缓冲区大小；U盘按擦除块写入，缓冲区按64KB对齐
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+BUFFER_ALIGNMENT = 64 * 1024
+
+# USB大容量存储并发写入过多反而变慢，默认只用少量写入线程
+DEFAULT_MAX_WRITERS = 2
+
+# fsync策略：none（交给系统）、batch（全部写完后统一刷盘）、per_file（每个文件写完立即刷盘）
+FSYNC_POLICIES = ('none', 'batch', 'per_file')
+DEFAULT_FSYNC_POLICY = 'batch'
+
+# 写入测速使用的临时目录
+PROBE_DIR_NAME = '.breathvoice_probe'
+
+# 每个设备根目录一把清单写入锁（同一设备可能同时被多个同步任务写入）
+_manifest_locks = {}
+_manifest_locks_lock = threading.Lock()
+
+
+def _manifest_lock(target_root):
+    key = os.path.normcase(os.path.abspath(target_root))
+    with _manifest_locks_lock:
+        lock = _manifest_locks.get(key)
+        if lock is None:
+            lock = _manifest_locks[key] = threading.Lock()
+        return lock
+
+
+def align_buffer_size(size):
+    """将缓冲区大小向上取整到BUFFER_ALIGNMENT的整数倍"""
+    return max(BUFFER_ALIGNMENT, (size + BUFFER_ALIGNMENT - 1) // BUFFER_ALIGNMENT * BUFFER_ALIGNMENT)
+
+
+def file_crc32(path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """分块计算文件内容的CRC32"""
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(buffer_size)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def device_file_crc32(path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    计算设备上文件的CRC32，尽量绕过系统页缓存，读到的是设备上实际保存的数据
+
+    Linux上先用posix_fadvise丢弃缓存页，macOS上使用F_NOCACHE；其他平台退化为普通读取。
+    """
+    crc = 0
+    with open(path, 'rb', buffering=0) as f:
+        fd = f.fileno()
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+        elif sys.platform == 'darwin':
+            try:
+                import fcntl
+                fcntl.fcntl(fd, getattr(fcntl, 'F_NOCACHE', 48), 1)
+            except (ImportError, OSError):
+                pass
+        buffer = memoryview(bytearray(align_buffer_size(buffer_size)))
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            crc = zlib.crc32(buffer[:n], crc)
+    return crc & 0xFFFFFFFF
+
+
+def entries_from_zip(zip_path, suffix='.bre'):
+    """
+    从ZIP包构建同步源条目，直接使用ZIP中记录的CRC32，无需解压
+
+    Returns:
+        dict: {相对路径: {'size', 'crc32', 'zip_path', 'member'}}
+    """
+    entries = {}
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or not info.filename.endswith(suffix):
+                continue
+            entries[info.filename] = {
+                'size': info.file_size,
+                'crc32': info.CRC,
+                'zip_path': zip_path,
+                'member': info.filename
+            }
+    return entries
+
+
+def entries_from_folder(folder, prefix=''):
+    """
+    从本地文件夹构建同步源条目
+
+    Args:
+        folder (str): 源文件夹
+        prefix (str): 目标端相对路径前缀（例如角色名）
+
+    Returns:
+        dict: {相对路径: {'size', 'crc32', 'path'}}
+    """
+    entries = {}
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            path = os.path.join(root, file)
+            rel = os.path.relpath(path, folder).replace(os.sep, '/')
+            if prefix:
+                rel = f"{prefix}/{rel}"
+            entries[rel] = {
+                'size': os.path.getsize(path),
+                'crc32': file_crc32(path),
+                'path': path
+            }
+    return entries
+
+
+class DeviceSync:
+    """设备增量同步：对比设备上的清单（大小 + 内容CRC32）与语音包，只写入新增或变化的文件"""
+
+    def __init__(self, target_root, buffer_size=DEFAULT_BUFFER_SIZE, max_writers=DEFAULT_MAX_WRITERS,
+                 fsync_policy=DEFAULT_FSYNC_POLICY, copy_metadata=False):
+        """
+        Args:
+            target_root (str): 设备上的同步根目录（通常为LB文件夹）
+            buffer_size (int): 拷贝缓冲区大小，按64KB对齐
+            max_writers (int): 并行写入线程数
+            fsync_policy (str): 刷盘策略，见FSYNC_POLICIES
+            copy_metadata (bool): 是否复制文件时间等元数据（FAT32无法完整保存，默认不复制）
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"未知的fsync策略: {fsync_policy}")
+        self.target_root = target_root
+        self.buffer_size = align_buffer_size(buffer_size)
+        self.max_writers = max(1, max_writers)
+        self.fsync_policy = fsync_policy
+        self.copy_metadata = copy_metadata
+        self.logger = logging.getLogger(__name__)
+        # 每个写入线程独立的缓冲区和ZIP句柄
+        self._local = threading.local()
+        self._handles_lock = threading.Lock()
+        self._zip_handles = []
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.target_root, MANIFEST_NAME)
+
+    def _target_path(self, rel):
+        return os.path.join(self.target_root, *rel.split('/'))
+
+    def load_manifest(self):
+        """读取设备清单，不存在或损坏时返回空清单"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION and isinstance(manifest.get('files'), dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'files': {}}
+
+    def save_manifest(self, manifest):
+        """原子写入设备清单（同一设备串行写入，每次使用独立的临时文件）"""
+        with _manifest_lock(self.target_root):
+            fd, tmp_path = tempfile.mkstemp(prefix='.breathvoice_manifest-', suffix='.tmp', dir=self.target_root)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, ensure_ascii=False)
+                os.replace(tmp_path, self.manifest_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def _list_scope_files(self, scopes):
+        """列出设备上同步范围（顶层子文件夹）内的所有文件"""
+        existing = {}
+        for scope in scopes:
+            scope_dir = self._target_path(scope)
+            if not os.path.isdir(scope_dir):
+                continue
+            for root, dirs, files in os.walk(scope_dir):
+                for file in files:
+                    path = os.path.join(root, file)
+                    rel = os.path.relpath(path, self.target_root).replace(os.sep, '/')
+                    try:
+                        existing[rel] = os.path.getsize(path)
+                    except OSError:
+                        continue
+        return existing
+
+    def plan(self, source_entries, manifest=None):
+        """
+        生成同步计划
+
+        同步范围为源条目涉及的顶层文件夹（如角色名文件夹），范围内设备上多余的文件视为过期文件。
+
+        Args:
+            source_entries (dict): entries_from_zip / entries_from_folder 的结果
+            manifest (dict): 设备清单，省略时从设备读取
+
+        Returns:
+            dict: {'add': [...], 'update': [...], 'unchanged': [...], 'delete': [...], 'manifest': dict}
+        """
+        if manifest is None:
+            manifest = self.load_manifest()
+        recorded = manifest['files']
+        scopes = sorted({rel.split('/', 1)[0] for rel in source_entries if '/' in rel})
+        existing = self._list_scope_files(scopes)
+
+        plan = {'add': [], 'update': [], 'unchanged': [], 'delete': [], 'manifest': manifest}
+        for rel, entry in sorted(source_entries.items()):
+            device_size = existing.get(rel)
+            if device_size is None and os.path.exists(self._target_path(rel)):
+                device_size = os.path.getsize(self._target_path(rel))
+            if device_size is None:
+                plan['add'].append(rel)
+                continue
+            if device_size != entry['size']:
+                plan['update'].append(rel)
+                continue
+            record = recorded.get(rel)
+            if record and record.get('size') == entry['size'] and record.get('crc32') == entry['crc32']:
+                plan['unchanged'].append(rel)
+                continue
+            # 清单缺失或不一致时读取设备文件校验（读比写快得多）
+            try:
+                same = file_crc32(self._target_path(rel), self.buffer_size) == entry['crc32']
+            except OSError:
+                same = False
+            if same:
+                recorded[rel] = {'size': entry['size'], 'crc32': entry['crc32']}
+                plan['unchanged'].append(rel)
+            else:
+                plan['update'].append(rel)
+
+        plan['delete'] = sorted(rel for rel in existing if rel not in source_entries)
+        return plan
+
+    def _thread_buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = memoryview(bytearray(self.buffer_size))
+            self._local.buffer = buffer
+        return buffer
+
+    def _open_source(self, entry):
+        """打开源文件；ZIP成员直接流式读取，不解压到临时目录"""
+        if 'member' in entry:
+            zip_refs = getattr(self._local, 'zip_refs', None)
+            if zip_refs is None:
+                zip_refs = self._local.zip_refs = {}
+            zip_ref = zip_refs.get(entry['zip_path'])
+            if zip_ref is None:
+                zip_ref = zipfile.ZipFile(entry['zip_path'], 'r')
+                zip_refs[entry['zip_path']] = zip_ref
+                with self._handles_lock:
+                    self._zip_handles.append(zip_ref)
+            return zip_ref.open(entry['member'], 'r')
+        return open(entry['path'], 'rb', buffering=0)
+
+    def _close_sources(self):
+        with self._handles_lock:
+            for zip_ref in self._zip_handles:
+                zip_ref.close()
+            self._zip_handles = []
+        self._local = threading.local()
+
+    def write_file(self, rel, entry):
+        """
+        写入单个文件：先写临时文件再重命名，不复制FAT32无法保存的元数据
+
+        Returns:
+            int: 写入的字节数
+        """
+        target_path = self._target_path(rel)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = target_path + '.part'
+        buffer = self._thread_buffer()
+        written = 0
+        with self._open_source(entry) as src, open(tmp_path, 'wb', buffering=0) as dst:
+            while True:
+                n = src.readinto(buffer)
+                if not n:
+                    break
+                view = buffer[:n]
+                while view:
+                    view = view[dst.write(view):]
+                written += n
+            if self.fsync_policy == 'per_file':
+                os.fsync(dst.fileno())
+        if self.copy_metadata and 'path' in entry:
+            try:
+                shutil.copystat(entry['path'], tmp_path)
+            except OSError:
+                pass
+        os.replace(tmp_path, target_path)
+        return written
+
+    def _flush_files(self, rels):
+        """batch策略：全部写完后统一刷盘"""
+        for rel in rels:
+            try:
+                fd = os.open(self._target_path(rel), os.O_RDWR)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                self.logger.warning(f"刷盘失败 {rel}: {e}")
+
+    def write_files(self, rels, source_entries, progress_callback=None, byte_progress_callback=None):
+        """
+        用有限的写入线程池并行写入文件
+
+        Args:
+            rels (list): 要写入的相对路径
+            source_entries (dict): 同步源条目
+            progress_callback (callable): 文件进度回调，接收(current, total, message)
+            byte_progress_callback (callable): 字节进度回调，接收(bytes_done, bytes_total)
+
+        Returns:
+            tuple: ({相对路径: 写入字节数}, [错误信息])
+        """
+        written = {}
+        errors = []
+        total = len(rels)
+        bytes_total = sum(source_entries[rel]['size'] for rel in rels)
+        bytes_done = 0
+        if not rels:
+            return written, errors
+
+        workers = min(self.max_writers, total)
+        write_start = time.perf_counter()
+        with metrics.span('device_write') as attrs:
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {executor.submit(self.write_file, rel, source_entries[rel]): rel for rel in rels}
+                    for current, future in enumerate(as_completed(futures), 1):
+                        rel = futures[future]
+                        try:
+                            written[rel] = future.result()
+                            bytes_done += written[rel]
+                        except Exception as e:
+                            error_msg = f"写入文件 {rel} 失败: {str(e)}"
+                            errors.append(error_msg)
+                            self.logger.error(error_msg)
+                            try:
+                                os.remove(self._target_path(rel) + '.part')
+                            except OSError:
+                                pass
+                        if progress_callback:
+                            progress_callback(current, total,
+                                              f"写入文件: {os.path.basename(rel)} "
+                                              f"({bytes_done / (1024**2):.1f}/{bytes_total / (1024**2):.1f} MB)")
+                        if byte_progress_callback:
+                            byte_progress_callback(bytes_done, bytes_total)
+            finally:
+                self._close_sources()
+            if self.fsync_policy == 'batch':
+                self._flush_files(written)
+            seconds = time.perf_counter() - write_start
+            attrs.update(files=len(written), bytes=bytes_done,
+                         bytes_per_second=round(bytes_done / seconds) if seconds > 0 else None)
+        metrics.inc('device_write_bytes_total', bytes_done, help_text='写入设备的字节数')
+        return written, errors
+
+    def sync(self, source_entries, progress_callback=None, dry_run=False, delete_stale=True,
+             byte_progress_callback=None, force=False):
+        """
+        执行增量同步
+
+        Args:
+            source_entries (dict): 同步源条目
+            progress_callback (callable): 进度回调，接收(current, total, message)
+            dry_run (bool): 只生成报告，不修改设备
+            delete_stale (bool): 是否删除同步范围内的过期文件
+            byte_progress_callback (callable): 字节进度回调，接收(bytes_done, bytes_total)
+            force (bool): 不比对清单，全部重新写入
+
+        Returns:
+            dict: {'added', 'updated', 'deleted', 'unchanged', 'bytes_written', 'errors', 'dry_run'}
+        """
+        if force:
+            manifest = self.load_manifest()
+            plan = {'add': [], 'update': sorted(source_entries), 'unchanged': [], 'delete': [], 'manifest': manifest}
+            if delete_stale:
+                existing = self._list_scope_files({rel.split('/', 1)[0] for rel in source_entries if '/' in rel})
+                plan['delete'] = sorted(rel for rel in existing if rel not in source_entries)
+        else:
+            plan = self.plan(source_entries)
+            manifest = plan['manifest']
+        to_write = plan['add'] + plan['update']
+        to_delete = plan['delete'] if delete_stale else []
+
+        report = {
+            'added': plan['add'],
+            'updated': plan['update'],
+            'deleted': to_delete,
+            'unchanged': len(plan['unchanged']),
+            'bytes_written': 0,
+            'errors': [],
+            'dry_run': dry_run
+        }
+        if dry_run:
+            report['bytes_to_write'] = sum(source_entries[rel]['size'] for rel in to_write)
+            return report
+
+        total = len(to_write) + len(to_delete)
+        written, errors = self.write_files(
+            to_write, source_entries,
+            (lambda current, count, message: progress_callback(current, total, message)) if progress_callback else None,
+            byte_progress_callback
+        )
+        report['errors'].extend(errors)
+        for rel in to_write:
+            if rel in written:
+                report['bytes_written'] += written[rel]
+                manifest['files'][rel] = {
+                    'size': source_entries[rel]['size'],
+                    'crc32': source_entries[rel]['crc32']
+                }
+            else:
+                manifest['files'].pop(rel, None)
+
+        current = len(to_write)
+        for rel in to_delete:
+            current += 1
+            if progress_callback:
+                progress_callback(current, total, f"删除过期文件: {os.path.basename(rel)}")
+            try:
+                os.remove(self._target_path(rel))
+                manifest['files'].pop(rel, None)
+            except OSError as e:
+                report['errors'].append(f"删除文件 {rel} 失败: {str(e)}")
+
+        # 清单只保留仍存在的文件
+        for rel in list(manifest['files'].keys()):
+            if not os.path.exists(self._target_path(rel)):
+                del manifest['files'][rel]
+        try:
+            self.save_manifest(manifest)
+        except OSError as e:
+            report['errors'].append(f"写入同步清单失败: {str(e)}")
+
+        self._remove_empty_dirs({rel.split('/', 1)[0] for rel in to_delete if '/' in rel})
+        return report
+
+    def verify(self, source_entries, progress_callback=None, repair=True, max_workers=4):
+        """
+        写入后校验：并行计算设备上文件的CRC32，与导出时记录的CRC32比对，不一致的文件重新写入
+
+        Args:
+            source_entries (dict): 同步源条目（带导出时的crc32）
+            progress_callback (callable): 进度回调，接收(current, total, message)
+            repair (bool): 是否重新写入不一致或缺失的文件
+            max_workers (int): 并行校验线程数
+
+        Returns:
+            dict: {'verified', 'mismatched', 'missing', 'repaired', 'errors'}
+        """
+        report = {'verified': 0, 'mismatched': [], 'missing': [], 'repaired': [], 'errors': []}
+        rels = sorted(source_entries)
+        total = len(rels)
+        if not rels:
+            return report
+
+        def check(rel):
+            path = self._target_path(rel)
+            try:
+                if os.path.getsize(path) != source_entries[rel]['size']:
+                    return rel, False
+                return rel, device_file_crc32(path, self.buffer_size) == source_entries[rel]['crc32']
+            except FileNotFoundError:
+                return rel, None
+            except OSError as e:
+                # 读取失败（I/O错误、权限、设备被拔出等）按不一致处理，交给重新写入
+                self.logger.warning(f"校验读取失败，按不一致处理: {rel}: {e}")
+                return rel, False
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+            for current, (rel, ok) in enumerate(executor.map(check, rels), 1):
+                if ok:
+                    report['verified'] += 1
+                elif ok is None:
+                    report['missing'].append(rel)
+                else:
+                    report['mismatched'].append(rel)
+                if progress_callback:
+                    progress_callback(current, total, f"校验文件: {os.path.basename(rel)}")
+
+        bad = report['mismatched'] + report['missing']
+        if bad:
+            self.logger.warning(f"校验发现 {len(bad)} 个文件与语音包不一致")
+        if not bad or not repair:
+            return report
+
+        written, errors = self.write_files(bad, source_entries)
+        report['errors'].extend(errors)
+        # 重写后再校验一次
+        manifest = self.load_manifest()
+        for rel in written:
+            _, ok = check(rel)
+            if ok:
+                report['repaired'].append(rel)
+                manifest['files'][rel] = {'size': source_entries[rel]['size'], 'crc32': source_entries[rel]['crc32']}
+            else:
+                manifest['files'].pop(rel, None)
+                report['errors'].append(f"重新写入后校验仍失败: {rel}")
+        try:
+            self.save_manifest(manifest)
+        except OSError as e:
+            report['errors'].append(f"写入同步清单失败: {str(e)}")
+        return report
+
+    def _remove_empty_dirs(self, scopes):
+        """删除过期文件后清理空文件夹"""
+        for scope in scopes:
+            scope_dir = self._target_path(scope)
+            for root, dirs, files in os.walk(scope_dir, topdown=False):
+                if root != scope_dir and not os.listdir(root):
+                    try:
+                        os.rmdir(root)
+                    except OSError:
+                        pass
+
+
+def _timed_write(path, data, buffer_size, fsync):
+    """按指定缓冲区大小写入数据，返回耗时（秒）"""
+    view = memoryview(data)
+    start = time.perf_counter()
+    with open(path, 'wb', buffering=0) as f:
+        for offset in range(0, len(view), buffer_size):
+            chunk = view[offset:offset + buffer_size]
+            while chunk:
+                chunk = chunk[f.write(chunk):]
+        if fsync:
+            os.fsync(f.fileno())
+    return time.perf_counter() - start
+
+
+def _timed_small_files(probe_dir, data, count, writers, buffer_size, fsync_policy):
+    """并行写入一批小文件，返回包含刷盘在内的耗时（秒）"""
+    paths = [os.path.join(probe_dir, f"small_{writers}_{fsync_policy}_{i}.bin") for i in range(count)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        list(executor.map(lambda path: _timed_write(path, data, buffer_size, fsync_policy == 'per_file'), paths))
+    if fsync_policy == 'batch':
+        for path in paths:
+            fd = os.open(path, os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    elapsed = time.perf_counter() - start
+    for path in paths:
+        os.remove(path)
+    return elapsed
+
+
+def benchmark_device_writes(target_dir, sequential_size=8 * 1024 * 1024,
+                            buffer_sizes=(256 * 1024, 1024 * 1024, 4 * 1024 * 1024),
+                            small_file_size=256 * 1024, small_file_count=24, writer_counts=(1, 2, 4)):
+    """
+    测量目标目录的顺序写入和小文件写入吞吐量，并选择拷贝策略
+
+    测速文件写在target_dir下的临时目录中，结束后删除。
+
+    Args:
+        target_dir (str): 目标目录（设备上的LB文件夹，测试时可用tmpfs目录代替）
+        sequential_size (int): 顺序写入测试的数据量
+        buffer_sizes (tuple): 候选缓冲区大小
+        small_file_size (int): 小文件大小（接近单个BRE文件）
+        small_file_count (int): 小文件数量
+        writer_counts (tuple): 候选并行写入线程数
+
+    Returns:
+        dict: {'buffer_size', 'max_writers', 'fsync_policy', 'sequential_mb_s',
+               'small_files_per_s', 'measurements'}
+    """
+    probe_dir = os.path.join(target_dir, PROBE_DIR_NAME)
+    os.makedirs(probe_dir, exist_ok=True)
+    measurements = {'sequential': {}, 'small_files': {}, 'fsync': {}}
+    try:
+        # 顺序写入：选择吞吐量最高的缓冲区大小
+        data = os.urandom(sequential_size)
+        seq_path = os.path.join(probe_dir, 'sequential.bin')
+        for buffer_size in buffer_sizes:
+            buffer_size = align_buffer_size(buffer_size)
+            elapsed = _timed_write(seq_path, data, buffer_size, True)
+            measurements['sequential'][buffer_size] = sequential_size / (1024**2) / max(elapsed, 1e-6)
+            os.remove(seq_path)
+        best_buffer = max(measurements['sequential'], key=measurements['sequential'].get)
+
+        # 小文件写入：选择每秒文件数最高的写入线程数（batch刷盘）
+        small_data = data[:small_file_size]
+        for writers in writer_counts:
+            elapsed = _timed_small_files(probe_dir, small_data, small_file_count, writers, best_buffer, 'batch')
+            measurements['small_files'][writers] = small_file_count / max(elapsed, 1e-6)
+        best_writers = max(measurements['small_files'], key=measurements['small_files'].get)
+
+        # 刷盘策略：逐文件刷盘的额外开销不超过10%时使用更安全的per_file，否则batch
+        batch_time = small_file_count / measurements['small_files'][best_writers]
+        per_file_time = _timed_small_files(probe_dir, small_data, small_file_count, best_writers,
+                                           best_buffer, 'per_file')
+        measurements['fsync'] = {'batch': batch_time, 'per_file': per_file_time}
+        fsync_policy = 'per_file' if per_file_time <= batch_time * 1.1 else 'batch'
+    finally:
+        shutil.rmtree(probe_dir, ignore_errors=True)
+
+    return {
+        'buffer_size': best_buffer,
+        'max_writers': best_writers,
+        'fsync_policy': fsync_policy,
+        'sequential_mb_s': round(measurements['sequential'][best_buffer], 2),
+        'small_files_per_s': round(measurements['small_files'][best_writers], 2),
+        'measurements': measurements
+    }
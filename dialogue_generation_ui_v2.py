@@ -2,11 +2,11 @@ import gradio as gr
 import json
 import csv
 import os
-import time
 from typing import List
 
 from dialogue_generator import DialogueGenerator
 from file_manager import CharacterFileManager
+from voice_pipeline import write_dialogue_csv
 
 TEMPLATE_CSV_PATH = "/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE/台词模版.csv"
 
@@ -232,19 +232,8 @@ def build_dialogue_generation_ui(db):
                 character_name = char[1]
                 base_dir = "/Users/Saga/Documents/L&B Conceptions/Demo/breathVOICE/Characters"
                 target_dir = os.path.join(base_dir, character_name, "script")
-                os.makedirs(target_dir, exist_ok=True)
-                # 语言代码（用于文件名）
-                lang_map = {"中文": "zh", "English": "en", "日本語": "ja"}
-                lang_code = lang_map.get(language, "zh") if isinstance(language, str) else "zh"
-                date_str = time.strftime("%Y%m%d")
-                time_str = time.strftime("%H%M%S")
-                file_path = os.path.join(target_dir, f"dialogue_{lang_code}_{date_str}_{time_str}.csv")
                 try:
-                    with open(file_path, "w", newline="", encoding="utf-8") as f:
-                        writer = csv.writer(f)
-                        writer.writerow(["动作参数", "台词"])  # 标题行
-                        for ap, line in zip(aps, lines):
-                            writer.writerow([ap, line or ""]) 
+                    file_path = write_dialogue_csv(target_dir, language, zip(aps, lines))
                     return gr.update(value=f"已保存：{file_path}")
                 except Exception as e:
                     return gr.update(value=f"保存失败：{e}")
@@ -1,9 +1,11 @@
-import pandas as pd
+import os
 import json
 import re
-import openai
 import time
-import database as db
+import metrics
+import profiling
+from startup import lazy_import
+from database import get_database
 from typing import List, Dict, Tuple
 from action_parameters import (
     ALL_ACTION_PARAMS, PARAM_CATEGORIES, PARAM_DESCRIPTIONS,
@@ -13,6 +15,22 @@ from action_parameters import (
 )
 from file_manager import CharacterFileManager
 
+# 首次生成台词时才导入
+pd = lazy_import('pandas')
+openai = lazy_import('openai')
+
+# 拒绝 stream_options 参数的接口（base_url），之后的请求不再携带该参数
+_stream_usage_unsupported = set()
+
+# 进程内共享的数据库实例
+db = get_database()
+
+
+def _character_dir_for(character_id):
+    """角色文件夹路径（性能分析文件的输出位置）"""
+    character = db.get_character(character_id)
+    return os.path.join(CharacterFileManager().base_path, character[1]) if character else None
+
 class DialogueGenerator:
     def __init__(self):
         self.position_meanings = {
@@ -331,7 +349,10 @@ Express what the character feels, thinks, and experiences directly from their vi
                 status_callback(message)
             print(message)
         
+        model = llm_config[4]
         for attempt in range(max_retries):
+            if attempt > 0:
+                metrics.inc('llm_retries_total', help_text='LLM请求重试次数', model=model)
             try:
                 # 在发起连接前检查是否已请求停止
                 if stop_check and stop_check():
@@ -412,7 +433,8 @@ Important:
                     return ""
                 
                 # 使用流式输出以支持中途停止
-                stream = client.chat.completions.create(
+                request_start = time.perf_counter()
+                request_kwargs = dict(
                     model=llm_config[4],
                     messages=[
                         {"role": "system", "content": system_message},
@@ -423,9 +445,24 @@ Important:
                     timeout=60,
                     stream=True
                 )
+                stream = None
+                if llm_config[2] not in _stream_usage_unsupported:
+                    # 请求在流末尾返回用量（输出token数）；不支持该参数的接口去掉后重发，并记住该接口
+                    try:
+                        stream = client.chat.completions.create(
+                            stream_options={"include_usage": True}, **request_kwargs)
+                    except (openai.BadRequestError, openai.UnprocessableEntityError, TypeError) as e:
+                        stream = client.chat.completions.create(**request_kwargs)
+                        _stream_usage_unsupported.add(llm_config[2])
+                        update_status(f"ℹ️ 接口不支持stream_options，不再请求用量信息: {e}")
+                if stream is None:
+                    stream = client.chat.completions.create(**request_kwargs)
                 
                 update_status("📥 正在接收LLM流式响应...")
                 response_content = ""
+                first_token_seconds = None
+                chunk_count = 0
+                completion_tokens = None
                 try:
                     for chunk in stream:
                         # 停止时主动关闭流
@@ -436,21 +473,43 @@ Important:
                             except Exception:
                                 pass
                             return ""
+                        # 提供方在流中返回用量时记录真实的输出token数（通常在最后一个块）
+                        usage = getattr(chunk, "usage", None)
+                        if usage is not None and getattr(usage, "completion_tokens", None):
+                            completion_tokens = usage.completion_tokens
                         try:
                             delta = chunk.choices[0].delta
                             if hasattr(delta, "content") and delta.content:
                                 response_content += delta.content
+                                chunk_count += 1
                         except Exception:
                             # 兼容不同提供方的chunk结构
                             content = getattr(chunk, "content", None)
                             if content:
                                 response_content += content
+                                chunk_count += 1
+                        if chunk_count and first_token_seconds is None:
+                            first_token_seconds = time.perf_counter() - request_start
+                            metrics.observe('llm_ttfb_seconds', first_token_seconds,
+                                            help_text='LLM首个内容块到达耗时', model=model)
                     update_status(f"✅ 响应内容长度: {len(response_content)} 字符")
                 finally:
                     try:
                         stream.close()
                     except Exception:
                         pass
+                total_seconds = time.perf_counter() - request_start
+                metrics.observe('llm_request_seconds', total_seconds, help_text='LLM流式请求总耗时', model=model)
+                metrics.inc('llm_stream_chunks_total', chunk_count, help_text='LLM流式内容块数', model=model)
+                if completion_tokens is not None:
+                    metrics.inc('llm_completion_tokens_total', completion_tokens,
+                                help_text='LLM输出token数（来自接口返回的usage）', model=model)
+                job = metrics.current_job()
+                if job is not None:
+                    job.add_span('llm_request', {'model': model}, time.time() - total_seconds, total_seconds,
+                                 {'ttfb': round(first_token_seconds or 0.0, 6), 'chunks': chunk_count,
+                                  'completion_tokens': completion_tokens,
+                                  'chars': len(response_content), 'attempt': attempt + 1}, None)
                 
                 # 尝试解析JSON以验证格式
                 try:
@@ -462,21 +521,25 @@ Important:
                 return response_content
                 
             except openai.AuthenticationError as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error='AuthenticationError')
                 error_msg = f"❌ 认证错误: {e}"
                 update_status(error_msg)
                 update_status("请检查LLM配置中的API密钥")
                 return ""
             except openai.NotFoundError as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error='NotFoundError')
                 error_msg = f"❌ 模型未找到: {e}"
                 update_status(error_msg)
                 update_status(f"模型 '{llm_config[4]}' 在 {llm_config[2]} 上可能不可用")
                 return ""
             except openai.RateLimitError as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error='RateLimitError')
                 error_msg = f"❌ 速率限制错误: {e}"
                 update_status(error_msg)
                 update_status("API速率限制已超出，请稍后重试")
                 return ""
             except openai.APIConnectionError as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error='APIConnectionError')
                 error_msg = f"❌ API连接错误 (尝试 {attempt + 1}/{max_retries}): {e}"
                 update_status(error_msg)
                 if attempt < max_retries - 1:
@@ -495,6 +558,7 @@ Important:
                     update_status("请检查网络连接和API端点URL")
                     return ""
             except openai.APITimeoutError as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error='APITimeoutError')
                 error_msg = f"⏰ API超时错误 (尝试 {attempt + 1}/{max_retries}): {e}"
                 update_status(error_msg)
                 if attempt < max_retries - 1:
@@ -511,6 +575,7 @@ Important:
                     update_status(f"❌ 请求超时，已尝试 {max_retries} 次")
                     return ""
             except openai.InternalServerError as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error='InternalServerError')
                 error_msg = f"❌ 服务器错误 (尝试 {attempt + 1}/{max_retries}): {e}"
                 update_status(error_msg)
                 if "504 Gateway Time-out" in str(e):
@@ -529,6 +594,7 @@ Important:
                     update_status(f"❌ 服务器错误持续存在，已尝试 {max_retries} 次")
                     return ""
             except Exception as e:
+                metrics.inc('llm_errors_total', help_text='LLM请求错误次数', model=model, error=type(e).__name__)
                 error_msg = f"❌ 意外错误 (尝试 {attempt + 1}/{max_retries}): {type(e).__name__}: {e}"
                 update_status(error_msg)
                 update_status(f"API URL: {llm_config[2]}")
@@ -553,6 +619,8 @@ Important:
         # 使用新的带状态回调的方法，但不传递回调函数
         return self.call_llm_api_with_status(llm_config, prompt_template, None, max_retries)
     
+    @metrics.traced('dialogue')
+    @profiling.profiled('dialogue', lambda a: _character_dir_for(a['character_id']))
     def generate_dialogues_with_progress(self, character_id: int, llm_config_id: int, 
                                         language: str, csv_path: str, progress_callback=None, 
                                         status_callback=None, table_update_callback=None, 
@@ -577,6 +645,10 @@ Important:
             print("Error: Character or LLM configuration not found")
             return []
         
+        trace = metrics.current_job()
+        if trace is not None:
+            trace.character = character[1]
+
         if status_callback:
             status_callback(f"🎭 开始为角色生成对话: {character[1]}")
             status_callback(f"⚙️ 使用LLM配置: {llm_config[0]} ({llm_config[1]})")
@@ -603,9 +675,15 @@ Important:
 
         # 辅助：更健壮的JSON解析与批次/单项请求
         def _parse_json_flex(text: str):
-            """增强的JSON解析函数，支持多种格式和容错处理"""
+            """增强的JSON解析函数，支持多种格式和容错处理；记录命中的解析层级"""
+            tier, data = _parse_json_tiers(text)
+            metrics.inc('llm_parse_total', help_text='LLM响应JSON解析命中的层级', tier=tier)
+            return data
+
+        def _parse_json_tiers(text: str):
+            """按层级依次尝试解析，返回 (层级名称, 解析结果)"""
             if not text or not isinstance(text, str):
-                return {}
+                return 'empty', {}
             
             # 预处理：清理常见的格式问题
             text = text.strip()
@@ -615,12 +693,12 @@ Important:
             if match:
                 json_str = match.group(1).strip()
                 try:
-                    return json.loads(json_str)
+                    return 'fenced_json', json.loads(json_str)
                 except json.JSONDecodeError:
                     # 尝试修复常见的JSON格式问题
                     json_str = _fix_common_json_issues(json_str)
                     try:
-                        return json.loads(json_str)
+                        return 'fenced_json_fixed', json.loads(json_str)
                     except json.JSONDecodeError:
                         pass
 
@@ -629,11 +707,11 @@ Important:
             if match:
                 json_str = match.group(1).strip()
                 try:
-                    return json.loads(json_str)
+                    return 'fenced', json.loads(json_str)
                 except json.JSONDecodeError:
                     json_str = _fix_common_json_issues(json_str)
                     try:
-                        return json.loads(json_str)
+                        return 'fenced_fixed', json.loads(json_str)
                     except json.JSONDecodeError:
                         pass
 
@@ -656,21 +734,21 @@ Important:
             if start_idx != -1 and end_idx != -1:
                 json_str = text[start_idx:end_idx]
                 try:
-                    return json.loads(json_str)
+                    return 'braces', json.loads(json_str)
                 except json.JSONDecodeError:
                     json_str = _fix_common_json_issues(json_str)
                     try:
-                        return json.loads(json_str)
+                        return 'braces_fixed', json.loads(json_str)
                     except json.JSONDecodeError:
                         pass
 
             # 4. 尝试直接解析整个文本
             try:
-                return json.loads(text)
+                return 'whole', json.loads(text)
             except json.JSONDecodeError:
                 try:
                     fixed_text = _fix_common_json_issues(text)
-                    return json.loads(fixed_text)
+                    return 'whole_fixed', json.loads(fixed_text)
                 except json.JSONDecodeError:
                     pass
 
@@ -687,7 +765,7 @@ Important:
                 
                 # 如果找到了键值对，返回结果
                 if data:
-                    return data
+                    return 'regex', data
                     
                 # 匹配 key: value 格式（无引号，支持中文键名）
                 for match in re.finditer(r'([a-zA-Z_\u4e00-\u9fff][a-zA-Z0-9_\u4e00-\u9fff]*)\s*:\s*([^\n,}]+)', text):
@@ -697,7 +775,7 @@ Important:
                     data[key] = value
                 
                 if data:
-                    return data
+                    return 'regex', data
                     
                 # 尝试匹配更宽松的格式：key=value 或 key：value
                 for match in re.finditer(r'([a-zA-Z_\u4e00-\u9fff][a-zA-Z0-9_\u4e00-\u9fff]*)\s*[=：]\s*([^\n,}]+)', text):
@@ -706,7 +784,7 @@ Important:
                     data[key] = value
                 
                 if data:
-                    return data
+                    return 'regex', data
                     
             except Exception as e:
                 print(f"正则表达式解析出错: {e}")
@@ -714,7 +792,7 @@ Important:
 
             # 6. 最后的兜底策略：返回一个空字典，表示无法解析
             print(f"JSON解析失败，原始文本: {text[:200]}...")
-            return {}
+            return 'failed', {}
             
         def _fix_common_json_issues(json_str: str) -> str:
             """修复常见的JSON格式问题"""
@@ -880,14 +958,8 @@ Important:
                            dialogues: List[Tuple[str, str]]) -> int:
         """将对话保存到数据库"""
         try:
-            # 创建对话集
-            set_id = db.create_dialogue_set(character_id, dialogue_set_name)
-            
-            # 保存每个对话
-            for action_param, dialogue in dialogues:
-                db.create_dialogue(set_id, action_param, dialogue)
-            
-            return set_id
+            # 在一个事务中创建对话集并批量写入所有对话
+            return db.add_dialogue_set(character_id, dialogue_set_name, dialogues)
         except Exception as e:
             print(f"Error saving dialogues to database: {e}")
             return -1
\ No newline at end of file
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import threading
+
+from dialogue_table import DialogueTable
+
+# 临时CSV的列
+COLUMNS = ["选择", "动作参数", "台词"]
+JOURNAL_SUFFIX = '.journal'
+
+
+def find_orphaned_journals(directory, prefix):
+    """
+    查找上次会话未正常关闭时留下的日志（正常关闭会删除日志文件）
+
+    Args:
+        directory (str): 临时CSV所在目录
+        prefix (str): 临时CSV文件名前缀，其后只能是时间戳，例如 breathvoice_temp_角色名_
+
+    Returns:
+        list: 可恢复的临时CSV路径，最近修改的在前
+    """
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    orphans = []
+    for name in names:
+        if not (name.startswith(prefix) and name.endswith('.csv' + JOURNAL_SUFFIX)):
+            continue
+        # 只匹配本角色：前缀之后必须是时间戳，避免"A"匹配到"A_B"的文件
+        if not name[len(prefix):-len('.csv' + JOURNAL_SUFFIX)].isdigit():
+            continue
+        journal_path = os.path.join(directory, name)
+        csv_path = journal_path[:-len(JOURNAL_SUFFIX)]
+        if not os.path.exists(csv_path):
+            continue
+        try:
+            mtime = max(os.path.getmtime(journal_path), os.path.getmtime(csv_path))
+        except OSError:
+            continue
+        orphans.append((mtime, csv_path))
+    orphans.sort(reverse=True)
+    return [csv_path for _, csv_path in orphans]
+
+
+class DialogueJournal:
+    """
+    台词临时表：内存中的表是权威数据，每次修改追加一行到日志文件（崩溃后可重放），
+    定期或生成结束时压缩为CSV并清空日志
+
+    单行更新只追加一条日志，不再重新读取、解析和重写整个CSV。
+    """
+
+    def __init__(self, csv_path, compact_every=50, compact_interval=10.0):
+        """
+        Args:
+            csv_path (str): 临时CSV文件路径，日志文件为csv_path + '.journal'
+            compact_every (int): 累计多少条日志后压缩
+            compact_interval (float): 距上次压缩超过多少秒后压缩
+        """
+        self.csv_path = csv_path
+        self.journal_path = csv_path + JOURNAL_SUFFIX
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self._lock = threading.RLock()
+        self._table = DialogueTable()
+        self._pending = 0
+        self._last_compact = time.monotonic()
+        self._journal = None
+
+    def load(self, df):
+        """
+        以规范化后的DataFrame初始化内存表，并重放上次未压缩的日志
+
+        Args:
+            df (pandas.DataFrame): 包含选择/动作参数/台词列的表
+        """
+        with self._lock:
+            self._set_rows(df)
+            replayed = self._replay()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            # 日志非空时（包括崩溃留下的不完整行）立即压缩，避免新日志追加在不完整行之后
+            if replayed or self._journal.tell():
+                self.compact()
+        return replayed
+
+    def _set_rows(self, df):
+        if df is None:
+            self._table = DialogueTable()
+            return
+        # 缺少的列补空值，保证内存表始终是选择/动作参数/台词三列
+        self._table = DialogueTable.from_payload(df.reindex(columns=COLUMNS))
+
+    def _replay(self):
+        """重放日志文件中的修改"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能不完整
+                    break
+                if entry.get('op') == 'set':
+                    self._apply_set(entry['action'], entry['dialogue'])
+                    count += 1
+        return count
+
+    def _apply_set(self, action, dialogue):
+        # 不存在该动作参数行时追加一行
+        self._table.set_text(action, dialogue, "台词")
+
+    def set_dialogue(self, action, dialogue):
+        """更新（或追加）一个动作参数的台词：内存表O(1)更新，日志追加一行"""
+        with self._lock:
+            self._apply_set(action, dialogue)
+            if self._journal is not None:
+                self._journal.write(json.dumps({'op': 'set', 'action': action, 'dialogue': dialogue},
+                                               ensure_ascii=False) + '\n')
+                self._journal.flush()
+            self._pending += 1
+            if (self._pending >= self.compact_every
+                    or time.monotonic() - self._last_compact >= self.compact_interval):
+                self.compact()
+
+    def replace_all(self, df):
+        """用界面编辑后的整张表替换内存表，并立即压缩"""
+        with self._lock:
+            self._set_rows(df)
+            self.compact()
+
+    def snapshot(self):
+        """返回内存表的DataFrame副本（供界面显示）"""
+        with self._lock:
+            return self._table.to_dataframe()
+
+    def compact(self):
+        """将内存表原子写入CSV并清空日志"""
+        with self._lock:
+            tmp_path = self.csv_path + '.tmp'
+            self._table.to_dataframe().to_csv(tmp_path, index=False, encoding='utf-8')
+            os.replace(tmp_path, self.csv_path)
+            if self._journal is not None:
+                self._journal.seek(0)
+                self._journal.truncate()
+                self._journal.flush()
+            self._pending = 0
+            self._last_compact = time.monotonic()
+
+    def close(self, remove_journal=True):
+        """压缩并关闭日志文件"""
+        with self._lock:
+            if self._journal is None:
+                return
+            self.compact()
+            self._journal.close()
+            self._journal = None
+            if remove_journal and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
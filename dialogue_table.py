@@ -0,0 +1,165 @@
+SELECT_COLUMN = "选择"
+ACTION_COLUMN = "动作参数"
+DEFAULT_TEXT_COLUMNS = ("台词",)
+
+_TRUE_VALUES = {"true", "1", "yes"}
+
+
+class DialogueRow:
+    """台词表的一行：选择状态、动作参数、各文本列的内容"""
+
+    __slots__ = ("selected", "action", "cells")
+
+    def __init__(self, selected, action, cells):
+        self.selected = selected
+        self.action = action
+        self.cells = cells
+
+
+def _parse_selected(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_VALUES
+
+
+def _clean_text(value):
+    if value is None:
+        return ""
+    # pandas的缺失值（NaN）不等于自身
+    if isinstance(value, float) and value != value:
+        return ""
+    return str(value)
+
+
+class DialogueTable:
+    """
+    按动作参数索引的台词表：保持行顺序，字典索引定位行，单行更新为O(1)
+
+    只在界面边界与Gradio Dataframe的数据（DataFrame、{'headers', 'data'}或二维列表）互相转换。
+    """
+
+    def __init__(self, text_columns=DEFAULT_TEXT_COLUMNS, select_column=SELECT_COLUMN, action_column=ACTION_COLUMN):
+        # 选择列和动作参数列的列名沿用输入数据（例如英文界面的 "Action Parameter"）
+        self.select_column = select_column
+        self.action_column = action_column
+        self.text_columns = list(text_columns)
+        self._column_index = {name: i for i, name in enumerate(self.text_columns)}
+        self.rows = []
+        self._index = {}
+
+    @property
+    def headers(self):
+        return [self.select_column, self.action_column] + self.text_columns
+
+    @classmethod
+    def from_payload(cls, payload, headers=None):
+        """
+        从Gradio Dataframe的数据构建台词表
+
+        列按位置识别：第1列为选择，第2列为动作参数，其余为文本列（与临时CSV的规范化规则一致）。
+
+        Args:
+            payload: pandas.DataFrame、{'headers': [...], 'data': [[...]]}或二维列表
+            headers (list): payload为二维列表时的列名
+
+        Returns:
+            DialogueTable
+        """
+        if payload is None:
+            return cls()
+        if hasattr(payload, "columns") and hasattr(payload, "itertuples"):
+            headers = [str(c) for c in payload.columns]
+            data = payload.itertuples(index=False, name=None)
+        elif isinstance(payload, dict):
+            headers = [str(c) for c in payload.get("headers", [])]
+            data = payload.get("data", [])
+        else:
+            data = payload
+            headers = list(headers) if headers else None
+
+        if headers is None:
+            data = list(data)
+            width = max((len(row) for row in data), default=3)
+            headers = [SELECT_COLUMN, ACTION_COLUMN] + list(DEFAULT_TEXT_COLUMNS) + \
+                [f"列{i}" for i in range(4, width + 1)]
+
+        text_columns = headers[2:] if len(headers) > 2 else list(DEFAULT_TEXT_COLUMNS)
+        table = cls(text_columns,
+                    select_column=headers[0] if len(headers) > 0 else SELECT_COLUMN,
+                    action_column=headers[1] if len(headers) > 1 else ACTION_COLUMN)
+        width = len(text_columns)
+        for values in data:
+            values = list(values)
+            selected = _parse_selected(values[0]) if len(values) > 0 else False
+            action = _clean_text(values[1]).strip() if len(values) > 1 else ""
+            cells = [_clean_text(v) for v in values[2:2 + width]]
+            cells.extend([""] * (width - len(cells)))
+            table.append(action, cells, selected)
+        return table
+
+    def to_dataframe(self):
+        """转换为界面显示用的DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(self.to_list(), columns=self.headers)
+
+    def to_list(self):
+        """转换为二维列表（每行：选择、动作参数、各文本列）"""
+        return [[row.selected, row.action] + row.cells for row in self.rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __contains__(self, action):
+        return action in self._index
+
+    def add_column(self, name):
+        """追加文本列（已存在时直接返回列序号）"""
+        column = self._column_index.get(name)
+        if column is None:
+            column = len(self.text_columns)
+            self.text_columns.append(name)
+            self._column_index[name] = column
+            for row in self.rows:
+                row.cells.append("")
+        return column
+
+    def append(self, action, cells=None, selected=False):
+        """追加一行；动作参数重复时索引指向第一次出现的行"""
+        if cells is None:
+            cells = [""] * len(self.text_columns)
+        row = DialogueRow(selected, action, cells)
+        self._index.setdefault(action, len(self.rows))
+        self.rows.append(row)
+        return row
+
+    def get(self, action):
+        """按动作参数获取行，不存在时返回None"""
+        row_index = self._index.get(action)
+        return None if row_index is None else self.rows[row_index]
+
+    def get_text(self, action, column=None):
+        row = self.get(action)
+        if row is None:
+            return None
+        return row.cells[self._column_index[column] if column else 0]
+
+    def set_text(self, action, text, column=None):
+        """设置动作参数对应行的文本（column省略时为第一个文本列）；行不存在时追加"""
+        column_index = self.add_column(column) if column else 0
+        row = self.get(action)
+        if row is None:
+            row = self.append(action)
+        row.cells[column_index] = text
+        return row
+
+    def set_selected(self, action, selected):
+        row = self.get(action)
+        if row is not None:
+            row.selected = bool(selected)
+
+    def selected_rows(self):
+        """返回所有被选中的行"""
+        return [row for row in self.rows if row.selected]
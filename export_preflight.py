@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wav_reader import read_wav_info, WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT
+
+# 索引格式或校验规则变化时递增（版本2：多声道文件不再标记为错误，导出时会混缩为单声道）
+INDEX_VERSION = 2
+
+# BRE文件格式：48kHz、16bit、单声道，标准44字节头部
+BRE_SAMPLE_RATE = 48000
+BRE_HEADER_SIZE = 44
+
+# 导出的语音子文件夹：角色自身的台词与素材包提供的breath/moan
+CHARACTER_VOICE_FOLDERS = ["greeting", "orgasm", "reaction", "tease", "impact", "touch"]
+MATERIAL_VOICE_FOLDERS = ["breath", "moan"]
+
+# 导出流程支持的源格式
+SUPPORTED_FORMATS = {
+    WAVE_FORMAT_PCM: (8, 16, 24, 32),
+    WAVE_FORMAT_IEEE_FLOAT: (32, 64),
+}
+
+# 同一索引目录在进程内共享一把锁和一份内存索引（导出器各自创建索引实例，可能并发扫描同一文件夹）
+_shared_lock = threading.Lock()
+_shared_states = {}
+
+
+def _shared_state(index_root):
+    """获取索引目录对应的 (锁, 内存索引)"""
+    key = os.path.normcase(os.path.abspath(index_root))
+    with _shared_lock:
+        state = _shared_states.get(key)
+        if state is None:
+            state = _shared_states[key] = (threading.Lock(), {})
+        return state
+
+
+class ExportPreflightIndex:
+    """导出预检索引：按文件夹缓存WAV信息（大小、采样率、声道、时长、预估BRE大小），增量并行更新"""
+
+    def __init__(self, index_root=None, max_workers=8):
+        if index_root is None:
+            if hasattr(sys, '_MEIPASS'):
+                # PyInstaller打包后使用用户可写目录
+                index_root = os.path.expanduser('~/Library/Application Support/breathVOICE/cache/preflight')
+            else:
+                index_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'preflight')
+        self.index_root = index_root
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+        self._lock, self._indexes = _shared_state(index_root)
+
+    def _index_path(self, folder):
+        folder = os.path.abspath(folder)
+        digest = hashlib.sha1(folder.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.index_root, f"{os.path.basename(folder)}_{digest}.json")
+
+    def _load_index(self, folder):
+        index_path = self._index_path(folder)
+        index = self._indexes.get(index_path)
+        if index is not None:
+            return index_path, index
+        index = None
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"预检索引损坏，将重建: {index_path}: {e}")
+        if not index or index.get('version') != INDEX_VERSION:
+            index = {'version': INDEX_VERSION, 'folder': os.path.abspath(folder), 'entries': {}}
+        self._indexes[index_path] = index
+        return index_path, index
+
+    def _save_index(self, index_path, index):
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        # 每次写入使用独立的临时文件
+        fd, tmp_path = tempfile.mkstemp(prefix='.preflight-', suffix='.tmp', dir=os.path.dirname(index_path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _list_wav_files(folder, subfolders):
+        """列出需要检查的WAV文件及其stat信息"""
+        files = {}
+        if subfolders is None:
+            for dirpath, dirnames, filenames in os.walk(folder):
+                for filename in filenames:
+                    if filename.endswith('.wav'):
+                        path = os.path.join(dirpath, filename)
+                        rel = os.path.relpath(path, folder).replace(os.sep, '/')
+                        try:
+                            files[rel] = os.stat(path)
+                        except OSError:
+                            continue
+        else:
+            for sub in subfolders:
+                sub_path = os.path.join(folder, sub)
+                if not os.path.isdir(sub_path):
+                    continue
+                with os.scandir(sub_path) as it:
+                    for entry in it:
+                        if entry.is_file() and entry.name.endswith('.wav'):
+                            try:
+                                files[f"{sub}/{entry.name}"] = entry.stat()
+                            except OSError:
+                                continue
+        return files
+
+    @staticmethod
+    def probe_file(path, st):
+        """
+        读取单个WAV头部并校验格式
+
+        Returns:
+            dict: 索引条目
+        """
+        entry = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sample_rate': None,
+            'channels': None,
+            'bits_per_sample': None,
+            'duration': 0.0,
+            'bre_size': 0,
+            'error': None
+        }
+        info = read_wav_info(path)
+        if not info:
+            entry['error'] = "无法解析WAV头部（文件损坏或不是WAV）"
+            return entry
+
+        entry.update({
+            'sample_rate': info['sample_rate'],
+            'channels': info['num_channels'],
+            'bits_per_sample': info['bits_per_sample'],
+            'duration': info['duration'],
+            'bre_size': BRE_HEADER_SIZE + int(info['num_frames'] * BRE_SAMPLE_RATE / info['sample_rate']) * 2
+        })
+
+        supported_bits = SUPPORTED_FORMATS.get(info['audio_format'])
+        if supported_bits is None:
+            entry['error'] = f"不支持的音频编码: 0x{info['audio_format']:04x}"
+        elif info['bits_per_sample'] not in supported_bits:
+            entry['error'] = f"不支持的位深度: {info['bits_per_sample']}bit"
+        elif info['num_frames'] == 0:
+            entry['error'] = "音频数据为空"
+        return entry
+
+    def scan(self, folder, subfolders=None):
+        """
+        增量扫描文件夹：只对新增或变化的文件并行读取头部
+
+        Args:
+            folder (str): 要扫描的文件夹（角色目录或素材包目录）
+            subfolders (list): 只扫描这些子文件夹（不递归）；None表示递归扫描全部
+
+        Returns:
+            dict: {
+                'folder': str,
+                'files': int,
+                'total_bre_size': int,
+                'total_duration': float,
+                'problems': list[(相对路径, 问题描述)],
+                'probed': int,
+                'cached': int
+            }
+        """
+        listed = self._list_wav_files(folder, subfolders) if os.path.isdir(folder) else {}
+
+        with self._lock:
+            index_path, index = self._load_index(folder)
+            entries = index['entries']
+            stale = [rel for rel, st in listed.items()
+                     if rel not in entries
+                     or entries[rel]['size'] != st.st_size
+                     or entries[rel]['mtime_ns'] != st.st_mtime_ns]
+
+        probed = {}
+        if stale:
+            workers = max(1, min(self.max_workers, len(stale)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    lambda rel: (rel, self.probe_file(os.path.join(folder, *rel.split('/')), listed[rel])),
+                    stale
+                )
+                probed = dict(results)
+
+        with self._lock:
+            changed = bool(probed)
+            entries.update(probed)
+            # 删除扫描范围内已不存在的文件
+            for rel in list(entries.keys()):
+                in_scope = subfolders is None or rel.split('/', 1)[0] in subfolders
+                if in_scope and rel not in listed:
+                    del entries[rel]
+                    changed = True
+            if changed:
+                try:
+                    self._save_index(index_path, index)
+                except OSError as e:
+                    self.logger.warning(f"保存预检索引失败: {e}")
+
+            selected = [entries[rel] for rel in listed]
+            problems = sorted((rel, entries[rel]['error']) for rel in listed if entries[rel]['error'])
+
+        return {
+            'folder': folder,
+            'files': len(listed),
+            'total_bre_size': sum(e['bre_size'] for e in selected),
+            'total_duration': sum(e['duration'] for e in selected),
+            'problems': problems,
+            'probed': len(probed),
+            'cached': len(listed) - len(probed)
+        }
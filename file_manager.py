@@ -1,10 +1,24 @@
 import os
 import shutil
-from PIL import Image
 import json
 import sys
+import time
+import threading
+
+from startup import lazy_import
+
+# 首次处理头像时才导入
+Image = lazy_import('PIL.Image')
+
+# 描述文件缓存的mtime复查间隔（秒）：间隔内直接返回缓存，不访问磁盘
+DESCRIPTION_RECHECK_INTERVAL = 2.0
 
 class CharacterFileManager:
+    # 角色描述缓存，所有实例共享：{描述文件绝对路径: (mtime_ns, 内容, 上次检查时间)}
+    _description_cache = {}
+    _description_lock = threading.Lock()
+    cache_stats = {'hits': 0, 'misses': 0}
+
     def __init__(self, base_path=None):
         if base_path is None:
             # 检测是否为打包环境
@@ -91,6 +105,7 @@ class CharacterFileManager:
         description_file = os.path.join(description_path, 'character_info.txt')
         with open(description_file, 'w', encoding='utf-8') as f:
             f.write(description)
+        self.invalidate_description(character_name)
         
         return description_file
     
@@ -131,14 +146,46 @@ class CharacterFileManager:
         return None
     
     def get_character_description(self, character_name):
-        """读取角色描述"""
-        description_file = os.path.join(self.base_path, character_name, 'description', 'character_info.txt')
+        """读取角色描述（带缓存：复查间隔内不访问磁盘，之后按文件mtime判断是否重新读取）"""
+        description_file = self._description_file(character_name)
+        key = os.path.abspath(description_file)
+        now = time.monotonic()
+        with self._description_lock:
+            cached = self._description_cache.get(key)
+            if cached and now - cached[2] < DESCRIPTION_RECHECK_INTERVAL:
+                self.cache_stats['hits'] += 1
+                return cached[1]
         
-        if os.path.exists(description_file):
+        try:
+            mtime_ns = os.stat(description_file).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        
+        if cached and cached[0] == mtime_ns:
+            with self._description_lock:
+                self._description_cache[key] = (mtime_ns, cached[1], now)
+                self.cache_stats['hits'] += 1
+            return cached[1]
+        
+        description = None
+        if mtime_ns is not None:
             with open(description_file, 'r', encoding='utf-8') as f:
-                return f.read()
-        
-        return None
+                description = f.read()
+        with self._description_lock:
+            self._description_cache[key] = (mtime_ns, description, now)
+            self.cache_stats['misses'] += 1
+        return description
+    
+    def _description_file(self, character_name):
+        return os.path.join(self.base_path, character_name, 'description', 'character_info.txt')
+    
+    def invalidate_description(self, character_name=None):
+        """清除角色描述缓存（character_name为None时全部清除）"""
+        with self._description_lock:
+            if character_name is None:
+                self._description_cache.clear()
+            else:
+                self._description_cache.pop(os.path.abspath(self._description_file(character_name)), None)
     
     def delete_character_directory(self, character_name):
         """删除角色的整个目录"""
@@ -146,6 +193,7 @@ class CharacterFileManager:
         
         if os.path.exists(character_path):
             shutil.rmtree(character_path)
+            self.invalidate_description(character_name)
             return True
         
         return False
@@ -0,0 +1,314 @@
+import os
+import time
+import logging
+import itertools
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+# 优先级：数值越小越先执行
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+# 各资源池的默认大小，可用环境变量 BREATHVOICE_POOL_<名称大写> 覆盖
+DEFAULT_POOL_SIZES = {
+    'llm': 4,    # 并发LLM流式请求
+    'tts': 4,    # 并发TTS合成请求
+    'cpu': max(1, (os.cpu_count() or 2) - 1),  # 音频转换/打包等CPU密集任务
+    'io': 2,     # 设备写入
+}
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """调度器中的一个任务"""
+
+    __slots__ = ('id', 'pool', 'fn', 'args', 'kwargs', 'future', 'label', 'owner', 'character',
+                 'priority', 'submitted_at', 'started_at', 'context')
+
+    def __init__(self, job_id, pool, fn, args, kwargs, label, owner, character, priority):
+        self.id = job_id
+        self.pool = pool
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.label = label
+        self.owner = owner
+        self.character = character
+        self.priority = priority
+        self.submitted_at = time.time()
+        self.started_at = None
+        # 在提交者的上下文中执行（Gradio的进度回调依赖contextvars）
+        self.context = contextvars.copy_context()
+
+    def info(self):
+        return {
+            'id': self.id,
+            'pool': self.pool,
+            'label': self.label,
+            'owner': self.owner,
+            'character': self.character,
+            'priority': self.priority,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+        }
+
+
+class _FairQueue:
+    """
+    公平队列：先按优先级，同一优先级内在操作者之间轮转，同一操作者内在角色之间轮转
+
+    结构：{优先级: OrderedDict{操作者: OrderedDict{角色: deque[Job]}}}
+    """
+
+    def __init__(self):
+        self._levels = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, job):
+        owners = self._levels.setdefault(job.priority, OrderedDict())
+        characters = owners.setdefault(job.owner, OrderedDict())
+        characters.setdefault(job.character, deque()).append(job)
+        self._size += 1
+
+    def pop(self):
+        for priority in sorted(self._levels):
+            owners = self._levels[priority]
+            # 取队首的操作者和角色，取出后移到队尾实现轮转
+            owner, characters = next(iter(owners.items()))
+            character, queue = next(iter(characters.items()))
+            job = queue.popleft()
+            del characters[character]
+            if queue:
+                characters[character] = queue
+            del owners[owner]
+            if characters:
+                owners[owner] = characters
+            if not owners:
+                del self._levels[priority]
+            self._size -= 1
+            return job
+        return None
+
+    def remove(self, predicate):
+        """移除满足条件的任务，返回被移除的任务列表"""
+        removed = []
+        for priority in list(self._levels):
+            owners = self._levels[priority]
+            for owner in list(owners):
+                characters = owners[owner]
+                for character in list(characters):
+                    queue = characters[character]
+                    kept = deque(job for job in queue if not predicate(job))
+                    removed.extend(job for job in queue if predicate(job))
+                    if kept:
+                        characters[character] = kept
+                    else:
+                        del characters[character]
+                if not characters:
+                    del owners[owner]
+            if not owners:
+                del self._levels[priority]
+        self._size -= len(removed)
+        return removed
+
+    def jobs(self):
+        """按出队顺序近似列出所有排队任务（用于状态展示）"""
+        result = []
+        for priority in sorted(self._levels):
+            for characters in self._levels[priority].values():
+                for queue in characters.values():
+                    result.extend(queue)
+        return result
+
+
+class _WorkerPool:
+    """固定大小的工作线程池，从公平队列取任务"""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.queue = _FairQueue()
+        self.running = {}
+        self.completed = 0
+        self.failed = 0
+        self.condition = threading.Condition()
+        self.threads = []
+        self.shutdown = False
+
+    def start(self):
+        for i in range(self.size):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.shutdown:
+                    self.condition.wait()
+                if self.shutdown and not self.queue:
+                    return
+                job = self.queue.pop()
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                job.started_at = time.time()
+                self.running[job.id] = job
+
+            try:
+                result = job.context.run(job.fn, *job.args, **job.kwargs)
+            except BaseException as e:
+                job.future.set_exception(e)
+                with self.condition:
+                    self.failed += 1
+            else:
+                job.future.set_result(result)
+            finally:
+                with self.condition:
+                    self.running.pop(job.id, None)
+                    self.completed += 1
+
+
+class JobScheduler:
+    """
+    中央任务调度器：LLM、TTS、CPU音频处理、设备I/O各有独立大小的线程池，
+    任务按优先级执行，同一优先级在操作者和角色之间公平轮转
+
+    用法：
+        future = get_scheduler().submit('tts', call_tts, text, owner=session_id, character=name)
+        result = future.result()
+    """
+
+    def __init__(self, pool_sizes=None):
+        sizes = dict(DEFAULT_POOL_SIZES)
+        for name in sizes:
+            env_value = os.environ.get(f'BREATHVOICE_POOL_{name.upper()}')
+            if env_value:
+                try:
+                    sizes[name] = max(1, int(env_value))
+                except ValueError:
+                    logger.warning(f"忽略无效的线程池大小 BREATHVOICE_POOL_{name.upper()}={env_value}")
+        sizes.update(pool_sizes or {})
+        self._ids = itertools.count(1)
+        self.pools = {name: _WorkerPool(name, size) for name, size in sizes.items()}
+        for pool in self.pools.values():
+            pool.start()
+
+    def submit(self, pool, fn, *args, owner='local', character=None, priority=PRIORITY_NORMAL,
+               label=None, **kwargs):
+        """
+        提交任务
+
+        Args:
+            pool (str): 资源池名称（llm / tts / cpu / io）
+            fn (callable): 要执行的函数
+            owner (str): 操作者标识（界面会话ID、'batch'等），用于公平分配
+            character (str): 角色名，用于同一操作者内的公平分配
+            priority (int): 优先级，数值越小越先执行
+            label (str): 状态展示用的说明
+
+        Returns:
+            concurrent.futures.Future
+        """
+        worker_pool = self.pools.get(pool)
+        if worker_pool is None:
+            raise ValueError(f"未知的资源池: {pool}（可选: {', '.join(self.pools)}）")
+        job = Job(next(self._ids), pool, fn, args, kwargs,
+                  label or getattr(fn, '__name__', 'job'), owner, character, priority)
+        with worker_pool.condition:
+            if worker_pool.shutdown:
+                raise RuntimeError("调度器已关闭")
+            worker_pool.queue.push(job)
+            worker_pool.condition.notify()
+        return job.future
+
+    def run(self, pool, fn, *args, **kwargs):
+        """提交任务并等待结果（在调用线程中阻塞）"""
+        return self.submit(pool, fn, *args, **kwargs).result()
+
+    def cancel(self, owner=None, character=None, job_id=None):
+        """
+        取消排队中的任务（正在运行的任务不受影响）
+
+        Returns:
+            int: 取消的任务数
+        """
+        def matches(job):
+            return ((job_id is None or job.id == job_id)
+                    and (owner is None or job.owner == owner)
+                    and (character is None or job.character == character))
+
+        cancelled = 0
+        for worker_pool in self.pools.values():
+            with worker_pool.condition:
+                removed = worker_pool.queue.remove(matches)
+            for job in removed:
+                job.future.cancel()
+            cancelled += len(removed)
+        return cancelled
+
+    def status(self):
+        """
+        列出各资源池排队和运行中的任务
+
+        Returns:
+            dict: {池名: {'size', 'running': [任务信息], 'queued': [任务信息], 'completed', 'failed'}}
+        """
+        result = {}
+        for name, worker_pool in self.pools.items():
+            with worker_pool.condition:
+                result[name] = {
+                    'size': worker_pool.size,
+                    'running': [job.info() for job in worker_pool.running.values()],
+                    'queued': [job.info() for job in worker_pool.queue.jobs()],
+                    'completed': worker_pool.completed,
+                    'failed': worker_pool.failed,
+                }
+        return result
+
+    def format_status(self):
+        """状态的文本摘要（用于界面显示和日志）"""
+        lines = []
+        for name, pool_status in self.status().items():
+            lines.append(f"[{name}] 运行 {len(pool_status['running'])}/{pool_status['size']}，"
+                         f"排队 {len(pool_status['queued'])}，已完成 {pool_status['completed']}")
+            for job in pool_status['running']:
+                lines.append(f"  ▶ #{job['id']} {job['label']} ({job['owner']}/{job['character'] or '-'})")
+            for job in pool_status['queued']:
+                lines.append(f"  … #{job['id']} {job['label']} ({job['owner']}/{job['character'] or '-'}，"
+                             f"优先级 {job['priority']})")
+        return "\n".join(lines)
+
+    def shutdown(self, wait=True, cancel_queued=False):
+        """关闭调度器；cancel_queued为True时取消所有排队任务"""
+        if cancel_queued:
+            self.cancel()
+        for worker_pool in self.pools.values():
+            with worker_pool.condition:
+                worker_pool.shutdown = True
+                worker_pool.condition.notify_all()
+        if wait:
+            for worker_pool in self.pools.values():
+                for thread in worker_pool.threads:
+                    thread.join()
+
+
+# 进程内共享的调度器
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """获取进程内共享的调度器（首次调用时创建）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import shutil
+import logging
+import tempfile
+import threading
+
+# 缓存格式版本，转换流程发生不兼容变化时递增（版本2：单次扫描标准化与内存映射读取）
+CACHE_VERSION = 2
+
+# 同一缓存目录在进程内共享一把锁和一份内存索引（多个导出器实例可能并发写同一目录）
+_shared_lock = threading.Lock()
+_shared_states = {}
+
+
+def _shared_state(cache_root):
+    """获取缓存目录对应的 (锁, 内存索引)"""
+    key = os.path.normcase(os.path.abspath(cache_root))
+    with _shared_lock:
+        state = _shared_states.get(key)
+        if state is None:
+            state = _shared_states[key] = (threading.Lock(), {})
+        return state
+
+
+class MaterialPackCache:
+    """素材包BRE缓存：Reference Voices中的breath/moan素材只转换一次，导出时直接硬链接或复制"""
+
+    def __init__(self, cache_root=None):
+        if cache_root is None:
+            if hasattr(sys, '_MEIPASS'):
+                # PyInstaller打包后使用用户可写目录
+                cache_root = os.path.expanduser('~/Library/Application Support/breathVOICE/cache/material_packs')
+            else:
+                cache_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'material_packs')
+        self.cache_root = cache_root
+        self.logger = logging.getLogger(__name__)
+        self._lock, self._indexes = _shared_state(cache_root)
+
+    def get_pack_cache_dir(self, pack_name):
+        """获取素材包的缓存目录"""
+        return os.path.join(self.cache_root, pack_name)
+
+    def _index_path(self, pack_name):
+        return os.path.join(self.get_pack_cache_dir(pack_name), 'index.json')
+
+    def _load_index(self, pack_name, signature):
+        """加载素材包索引；版本或转换参数不一致时整体失效"""
+        index = self._indexes.get(pack_name)
+        if index is not None and index.get('signature') == signature:
+            return index
+
+        index = None
+        index_path = self._index_path(pack_name)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"素材包缓存索引损坏，将重建: {index_path}: {e}")
+                index = None
+
+        if not index or index.get('version') != CACHE_VERSION or index.get('signature') != signature:
+            if index:
+                self.logger.info(f"素材包缓存版本或转换参数已变化，清空缓存: {pack_name}")
+            shutil.rmtree(self.get_pack_cache_dir(pack_name), ignore_errors=True)
+            index = {'version': CACHE_VERSION, 'signature': signature, 'entries': {}}
+
+        self._indexes[pack_name] = index
+        return index
+
+    def _save_index(self, pack_name):
+        """原子写入素材包索引（每次写入使用独立的临时文件）"""
+        index_path = self._index_path(pack_name)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.index-', suffix='.tmp', dir=os.path.dirname(index_path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._indexes[pack_name], f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_convert(self, pack_name, source_file, rel_path, signature, convert_func):
+        """
+        获取素材文件对应的缓存BRE，缓存缺失或源文件变化时调用convert_func重新转换
+
+        Args:
+            pack_name (str): 素材包名称
+            source_file (str): 源WAV文件路径
+            rel_path (str): 相对素材包的路径，例如 breath/xxx.wav
+            signature (str): 转换参数签名（采样率、电平、转换程序版本等）
+            convert_func (callable): 转换函数，接收(source_file, bre_path)，返回是否成功
+
+        Returns:
+            str: 缓存中的BRE文件路径，转换失败时返回None
+        """
+        st = os.stat(source_file)
+        rel_key = rel_path.replace(os.sep, '/')
+        bre_rel = os.path.splitext(rel_key)[0] + '.bre'
+        bre_path = os.path.join(self.get_pack_cache_dir(pack_name), *bre_rel.split('/'))
+
+        with self._lock:
+            index = self._load_index(pack_name, signature)
+            entry = index['entries'].get(rel_key)
+            if (entry and entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns
+                    and os.path.exists(bre_path)):
+                return bre_path
+
+        # 缓存未命中：先转换到独立的临时文件，成功后原子替换，避免并发导出读到半成品
+        os.makedirs(os.path.dirname(bre_path), exist_ok=True)
+        fd, tmp_bre = tempfile.mkstemp(prefix='.convert-', suffix='.bre', dir=os.path.dirname(bre_path))
+        os.close(fd)
+        try:
+            if not convert_func(source_file, tmp_bre):
+                return None
+            os.replace(tmp_bre, bre_path)
+        finally:
+            if os.path.exists(tmp_bre):
+                os.remove(tmp_bre)
+
+        with self._lock:
+            index = self._load_index(pack_name, signature)
+            index['entries'][rel_key] = {
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'bre': bre_rel
+            }
+            self._save_index(pack_name)
+        self.logger.info(f"素材包缓存已更新: {pack_name}/{rel_key}")
+        return bre_path
+
+    def prune(self, pack_name, pack_dir, signature):
+        """
+        删除素材包中已不存在的源文件对应的缓存条目
+
+        Returns:
+            int: 删除的条目数量
+        """
+        removed = 0
+        with self._lock:
+            index = self._load_index(pack_name, signature)
+            for rel_key in list(index['entries'].keys()):
+                if not os.path.exists(os.path.join(pack_dir, *rel_key.split('/'))):
+                    entry = index['entries'].pop(rel_key)
+                    bre_path = os.path.join(self.get_pack_cache_dir(pack_name), *entry['bre'].split('/'))
+                    if os.path.exists(bre_path):
+                        os.remove(bre_path)
+                    removed += 1
+            if removed:
+                self._save_index(pack_name)
+        return removed
+
+    @staticmethod
+    def place(cached_path, target_path):
+        """
+        将缓存文件放到导出目录：优先硬链接，跨文件系统时回退为复制
+
+        Returns:
+            bool: 是否使用了硬链接
+        """
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(cached_path, target_path)
+            return True
+        except OSError:
+            shutil.copyfile(cached_path, target_path)
+            return False
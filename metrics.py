@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# 直方图分桶（秒），覆盖单文件转换的毫秒级到LLM请求的分钟级
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+METRIC_PREFIX = 'breathvoice_'
+# 内存中保留的最近任务数（/metrics/jobs），任务JSON目录中也只保留最近这么多个文件
+RECENT_JOBS_LIMIT = 50
+
+_lock = threading.Lock()
+_counters = {}     # (名称, 标签元组) -> 值
+_histograms = {}   # (名称, 标签元组) -> [各桶计数, 总和, 次数]
+_help = {}
+_recent_jobs = []
+_current_job = contextvars.ContextVar('breathvoice_metrics_job', default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def inc(name, amount=1, help_text=None, **labels):
+    """计数器增加amount"""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+        if help_text:
+            _help.setdefault(name, help_text)
+    job = _current_job.get()
+    if job is not None:
+        job.add_counter(name, amount, labels)
+
+
+def observe(name, value, help_text=None, **labels):
+    """记录一次观测值到直方图（通常为秒数）"""
+    key = (name, _label_key(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * len(DEFAULT_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                hist[0][i] += 1
+        hist[1] += value
+        hist[2] += 1
+        if help_text:
+            _help.setdefault(name, help_text)
+
+
+@contextmanager
+def span(name, **labels):
+    """
+    计时区间：结束时把耗时记录到直方图 <name>_seconds，并写入当前任务的跟踪记录
+
+    用法：
+        with metrics.span('bre_convert', folder='greeting') as attrs:
+            ...
+            attrs['bytes'] = size     # 附加属性只进入任务JSON
+    """
+    attrs = {}
+    start = time.perf_counter()
+    started_at = time.time()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe(f'{name}_seconds', duration, **labels)
+        job = _current_job.get()
+        if job is not None:
+            job.add_span(name, labels, started_at, duration, attrs, error)
+
+
+class JobTrace:
+    """
+    一个任务（导出、台词生成、TTS批次等）的跟踪记录：收集期间所有span和计数，结束时输出JSON
+
+    用法：
+        with metrics.job('export', character='角色A', output_dir=...) as trace:
+            ...
+    """
+
+    def __init__(self, kind, character=None, output_dir=None):
+        self.kind = kind
+        self.character = character
+        self.output_dir = output_dir
+        self.started_at = time.time()
+        self.finished_at = None
+        self.status = 'running'
+        self.spans = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, labels, started_at, duration, attrs, error):
+        record = {'name': name, 'start': round(started_at - self.started_at, 6),
+                  'duration': round(duration, 6)}
+        if labels:
+            record['labels'] = {k: str(v) for k, v in labels.items() if v is not None}
+        if attrs:
+            record['attrs'] = attrs
+        if error:
+            record['error'] = error
+        with self._lock:
+            self.spans.append(record)
+
+    def add_counter(self, name, amount, labels):
+        key = name if not labels else name + '{' + ','.join(f'{k}={v}' for k, v in _label_key(labels)) + '}'
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def summary(self):
+        """按span名称汇总次数和总耗时"""
+        totals = {}
+        with self._lock:
+            for record in self.spans:
+                entry = totals.setdefault(record['name'], {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+                entry['count'] += 1
+                entry['total_seconds'] += record['duration']
+                entry['max_seconds'] = max(entry['max_seconds'], record['duration'])
+        for entry in totals.values():
+            entry['total_seconds'] = round(entry['total_seconds'], 6)
+            entry['max_seconds'] = round(entry['max_seconds'], 6)
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        return {
+            'kind': self.kind,
+            'character': self.character,
+            'status': self.status,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration': round((self.finished_at or time.time()) - self.started_at, 6),
+            'summary': self.summary(),
+            'counters': counters,
+            'spans': spans,
+        }
+
+    def dump(self):
+        """写入 <output_dir>/<kind>_<时间>.json，返回路径；未指定目录时返回None"""
+        if not self.output_dir:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        millis = int(self.started_at * 1000) % 1000
+        path = os.path.join(self.output_dir, f"{self.kind}_{stamp}-{millis:03d}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        prune_job_files(self.output_dir)
+        return path
+
+
+def prune_job_files(output_dir, keep=RECENT_JOBS_LIMIT):
+    """删除任务JSON目录中较旧的文件，只保留最近keep个"""
+    try:
+        names = [name for name in os.listdir(output_dir) if name.endswith('.json')]
+    except OSError:
+        return
+    if len(names) <= keep:
+        return
+    paths = []
+    for name in names:
+        path = os.path.join(output_dir, name)
+        try:
+            paths.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    paths.sort()
+    for _, path in paths[:-keep] if keep > 0 else paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def default_jobs_dir():
+    """任务JSON的默认目录"""
+    if hasattr(sys, '_MEIPASS'):
+        # PyInstaller打包后使用用户可写目录
+        return os.path.expanduser('~/Library/Application Support/breathVOICE/cache/metrics')
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'metrics')
+
+
+@contextmanager
+def job(kind, character=None, output_dir=None):
+    """
+    开始一个任务跟踪；嵌套时复用外层任务（例如注入流程内部的导出）
+
+    Args:
+        kind (str): 任务类型，如 'export'、'dialogue'、'tts'
+        character (str): 角色名
+        output_dir (str): JSON输出目录，默认 cache/metrics
+    """
+    parent = _current_job.get()
+    if parent is not None:
+        yield parent
+        return
+    trace = JobTrace(kind, character, output_dir or default_jobs_dir())
+    token = _current_job.set(trace)
+    try:
+        yield trace
+        trace.status = 'done'
+    except BaseException:
+        trace.status = 'failed'
+        raise
+    finally:
+        _current_job.reset(token)
+        trace.finished_at = time.time()
+        observe('job_seconds', trace.finished_at - trace.started_at, kind=kind)
+        inc('jobs_total', kind=kind, status=trace.status)
+        with _lock:
+            _recent_jobs.append(trace)
+            del _recent_jobs[:-RECENT_JOBS_LIMIT]
+        try:
+            trace.dump()
+        except OSError:
+            pass
+
+
+def traced(kind):
+    """装饰器：函数执行期间作为一个任务跟踪；函数内可通过 current_job() 补充角色名和输出目录"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with job(kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def counter_values(name):
+    """某个计数器的当前值：{标签字典的元组形式: 值}（基准脚本用于计算前后差值）"""
+    with _lock:
+        return {labels: value for (counter, labels), value in _counters.items() if counter == name}
+
+
+def current_job():
+    """当前上下文中的任务跟踪，没有时返回None"""
+    return _current_job.get()
+
+
+def recent_jobs():
+    """最近完成的任务（JSON可序列化）"""
+    with _lock:
+        traces = list(_recent_jobs)
+    return [trace.to_dict() for trace in traces]
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (extra or [])
+    if not items:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def render_prometheus():
+    """以Prometheus文本格式输出所有计数器和直方图"""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, [list(h[0]), h[1], h[2]]) for key, h in _histograms.items())
+        help_texts = dict(_help)
+
+    lines = []
+    seen = set()
+    for (name, labels), value in counters:
+        metric = f'{METRIC_PREFIX}{name}'
+        if metric not in seen:
+            seen.add(metric)
+            if name in help_texts:
+                lines.append(f'# HELP {metric} {help_texts[name]}')
+            lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric}{_format_labels(labels)} {value}')
+
+    for (name, labels), (buckets, total, count) in histograms:
+        metric = f'{METRIC_PREFIX}{name}'
+        if metric not in seen:
+            seen.add(metric)
+            if name in help_texts:
+                lines.append(f'# HELP {metric} {help_texts[name]}')
+            lines.append(f'# TYPE {metric} histogram')
+        for bound, bucket_count in zip(DEFAULT_BUCKETS, buckets):
+            lines.append(f'{metric}_bucket{_format_labels(labels, [("le", bound)])} {bucket_count}')
+        lines.append(f'{metric}_bucket{_format_labels(labels, [("le", "+Inf")])} {count}')
+        lines.append(f'{metric}_sum{_format_labels(labels)} {total}')
+        lines.append(f'{metric}_count{_format_labels(labels)} {count}')
+
+    # 调度器各资源池的当前状态
+    try:
+        from job_scheduler import get_scheduler
+        pools = get_scheduler().status()
+    except Exception:
+        pools = {}
+    if pools:
+        for metric, field in (('scheduler_running', 'running'), ('scheduler_queued', 'queued')):
+            lines.append(f'# TYPE {METRIC_PREFIX}{metric} gauge')
+            for pool, pool_status in sorted(pools.items()):
+                lines.append(f'{METRIC_PREFIX}{metric}{{pool="{pool}"}} {len(pool_status[field])}')
+    return '\n'.join(lines) + '\n'
+
+
+def mount(app):
+    """
+    在Gradio底层的FastAPI应用上挂载 /metrics（Prometheus文本）和 /metrics/jobs（最近任务JSON）
+
+    Args:
+        app: iface.launch(prevent_thread_lock=True) 返回的FastAPI应用
+    """
+    from starlette.responses import PlainTextResponse, JSONResponse
+
+    def metrics_endpoint():
+        return PlainTextResponse(render_prometheus(), media_type='text/plain; version=0.0.4')
+
+    def jobs_endpoint():
+        return JSONResponse(recent_jobs())
+
+    app.add_api_route('/metrics', metrics_endpoint, methods=['GET'], include_in_schema=False)
+    app.add_api_route('/metrics/jobs', jobs_endpoint, methods=['GET'], include_in_schema=False)
+    # 服务器已启动后追加的路由排在Gradio路由之后，移到最前面避免被通配路由截获
+    routes = app.router.routes
+    routes[:0] = [routes.pop(), routes.pop()][::-1]
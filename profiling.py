@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import inspect
+import logging
+import cProfile
+import functools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# 环境变量 BREATHVOICE_PROFILE：
+#   1 / full  确定性分析（cProfile，输出pstats）+ 采样（输出折叠栈）
+#   sample    只采样，开销最小
+#   cprofile  只做确定性分析
+PROFILE_ENV = 'BREATHVOICE_PROFILE'
+PROFILE_MODES = ('full', 'sample', 'cprofile')
+# 采样间隔（秒），可用 BREATHVOICE_PROFILE_INTERVAL 覆盖
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# 输出到角色文件夹下的子目录
+PROFILE_DIR_NAME = 'profiles'
+
+# 叶子帧为这些函数时视为空闲等待，不计入折叠栈
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+    ('socket.py', 'accept'),
+    ('base_events.py', '_run_once'),
+}
+
+logger = logging.getLogger(__name__)
+_mode_override = None
+
+
+def set_mode(mode):
+    """命令行开关使用：覆盖环境变量设置的分析模式，None表示恢复按环境变量"""
+    global _mode_override
+    if mode is not None and mode not in PROFILE_MODES:
+        raise ValueError(f"未知的分析模式: {mode}（可选: {', '.join(PROFILE_MODES)}）")
+    _mode_override = mode
+
+
+def get_mode():
+    """当前分析模式，未开启时返回None"""
+    if _mode_override is not None:
+        return _mode_override
+    value = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if value in ('', '0', 'false', 'off', 'no'):
+        return None
+    if value in ('1', 'true', 'on', 'yes'):
+        return 'full'
+    if value in PROFILE_MODES:
+        return value
+    logger.warning(f"忽略无效的 {PROFILE_ENV}={value}")
+    return None
+
+
+class StackSampler:
+    """后台线程定时采样所有线程的调用栈，累计为折叠栈（flamegraph.pl / speedscope 格式）"""
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(f"thread:{names.get(ident, ident)}")
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """
+    一个任务的分析会话：确定性分析只覆盖调用线程，采样覆盖所有线程
+
+    用法：
+        session = ProfileSession('export', character_dir)
+        with session.step():
+            ...
+        paths = session.finish()
+    """
+
+    def __init__(self, kind, character_dir, mode='full'):
+        self.kind = kind
+        self.character_dir = character_dir
+        self.mode = mode
+        self.started_at = time.time()
+        self.profiler = None
+        self.sampler = None
+        if mode in ('full', 'cprofile'):
+            self.profiler = cProfile.Profile()
+        if mode in ('full', 'sample'):
+            try:
+                interval = float(os.environ.get('BREATHVOICE_PROFILE_INTERVAL', DEFAULT_SAMPLE_INTERVAL))
+            except ValueError:
+                interval = DEFAULT_SAMPLE_INTERVAL
+            self.sampler = StackSampler(interval)
+            self.sampler.start()
+
+    @contextmanager
+    def step(self):
+        """在调用线程上开启确定性分析（生成器函数每次迭代各调用一次）"""
+        enabled = False
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+                enabled = True
+            except ValueError as e:
+                # 其他分析器已在运行（如同时导出多个角色），本次只保留采样结果
+                logger.warning(f"无法启用cProfile: {e}")
+                self.profiler = None
+        try:
+            yield
+        finally:
+            if enabled:
+                self.profiler.disable()
+
+    def finish(self):
+        """停止采样并写出分析文件，返回写出的路径列表"""
+        if self.sampler is not None:
+            self.sampler.stop()
+        output_dir = os.path.join(self.character_dir, PROFILE_DIR_NAME)
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        millis = int(self.started_at * 1000) % 1000
+        base = os.path.join(output_dir, f"{self.kind}_{stamp}-{millis:03d}")
+        paths = []
+        if self.profiler is not None:
+            self.profiler.dump_stats(base + '.pstats')
+            paths.append(base + '.pstats')
+        if self.sampler is not None and self.sampler.stacks:
+            self.sampler.write_collapsed(base + '.collapsed')
+            paths.append(base + '.collapsed')
+        logger.info(f"[{self.kind}] 分析耗时 {time.time() - self.started_at:.2f} s，文件: {', '.join(paths) or '无'}")
+        return paths
+
+
+def _start_session(kind, character_dir, fn, args, kwargs):
+    """分析开启时创建会话；无法确定角色文件夹时返回None（不影响原函数执行）"""
+    mode = get_mode()
+    if mode is None:
+        return None
+    try:
+        bound = inspect.signature(fn).bind(*args, **kwargs)
+        bound.apply_defaults()
+        directory = character_dir(bound.arguments)
+    except Exception as e:
+        logger.warning(f"[{kind}] 无法确定分析输出目录，跳过分析: {e}")
+        return None
+    if not directory:
+        return None
+    return ProfileSession(kind, directory, mode)
+
+
+def _finish_session(session):
+    try:
+        session.finish()
+    except Exception as e:
+        logger.warning(f"[{session.kind}] 写出分析文件失败: {e}")
+
+
+def profiled(kind, character_dir):
+    """
+    装饰器：分析开启时为每次调用生成 <角色文件夹>/profiles/<kind>_<时间>.pstats 和 .collapsed
+
+    Args:
+        kind (str): 任务类型，用于文件名
+        character_dir (callable): 接收绑定后的参数字典，返回角色文件夹路径
+    """
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            # Gradio的生成器回调：每次迭代分别开关确定性分析，迭代之间的等待不计入
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                session = _start_session(kind, character_dir, fn, args, kwargs)
+                if session is None:
+                    return (yield from fn(*args, **kwargs))
+                generator = fn(*args, **kwargs)
+                try:
+                    while True:
+                        with session.step():
+                            try:
+                                item = next(generator)
+                            except StopIteration as stop:
+                                return stop.value
+                        yield item
+                finally:
+                    generator.close()
+                    _finish_session(session)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            session = _start_session(kind, character_dir, fn, args, kwargs)
+            if session is None:
+                return fn(*args, **kwargs)
+            try:
+                with session.step():
+                    return fn(*args, **kwargs)
+            finally:
+                _finish_session(session)
+        return wrapper
+    return decorator
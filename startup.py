@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import socket
+import logging
+import importlib
+import threading
+import urllib.request
+import urllib.error
+from contextlib import contextmanager
+
+# BREATHVOICE_LAZY_IMPORTS=0 时关闭延迟导入（启动时立即导入全部重量级依赖）
+LAZY_IMPORTS_ENABLED = os.environ.get('BREATHVOICE_LAZY_IMPORTS', '1') != '0'
+
+logger = logging.getLogger(__name__)
+
+_process_start = time.perf_counter()
+_lock = threading.RLock()
+# 启动阶段各组导入的耗时：(名称, 秒, 新加载的模块数)
+_startup_imports = []
+# 延迟导入的模块首次使用时的耗时：{模块名: 秒}
+_lazy_imports = {}
+
+
+@contextmanager
+def timed_import(label):
+    """
+    记录一组导入语句的耗时（包含其依赖，相当于 -X importtime 的cumulative列）
+
+    用法：
+        with timed_import('gradio'):
+            import gradio as gr
+    """
+    modules_before = len(sys.modules)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _startup_imports.append((label, elapsed, len(sys.modules) - modules_before))
+
+
+class LazyModule:
+    """
+    延迟导入的模块代理：首次访问属性时才真正导入，并记录导入耗时
+
+    用法：pd = lazy_import('pandas')，之后 pd.DataFrame 等用法不变。
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_module', None)
+
+    def _load(self):
+        module = object.__getattribute__(self, '_lazy_module')
+        if module is None:
+            name = object.__getattribute__(self, '_lazy_name')
+            with _lock:
+                module = object.__getattribute__(self, '_lazy_module')
+                if module is None:
+                    already_loaded = name in sys.modules
+                    start = time.perf_counter()
+                    module = importlib.import_module(name)
+                    elapsed = time.perf_counter() - start
+                    object.__setattr__(self, '_lazy_module', module)
+                    if not already_loaded:
+                        _lazy_imports[name] = elapsed
+                        logger.info(f"延迟导入 {name}: {elapsed * 1000:.1f} ms")
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        module = object.__getattribute__(self, '_lazy_module')
+        if module is None:
+            return f"<lazy module '{object.__getattribute__(self, '_lazy_name')}' (未导入)>"
+        return repr(module)
+
+
+def lazy_import(name):
+    """
+    延迟导入模块；关闭延迟导入模式时立即导入
+
+    Args:
+        name (str): 模块名，如 'pandas'、'soundfile'
+
+    Returns:
+        LazyModule 或 module
+    """
+    if not LAZY_IMPORTS_ENABLED:
+        return importlib.import_module(name)
+    return LazyModule(name)
+
+
+def import_report(top=15):
+    """
+    生成导入耗时报告（启动阶段各组导入 + 已发生的延迟导入）
+
+    需要逐模块的完整明细时可使用 python -X importtime app.py。
+
+    Returns:
+        str: 多行文本报告
+    """
+    with _lock:
+        startup = sorted(_startup_imports, key=lambda item: item[1], reverse=True)
+        lazy = sorted(_lazy_imports.items(), key=lambda item: item[1], reverse=True)
+
+    total = sum(elapsed for _, elapsed, _ in startup)
+    lines = [f"导入耗时明细（延迟导入: {'开启' if LAZY_IMPORTS_ENABLED else '关闭'}，"
+             f"启动导入合计 {total * 1000:.0f} ms，进程已运行 {elapsed_since_start():.2f} s）",
+             f"{'cumulative [ms]':>16} | {'modules':>7} | imported"]
+    for label, elapsed, modules in startup[:top]:
+        lines.append(f"{elapsed * 1000:>16.1f} | {modules:>7} | {label}")
+    if len(startup) > top:
+        rest = sum(elapsed for _, elapsed, _ in startup[top:])
+        lines.append(f"{rest * 1000:>16.1f} | {'':>7} | 其余 {len(startup) - top} 组")
+    if lazy:
+        lines.append("首次使用时的延迟导入:")
+        for name, elapsed in lazy:
+            lines.append(f"{elapsed * 1000:>16.1f} | {'':>7} | {name}")
+    return "\n".join(lines)
+
+
+def elapsed_since_start():
+    """从本模块首次导入（即进程启动早期）到现在的秒数"""
+    return time.perf_counter() - _process_start
+
+
+def wait_for_port_free(host, port, timeout=2.0, interval=0.05):
+    """
+    等待端口可绑定（例如上一个实例正在退出），替代固定的启动延迟
+
+    Returns:
+        bool: 超时前端口是否可用
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind((host, port))
+                return True
+            except OSError:
+                pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def wait_for_http_ready(url, timeout=30.0, interval=0.05):
+    """
+    轮询URL直到返回HTTP 200
+
+    Returns:
+        float or None: 就绪耗时（秒），超时返回None
+    """
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1.0) as response:
+                if response.status == 200:
+                    return time.monotonic() - start
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(interval)
+    return None
@@ -0,0 +1,232 @@
+import os
+import time
+import zlib
+import struct
+import logging
+import threading
+import contextvars
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ZIP格式常量
+_LOCAL_HEADER_SIGNATURE = 0x04034b50
+_CENTRAL_HEADER_SIGNATURE = 0x02014b50
+_END_OF_CENTRAL_DIR_SIGNATURE = 0x06054b50
+_ZIP_STORED = 0
+_ZIP_DEFLATED = 8
+_UTF8_FLAG = 0x800
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_MAX_ENTRIES = 0xFFFF
+
+
+class StreamingZipWriter:
+    """流式ZIP写入器：文件转换完成后立即追加到压缩包，使打包与转换并行进行
+
+    每个条目根据采样压缩率选择存储（STORED）或压缩（DEFLATED），
+    已经接近不可压缩的PCM/BRE数据直接存储，避免浪费CPU。
+    """
+
+    def __init__(self, output_zip_path, compresslevel=6, compress_workers=1,
+                 store_ratio_threshold=0.9, sample_size=64 * 1024):
+        """
+        Args:
+            output_zip_path (str): 输出ZIP文件路径
+            compresslevel (int): DEFLATE压缩级别（1-9）
+            compress_workers (int): 并行压缩线程数，1表示单个后台线程
+            store_ratio_threshold (float): 采样压缩率高于该值时直接存储
+            sample_size (int): 用于测量压缩率的采样字节数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.output_zip_path = output_zip_path
+        self.compresslevel = compresslevel
+        self.store_ratio_threshold = store_ratio_threshold
+        self.sample_size = sample_size
+
+        self._fp = open(output_zip_path, 'wb')
+        self._write_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(compress_workers)))
+        self._futures = []
+        self._central_records = []
+        self._names = set()
+        self._closed = False
+        self.stats = {
+            'files': 0,
+            'stored': 0,
+            'deflated': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'errors': []
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def submit(self, file_path, arcname):
+        """
+        提交一个文件，由后台线程读取、压缩并追加到ZIP（非阻塞）
+
+        Args:
+            file_path (str): 待打包文件路径
+            arcname (str): 在ZIP中的相对路径
+
+        Returns:
+            Future: 写入任务，结果为是否成功；同名条目已存在时返回None
+        """
+        if self._closed:
+            raise ValueError("ZIP写入器已关闭")
+        arcname = arcname.replace(os.sep, '/')
+        with self._write_lock:
+            if arcname in self._names:
+                self.logger.warning(f"ZIP中已存在同名条目，跳过: {arcname}")
+                return None
+            self._names.add(arcname)
+        # 在提交者的上下文中压缩，使耗时计入当前导出任务的跟踪记录
+        future = self._executor.submit(contextvars.copy_context().run, self._add_entry, file_path, arcname)
+        self._futures.append(future)
+        return future
+
+    def write(self, file_path, arcname):
+        """同步写入一个文件，返回是否成功"""
+        future = self.submit(file_path, arcname)
+        return future.result() if future else False
+
+    def close(self):
+        """
+        等待所有条目写入完成并写出中央目录
+
+        Returns:
+            dict: 打包统计 {'files', 'stored', 'deflated', 'bytes_in', 'bytes_out', 'errors'}
+        """
+        if self._closed:
+            return self.stats
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        try:
+            self._write_central_directory()
+        except Exception as e:
+            self.stats['errors'].append(f"写入ZIP中央目录失败: {str(e)}")
+            self.logger.error(f"写入ZIP中央目录失败: {str(e)}")
+        finally:
+            self._fp.close()
+        return self.stats
+
+    def choose_compression(self, data):
+        """
+        根据采样压缩率选择压缩方式
+
+        Args:
+            data (bytes): 文件内容
+
+        Returns:
+            int: _ZIP_STORED 或 _ZIP_DEFLATED
+        """
+        if not data:
+            return _ZIP_STORED
+        sample = data[:self.sample_size]
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        compressed = compressor.compress(sample) + compressor.flush()
+        ratio = len(compressed) / len(sample)
+        return _ZIP_STORED if ratio >= self.store_ratio_threshold else _ZIP_DEFLATED
+
+    def _add_entry(self, file_path, arcname):
+        """在工作线程中读取并压缩文件，然后在写锁内追加到ZIP"""
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            mtime = os.path.getmtime(file_path)
+
+            with metrics.span('zip_entry'):
+                crc = zlib.crc32(data) & 0xFFFFFFFF
+                method = self.choose_compression(data)
+                if method == _ZIP_DEFLATED:
+                    # zlib在压缩时释放GIL，多个工作线程可真正并行压缩
+                    compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+                    payload = compressor.compress(data) + compressor.flush()
+                else:
+                    payload = data
+
+            if len(data) > _ZIP32_LIMIT or len(payload) > _ZIP32_LIMIT:
+                raise ValueError("文件超过ZIP32大小限制")
+
+            with self._write_lock:
+                self._write_local_entry(arcname, payload, crc, len(data), method, mtime)
+                self.stats['files'] += 1
+                self.stats['stored' if method == _ZIP_STORED else 'deflated'] += 1
+                self.stats['bytes_in'] += len(data)
+                self.stats['bytes_out'] += len(payload)
+            return True
+
+        except Exception as e:
+            error_msg = f"写入ZIP条目失败 {arcname}: {str(e)}"
+            self.logger.error(error_msg)
+            with self._write_lock:
+                self.stats['errors'].append(error_msg)
+            return False
+
+    def _write_local_entry(self, arcname, payload, crc, file_size, method, mtime):
+        """写入本地文件头和数据，并记录中央目录信息（调用方需持有写锁）"""
+        if len(self._central_records) >= _ZIP32_MAX_ENTRIES:
+            raise ValueError("ZIP条目数量超过限制")
+        offset = self._fp.tell()
+        if offset > _ZIP32_LIMIT:
+            raise ValueError("ZIP文件超过ZIP32大小限制")
+
+        name_bytes, flags = self._encode_name(arcname)
+        dos_time, dos_date = self._dos_datetime(mtime)
+
+        header = struct.pack(
+            '<IHHHHHIIIHH',
+            _LOCAL_HEADER_SIGNATURE, 20, flags, method, dos_time, dos_date,
+            crc, len(payload), file_size, len(name_bytes), 0
+        )
+        self._fp.write(header)
+        self._fp.write(name_bytes)
+        self._fp.write(payload)
+
+        self._central_records.append(
+            (name_bytes, flags, method, dos_time, dos_date, crc, len(payload), file_size, offset)
+        )
+
+    def _write_central_directory(self):
+        """写出中央目录和目录结束记录"""
+        with self._write_lock:
+            cd_offset = self._fp.tell()
+            for name_bytes, flags, method, dos_time, dos_date, crc, csize, usize, offset in self._central_records:
+                record = struct.pack(
+                    '<IHHHHHHIIIHHHHHII',
+                    _CENTRAL_HEADER_SIGNATURE, (3 << 8) | 20, 20, flags, method,
+                    dos_time, dos_date, crc, csize, usize, len(name_bytes),
+                    0, 0, 0, 0, (0o100644 << 16), offset
+                )
+                self._fp.write(record)
+                self._fp.write(name_bytes)
+            cd_size = self._fp.tell() - cd_offset
+            entries = len(self._central_records)
+            end_record = struct.pack(
+                '<IHHHHIIH',
+                _END_OF_CENTRAL_DIR_SIGNATURE, 0, 0, entries, entries, cd_size, cd_offset, 0
+            )
+            self._fp.write(end_record)
+
+    @staticmethod
+    def _encode_name(arcname):
+        """编码条目名称，非ASCII名称使用UTF-8标志"""
+        try:
+            return arcname.encode('ascii'), 0
+        except UnicodeEncodeError:
+            return arcname.encode('utf-8'), _UTF8_FLAG
+
+    @staticmethod
+    def _dos_datetime(mtime):
+        """将时间戳转换为DOS时间与日期"""
+        year, month, day, hour, minute, second = time.localtime(mtime)[:6]
+        if year < 1980:
+            year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+        dos_time = (hour << 11) | (minute << 5) | (second // 2)
+        dos_date = ((year - 1980) << 9) | (month << 5) | day
+        return dos_time, dos_date
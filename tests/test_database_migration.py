@@ -0,0 +1,42 @@
+import os
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from database import CharacterDatabase, SCHEMA_VERSION
+
+
+def _create_legacy_database(path):
+    """早期版本的数据库：characters表只有id和name，并且已有数据"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE characters (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE)")
+    conn.executemany("INSERT INTO characters (name) VALUES (?)", [("角色A",), ("角色B",)])
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_legacy_characters_table_with_rows(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    _create_legacy_database(path)
+
+    db = CharacterDatabase(path)
+    try:
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(characters)")}
+            rows = conn.execute("SELECT name, created_at, updated_at FROM characters ORDER BY id").fetchall()
+        assert {'description', 'avatar_path', 'created_at', 'updated_at'} <= columns
+        assert [row[0] for row in rows] == ["角色A", "角色B"]
+        # 已有数据的时间列已回填
+        assert all(row[1] is not None and row[2] is not None for row in rows)
+
+        # 迁移后的表可以正常新增角色，时间列有值
+        character_id = db.create_character("角色C", "描述")
+        character = db.get_character(character_id)
+        assert character[1] == "角色C"
+        with db.get_connection() as conn:
+            created_at = conn.execute("SELECT created_at FROM characters WHERE id = ?", (character_id,)).fetchone()[0]
+        assert created_at is not None
+    finally:
+        db.close()
@@ -0,0 +1,78 @@
+import os
+import sys
+import textwrap
+import subprocess
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from dialogue_journal import DialogueJournal, find_orphaned_journals
+
+PREFIX = 'breathvoice_temp_角色_'
+
+
+def _write_template(csv_path):
+    pd.DataFrame({
+        '选择': [False, False, False],
+        '动作参数': ['greeting_1', 'greeting_2', 'greeting_3'],
+        '台词': ['', '', ''],
+    }).to_csv(csv_path, index=False, encoding='utf-8')
+
+
+def _kill_session_mid_write(csv_path):
+    """在子进程中写入两条台词，第三条只写出半行后直接退出（不压缩、不关闭日志）"""
+    script = textwrap.dedent(f"""
+        import os, sys
+        import pandas as pd
+        sys.path.insert(0, {REPO_ROOT!r})
+        from dialogue_journal import DialogueJournal
+        journal = DialogueJournal({str(csv_path)!r}, compact_every=1000, compact_interval=1e9)
+        journal.load(pd.read_csv({str(csv_path)!r}, encoding='utf-8'))
+        journal.set_dialogue('greeting_1', '台词一')
+        journal.set_dialogue('greeting_2', '台词二')
+        journal._journal.write('{{"op": "set", "action": "greeting_3", "dia')
+        journal._journal.flush()
+        os._exit(1)
+    """)
+    result = subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT)
+    assert result.returncode == 1
+
+
+def test_recovers_rows_after_session_killed_mid_write(tmp_path):
+    csv_path = tmp_path / f'{PREFIX}1700000000.csv'
+    _write_template(csv_path)
+    _kill_session_mid_write(csv_path)
+
+    # 崩溃后CSV本身还没有台词，只有日志里有
+    assert pd.read_csv(csv_path, encoding='utf-8')['台词'].isna().all()
+    assert find_orphaned_journals(str(tmp_path), PREFIX) == [str(csv_path)]
+
+    journal = DialogueJournal(str(csv_path))
+    replayed = journal.load(pd.read_csv(csv_path, encoding='utf-8'))
+    assert replayed == 2
+    rows = dict(zip(journal.snapshot()['动作参数'], journal.snapshot()['台词']))
+    assert rows == {'greeting_1': '台词一', 'greeting_2': '台词二', 'greeting_3': ''}
+
+    # 恢复后已压缩进CSV，新日志不会追加在不完整行之后
+    journal.set_dialogue('greeting_3', '台词三')
+    journal._journal.close()
+    journal._journal = None
+    reopened = DialogueJournal(str(csv_path))
+    assert reopened.load(pd.read_csv(csv_path, encoding='utf-8')) == 1
+    rows = dict(zip(reopened.snapshot()['动作参数'], reopened.snapshot()['台词']))
+    assert rows['greeting_3'] == '台词三'
+
+    # 正常关闭后日志被删除，不再视为遗留
+    reopened.close()
+    assert find_orphaned_journals(str(tmp_path), PREFIX) == []
+
+
+def test_orphan_lookup_only_matches_the_character(tmp_path):
+    for name in (f'{PREFIX}1700000000.csv', 'breathvoice_temp_角色_B_1700000001.csv'):
+        _write_template(tmp_path / name)
+        (tmp_path / (name + '.journal')).write_text('', encoding='utf-8')
+    assert find_orphaned_journals(str(tmp_path), PREFIX) == [str(tmp_path / f'{PREFIX}1700000000.csv')]
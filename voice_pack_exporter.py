@@ -1,12 +1,31 @@
 import os
-import shutil
-import zipfile
-import soundfile as sf
-import numpy as np
-from tqdm import tqdm
 import tempfile
 import logging
 import subprocess
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streaming_zip_writer import StreamingZipWriter
+from material_pack_cache import MaterialPackCache
+from audio_normalizer import AudioNormalizer
+from wav_reader import open_wav_memmap, pcm_to_float32_mono, READER_VERSION
+from device_sync import entries_from_folder
+from export_preflight import ExportPreflightIndex
+from startup import lazy_import
+import metrics
+import profiling
+
+# 首次转换音频时才导入
+sf = lazy_import('soundfile')
+np = lazy_import('numpy')
+
+# 导出音频的目标格式与电平
+TARGET_SAMPLE_RATE = 48000
+TARGET_CHANNELS = 1
+TARGET_SUBTYPE = 'PCM_16'
+TARGET_DBFS = -10.0
+# 格式转换流程（读取、混缩、重采样）的版本，输出发生变化时递增（素材包缓存签名使用）
+CONVERTER_VERSION = 2
 
 class VoicePackExporter:
     """语音包导出器，负责处理音频格式转换、文件整理和压缩打包"""
@@ -15,6 +34,14 @@ class VoicePackExporter:
         self.logger = logging.getLogger(__name__)
         # wav_to_bre转换程序的路径
         self.wav_to_bre_path = os.path.join(os.path.dirname(__file__), 'voice_packs', 'wav_to_bre_single')
+        # 流式打包的并行压缩线程数
+        self.zip_compress_workers = 2
+        # 素材包BRE缓存
+        self.material_cache = MaterialPackCache()
+        # 电平标准化引擎（默认-10dBFS RMS，峰值不超过1.0）
+        self.normalizer = AudioNormalizer(target_dbfs=TARGET_DBFS)
+        # 导出预检索引
+        self.preflight = ExportPreflightIndex()
     
     def normalize_audio_to_dbfs(self, audio_data, target_dbfs=-10.0):
         """
@@ -25,31 +52,10 @@ class VoicePackExporter:
             target_dbfs (float): 目标dBFS电平，默认-10.0
         
         Returns:
-            numpy.ndarray: 标准化后的音频数据
+            numpy.ndarray: 标准化后的音频数据（不修改输入）
         """
-        # 计算当前音频的RMS值
-        rms = np.sqrt(np.mean(audio_data ** 2))
-        
-        # 避免除零错误
-        if rms == 0:
-            return audio_data
-        
-        # 计算当前dBFS
-        current_dbfs = 20 * np.log10(rms)
-        
-        # 计算需要的增益
-        gain_db = target_dbfs - current_dbfs
-        gain_linear = 10 ** (gain_db / 20)
-        
-        # 应用增益
-        normalized_audio = audio_data * gain_linear
-        
-        # 防止削波，确保峰值不超过1.0
-        peak = np.max(np.abs(normalized_audio))
-        if peak > 1.0:
-            normalized_audio = normalized_audio / peak
-        
-        return normalized_audio
+        # 单次扫描测量RMS/峰值，峰值超过1.0时整体降增益防止削波
+        return self.normalizer.normalize(audio_data, target_dbfs=target_dbfs)
         
     def convert_wav_to_bre(self, input_wav_path, output_bre_path):
         """
@@ -67,11 +73,12 @@ class VoicePackExporter:
             os.makedirs(os.path.dirname(output_bre_path), exist_ok=True)
             
             # 调用wav_to_bre程序（不使用check=True，因为程序可能返回非零退出码但仍然成功）
-            result = subprocess.run([
-                self.wav_to_bre_path,
-                input_wav_path,
-                output_bre_path
-            ], capture_output=True, text=True)
+            with metrics.span('bre_convert'):
+                result = subprocess.run([
+                    self.wav_to_bre_path,
+                    input_wav_path,
+                    output_bre_path
+                ], capture_output=True, text=True)
             
             # 检查输出文件是否存在来判断转换是否成功
             if os.path.exists(output_bre_path) and os.path.getsize(output_bre_path) > 0:
@@ -87,7 +94,7 @@ class VoicePackExporter:
             self.logger.error(f"WAV转BRE异常 {input_wav_path}: {str(e)}")
             return False
     
-    def convert_audio_format(self, input_path, output_path, target_sr=48000, target_channels=1, target_subtype='PCM_16'):
+    def convert_audio_format(self, input_path, output_path, target_sr=TARGET_SAMPLE_RATE, target_channels=TARGET_CHANNELS, target_subtype=TARGET_SUBTYPE):
         """
         转换音频格式为48KHz, 16bit, 单声道 WAV，并调整音频电平到-10dbfs
         
@@ -102,30 +109,37 @@ class VoicePackExporter:
             bool: 转换是否成功
         """
         try:
-            # 读取音频文件
-            data, sr = sf.read(input_path)
-            
-            # 如果是多声道，转换为单声道
-            if len(data.shape) > 1 and data.shape[1] > 1:
-                # 取平均值转换为单声道
-                data = np.mean(data, axis=1)
+            # 优先以内存映射读取PCM数据并分块转换为float32单声道，避免整段float64拷贝
+            with metrics.span('audio_read'):
+                view, info = open_wav_memmap(input_path)
+                if view is not None:
+                    sr = info['sample_rate']
+                    data = pcm_to_float32_mono(view)
+                    del view
+                else:
+                    # 24bit等无法直接映射的格式回退到soundfile
+                    data, sr = sf.read(input_path, dtype='float32')
+                    
+                    # 如果是多声道，转换为单声道
+                    if len(data.shape) > 1 and data.shape[1] > 1:
+                        # 取平均值转换为单声道
+                        data = np.mean(data, axis=1, dtype=np.float32)
+                    elif len(data.shape) > 1:
+                        data = data[:, 0]
             
             # 重采样到目标采样率
             if sr != target_sr:
-                # 使用numpy的线性插值重采样（避免scipy依赖）
-                old_indices = np.arange(len(data))
-                new_length = int(len(data) * target_sr / sr)
-                new_indices = np.linspace(0, len(data) - 1, new_length)
-                data = np.interp(new_indices, old_indices, data)
+                with metrics.span('audio_resample', source_rate=sr):
+                    data = self._resample_linear(data, sr, target_sr)
             
-            # 调整音频电平到-10dbfs
-            data = self.normalize_audio_to_dbfs(data, target_dbfs=-10.0)
-            
-            # 确保数据类型正确
-            data = data.astype(np.float32)
+            # 原地调整音频电平到-10dbfs
+            with metrics.span('audio_normalize'):
+                data = np.ascontiguousarray(data, dtype=np.float32)
+                data = self.normalizer.normalize(data, sample_rate=target_sr, target_dbfs=TARGET_DBFS, in_place=True)
             
             # 写入新的音频文件
-            sf.write(output_path, data, target_sr, subtype=target_subtype)
+            with metrics.span('audio_write'):
+                sf.write(output_path, data, target_sr, subtype=target_subtype)
             
             self.logger.info(f"音频转换成功: {input_path} -> {output_path}")
             return True
@@ -134,7 +148,57 @@ class VoicePackExporter:
             self.logger.error(f"音频转换失败 {input_path}: {str(e)}")
             return False
     
-    def copy_and_organize_voice_files(self, source_voices_dir, temp_export_dir, character_name, progress_callback=None, material_pack=None, stop_flag=None):
+    def _resample_linear(self, data, sr, target_sr, block_frames=262144):
+        """
+        线性插值重采样（避免scipy依赖），分块计算并直接输出float32
+        
+        结果与 np.interp(np.linspace(0, n - 1, new_length), np.arange(n), data) 一致，
+        但不会分配整段的float64索引数组。
+        """
+        length = len(data)
+        new_length = int(length * target_sr / sr)
+        output = np.empty(new_length, dtype=np.float32)
+        if new_length == 0 or length == 0:
+            return output
+        if new_length == 1 or length == 1:
+            output[:] = data[0]
+            return output
+        step = (length - 1) / (new_length - 1)
+        for start in range(0, new_length, block_frames):
+            end = min(start + block_frames, new_length)
+            positions = np.arange(start, end, dtype=np.float64) * step
+            left = positions.astype(np.int64)
+            np.minimum(left, length - 2, out=left)
+            frac = positions - left
+            block = data[left] * (1.0 - frac) + data[left + 1] * frac
+            output[start:end] = block
+        return output
+    
+    def _material_cache_signature(self):
+        """素材包缓存签名：目标格式、转换/读取/标准化流程版本与wav_to_bre程序变化时缓存自动失效"""
+        try:
+            st = os.stat(self.wav_to_bre_path)
+            converter = f"{st.st_size}:{st.st_mtime_ns}"
+        except OSError:
+            converter = "missing"
+        return (f"sr={TARGET_SAMPLE_RATE};ch={TARGET_CHANNELS};subtype={TARGET_SUBTYPE};"
+                f"converter=v{CONVERTER_VERSION};reader=v{READER_VERSION};"
+                f"{self.normalizer.signature(TARGET_DBFS)};wav_to_bre={converter}")
+    
+    def _convert_material_to_bre(self, source_file, bre_file):
+        """将素材包WAV转换为BRE（供素材包缓存调用）"""
+        # 每次转换使用独立的临时WAV，并发导出同一素材时互不覆盖
+        fd, temp_wav_file = tempfile.mkstemp(prefix='.convert-', suffix='.wav', dir=os.path.dirname(bre_file))
+        os.close(fd)
+        try:
+            if not self.convert_audio_format(source_file, temp_wav_file):
+                return False
+            return self.convert_wav_to_bre(temp_wav_file, bre_file)
+        finally:
+            if os.path.exists(temp_wav_file):
+                os.remove(temp_wav_file)
+    
+    def copy_and_organize_voice_files(self, source_voices_dir, temp_export_dir, character_name, progress_callback=None, material_pack=None, stop_flag=None, file_callback=None):
         """
         复制并整理语音文件，排除temp文件夹，转换音频格式并生成BRE文件
         
@@ -144,6 +208,7 @@ class VoicePackExporter:
             character_name (str): 角色名称
             progress_callback (callable): 进度回调函数
             material_pack (str): 素材包名称，用于获取breath和moan文件
+            file_callback (callable): 单个BRE文件生成后立即调用，接收BRE文件路径
         
         Returns:
             tuple: (成功数量, 总数量, 错误列表)
@@ -179,6 +244,17 @@ class VoicePackExporter:
                     wav_files = [f for f in os.listdir(folder_path) if f.endswith('.wav')]
                     total_count += len(wav_files)
         
+        # 导出前预检：在昂贵的转换开始前标记损坏或格式不支持的文件并跳过
+        rejected_files = set()
+        preflight_targets = [(source_voices_dir, character_folders)]
+        if material_pack:
+            preflight_targets.append((material_pack_dir, material_folders))
+        for folder, subfolders in preflight_targets:
+            report = self.preflight.scan(folder, subfolders)
+            for rel, message in report['problems']:
+                rejected_files.add(os.path.normpath(os.path.join(folder, *rel.split('/'))))
+                errors.append(f"预检未通过 {rel}: {message}")
+        
         processed_count = 0
         
         # 处理角色文件夹中的文件
@@ -208,6 +284,10 @@ class VoicePackExporter:
                 # 创建BRE文件
                 bre_file = os.path.join(target_folder, wav_file.replace('.wav', '.bre'))
                 
+                if os.path.normpath(source_file) in rejected_files:
+                    processed_count += 1
+                    continue
+                
                 try:
                     # 先转换音频格式到临时WAV文件
                     if self.convert_audio_format(source_file, temp_wav_file):
@@ -216,6 +296,8 @@ class VoicePackExporter:
                             # 删除临时WAV文件，只保留BRE文件
                             os.remove(temp_wav_file)
                             success_count += 1
+                            if file_callback:
+                                file_callback(bre_file)
                         else:
                             errors.append(f"WAV转BRE失败: {wav_file}")
                     else:
@@ -233,6 +315,9 @@ class VoicePackExporter:
         # 处理素材包中的breath和moan文件
         if material_pack:
             material_pack_dir = os.path.join(os.path.dirname(__file__), "Reference Voices", material_pack)
+            cache_signature = self._material_cache_signature()
+            # 清理素材包中已删除文件对应的缓存条目
+            self.material_cache.prune(material_pack, material_pack_dir, cache_signature)
             
             for folder_name in material_folders:
                 source_folder = os.path.join(material_pack_dir, folder_name)
@@ -251,23 +336,26 @@ class VoicePackExporter:
                 for wav_file in wav_files:
                     source_file = os.path.join(source_folder, wav_file)
                     
-                    # 创建临时WAV文件（48KHz格式）
-                    temp_wav_file = os.path.join(target_folder, wav_file)
                     # 创建BRE文件
                     bre_file = os.path.join(target_folder, wav_file.replace('.wav', '.bre'))
                     
+                    if os.path.normpath(source_file) in rejected_files:
+                        processed_count += 1
+                        continue
+                    
                     try:
-                        # 先转换音频格式到临时WAV文件
-                        if self.convert_audio_format(source_file, temp_wav_file):
-                            # 再将WAV转换为BRE格式
-                            if self.convert_wav_to_bre(temp_wav_file, bre_file):
-                                # 删除临时WAV文件，只保留BRE文件
-                                os.remove(temp_wav_file)
-                                success_count += 1
-                            else:
-                                errors.append(f"WAV转BRE失败: {wav_file}")
+                        # 素材包是共享资源：从缓存获取已转换的BRE，缓存失效时才重新转换
+                        cached_bre = self.material_cache.get_or_convert(
+                            material_pack, source_file, os.path.join(folder_name, wav_file),
+                            cache_signature, self._convert_material_to_bre
+                        )
+                        if cached_bre:
+                            self.material_cache.place(cached_bre, bre_file)
+                            success_count += 1
+                            if file_callback:
+                                file_callback(bre_file)
                         else:
-                            errors.append(f"音频转换失败: {wav_file}")
+                            errors.append(f"素材包文件转换失败: {wav_file}")
                             
                     except Exception as e:
                         errors.append(f"处理素材包文件失败 {wav_file}: {str(e)}")
@@ -299,27 +387,34 @@ class VoicePackExporter:
             if not os.path.exists(character_dir):
                 raise FileNotFoundError(f"角色目录不存在: {character_dir}")
             
-            # 统计需要压缩的文件数量
-            total_files = 0
+            # 只遍历一次目录，收集需要压缩的文件
+            file_paths = []
             for root, dirs, files in os.walk(character_dir):
-                total_files += len(files)
+                for file in files:
+                    file_paths.append(os.path.join(root, file))
             
+            total_files = len(file_paths)
             processed_files = 0
             
-            with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(character_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # 计算在ZIP中的相对路径
-                        arcname = os.path.relpath(file_path, temp_export_dir)
-                        zipf.write(file_path, arcname)
-                        
-                        processed_files += 1
-                        
-                        # 更新进度
-                        if progress_callback:
-                            progress = processed_files / total_files if total_files > 0 else 0
-                            progress_callback(processed_files, total_files, f"压缩文件: {file}")
+            # 按压缩率逐个选择存储或压缩，PCM数据不再浪费CPU做DEFLATE
+            with StreamingZipWriter(output_zip_path, compress_workers=self.zip_compress_workers) as writer:
+                futures = []
+                for file_path in file_paths:
+                    # 计算在ZIP中的相对路径
+                    arcname = os.path.relpath(file_path, temp_export_dir)
+                    futures.append((writer.submit(file_path, arcname), os.path.basename(file_path)))
+                
+                for future, file in futures:
+                    if future:
+                        future.result()
+                    processed_files += 1
+                    
+                    # 更新进度
+                    if progress_callback:
+                        progress_callback(processed_files, total_files, f"压缩文件: {file}")
+            
+            if writer.stats['errors']:
+                raise RuntimeError("; ".join(writer.stats['errors'][:3]))
             
             self.logger.info(f"ZIP文件创建成功: {output_zip_path}")
             return True
@@ -342,6 +437,43 @@ class VoicePackExporter:
         Returns:
             dict: 包含成功状态、消息和详细信息的字典
         """
+        result = self.copy_voice_pack_to_directories(
+            source_voices_dir, [target_directory], character_name,
+            progress_callback, material_pack, stop_flag
+        )
+        targets = result['details'].pop('targets', None)
+        if targets:
+            target_result = targets[target_directory]
+            result['success'] = target_result['success']
+            result['message'] = target_result['message']
+            result['details'].update({
+                "target_path": target_result['target_path'],
+                "sync": target_result['sync'],
+                "verify": target_result['verify']
+            })
+        return result
+    
+    @metrics.traced('inject')
+    def copy_voice_pack_to_directories(self, source_voices_dir, target_directories, character_name, progress_callback=None,
+                                       material_pack=None, stop_flag=None, device_progress_callback=None):
+        """
+        转换一次语音包，并发同步到多个目标目录（多台breathKIT设备），每个目标独立校验
+        
+        Args:
+            source_voices_dir (str): 源语音文件夹路径（角色文件夹路径）
+            target_directories (list): 目标目录路径列表
+            character_name (str): 角色名称
+            progress_callback (callable): 总进度回调函数，接收(progress, message)，progress为0-100
+            material_pack (str): 素材包名称，用于获取breath和moan文件
+            stop_flag (threading.Event): 停止标志
+            device_progress_callback (callable): 单个目标的进度回调，接收(target_directory, fraction, message)
+        
+        Returns:
+            dict: 包含成功状态、消息和详细信息的字典，details['targets']为每个目标的结果
+        """
+        trace = metrics.current_job()
+        if trace is not None:
+            trace.character = character_name
         try:
             if not os.path.exists(source_voices_dir):
                 return {
@@ -350,10 +482,14 @@ class VoicePackExporter:
                     "details": {}
                 }
             
-            if not os.path.exists(target_directory):
+            if not target_directories:
+                return {"success": False, "message": "没有指定目标目录", "details": {}}
+            
+            missing_targets = [target for target in target_directories if not os.path.exists(target)]
+            if missing_targets:
                 return {
                     "success": False,
-                    "message": f"目标目录不存在: {target_directory}",
+                    "message": f"目标目录不存在: {', '.join(missing_targets)}",
                     "details": {}
                 }
             
@@ -403,28 +539,63 @@ class VoicePackExporter:
                 if stop_flag and stop_flag.is_set():
                     return {"success": False, "message": "操作被用户取消", "details": {}}
                 
-                # 第三步：拷贝到目标目录
+                # 第三步：并发增量同步到所有目标（只写入新增或变化的文件，删除过期文件）
                 if progress_callback:
-                    progress_callback(90, "开始拷贝到目标位置...")
-                
-                final_target_dir = os.path.join(target_directory, character_name)
-                
-                # 如果目标目录已存在，先删除
-                if os.path.exists(final_target_dir):
-                    shutil.rmtree(final_target_dir)
-                
-                # 拷贝整个角色文件夹到目标位置
-                shutil.copytree(temp_character_dir, final_target_dir)
-                
+                    progress_callback(90, f"开始同步到 {len(target_directories)} 个目标位置...")
+                
+                # 源文件的CRC32只计算一次，所有目标共用
+                source_entries = entries_from_folder(temp_character_dir, prefix=character_name)
+                fractions = {target: 0.0 for target in target_directories}
+                progress_lock = threading.Lock()
+                
+                def target_progress(target, fraction, msg):
+                    with progress_lock:
+                        fractions[target] = fraction
+                        overall = sum(fractions.values()) / len(fractions)
+                        if device_progress_callback:
+                            device_progress_callback(target, fraction, msg)
+                        if progress_callback:
+                            prefix = f"[{target}] " if len(target_directories) > 1 else ""
+                            progress_callback(90 + overall * 10, prefix + msg)
+                
+                # 每个目标一个线程，总耗时接近最慢的设备而不是所有设备之和
+                targets = {}
+                with ThreadPoolExecutor(max_workers=len(target_directories)) as executor:
+                    futures = {
+                        executor.submit(
+                            contextvars.copy_context().run, self._sync_to_target, temp_character_dir, target, character_name, source_entries,
+                            lambda fraction, msg, target=target: target_progress(target, fraction, msg)
+                        ): target
+                        for target in target_directories
+                    }
+                    for future in as_completed(futures):
+                        target = futures[future]
+                        try:
+                            targets[target] = future.result()
+                        except Exception as e:
+                            targets[target] = {
+                                "success": False,
+                                "message": f"同步到 {target} 时发生错误: {str(e)}",
+                                "target_path": os.path.join(target, character_name),
+                                "sync": None,
+                                "verify": None
+                            }
+                
+                succeeded = [target for target in target_directories if targets[target]['success']]
                 if progress_callback:
-                    progress_callback(100, "拷贝完成！")
+                    progress_callback(100, "同步完成！")
+                
+                message = f"语音包已同步到 {len(succeeded)}/{len(target_directories)} 个目标位置"
+                for target in target_directories:
+                    if not targets[target]['success']:
+                        message += f"\n{target}: {targets[target]['message']}"
                 
                 return {
-                    "success": True,
-                    "message": f"语音包已成功拷贝到: {final_target_dir}",
+                    "success": len(succeeded) == len(target_directories),
+                    "message": message,
                     "details": {
                         "character_name": character_name,
-                        "target_path": final_target_dir,
+                        "targets": targets,
                         "audio_files": {
                             "processed": success_count,
                             "total": total_count,
@@ -447,6 +618,50 @@ class VoicePackExporter:
                 "details": {"exception": str(e)}
             }
     
+    def _sync_to_target(self, temp_character_dir, target_directory, character_name, source_entries, progress_callback=None):
+        """
+        将转换好的角色文件夹增量同步到单个目标目录并校验
+        
+        Args:
+            progress_callback (callable): 进度回调，接收(fraction, message)，fraction为0-1
+        
+        Returns:
+            dict: {'success', 'message', 'target_path', 'sync', 'verify'}
+        """
+        final_target_dir = os.path.join(target_directory, character_name)
+        result = {"success": False, "message": "", "target_path": final_target_dir, "sync": None, "verify": None}
+        
+        # 与 export_to_device_path 相同，按目标设备的测速结果选择拷贝策略
+        from breathkit_exporter import BreathKitExporter
+        syncer = BreathKitExporter().create_device_sync(target_directory)
+        sync_report = syncer.sync(
+            source_entries,
+            lambda current, total, msg: progress_callback(current / total * 0.5, msg) if progress_callback and total > 0 else None
+        )
+        result['sync'] = sync_report
+        if sync_report['errors']:
+            result['message'] = f"同步到目标位置失败: {'; '.join(sync_report['errors'][:3])}"
+            return result
+        
+        # 写入后校验，不一致的文件重新写入
+        verify_report = syncer.verify(
+            source_entries,
+            lambda current, total, msg: progress_callback(0.5 + current / total * 0.5, msg) if progress_callback and total > 0 else None
+        )
+        result['verify'] = verify_report
+        unresolved = set(verify_report['mismatched'] + verify_report['missing']) - set(verify_report['repaired'])
+        if unresolved or verify_report['errors']:
+            result['message'] = f"写入后校验失败: {len(unresolved)} 个文件与语音包不一致"
+            return result
+        
+        if progress_callback:
+            progress_callback(1.0, "同步完成！")
+        result['success'] = True
+        result['message'] = (f"语音包已成功同步到: {final_target_dir}\n"
+                             f"新增 {len(sync_report['added'])} 个，更新 {len(sync_report['updated'])} 个，"
+                             f"删除 {len(sync_report['deleted'])} 个，未变化 {sync_report['unchanged']} 个")
+        return result
+    
     def convert_all_wav_to_bre(self, character_dir, progress_callback=None, stop_flag=None):
         """
         转换角色目录下所有WAV文件为BRE格式
@@ -503,14 +718,21 @@ class VoicePackExporter:
                 self.logger.error(error_msg)
         
         return success_count, total_count, errors
+    
+    @metrics.traced('export')
+    @profiling.profiled('export', lambda a: a['source_voices_dir'])
+    def export_voice_pack(self, character_name, source_voices_dir, output_dir, progress_callback=None, material_pack=None, stop_flag=None):
         """
         导出完整的语音包
         
+        每个BRE文件转换完成后立即交给流式ZIP写入器，打包与转换并行进行，
+        转换结束时只需等待最后几个条目写完即可。
+        
         Args:
             character_name (str): 角色名称
             source_voices_dir (str): 源语音文件夹路径
             output_dir (str): 输出目录
-            progress_callback (callable): 进度回调函数，接收(progress, message)参数
+            progress_callback (callable): 进度回调函数，接收(current, total, message)参数
             material_pack (str): 素材包名称，用于获取breath和moan文件
         
         Returns:
@@ -525,6 +747,9 @@ class VoicePackExporter:
                 }
             }
         """
+        trace = metrics.current_job()
+        if trace is not None:
+            trace.character = character_name
         try:
             # 确保输出目录存在
             os.makedirs(output_dir, exist_ok=True)
@@ -534,24 +759,51 @@ class VoicePackExporter:
                 if progress_callback:
                     progress_callback(0, 1, "开始处理语音文件...")
                 
-                # 复制并整理文件，传入素材包参数
-                success_count, total_count, errors = self.copy_and_organize_voice_files(
-                    source_voices_dir, temp_dir, character_name,
-                    lambda current, total, message: progress_callback(int(0.1 * 100 + (current / total) * 70), 100, message) if progress_callback and total > 0 else None,
-                    material_pack=material_pack
-                )
-                
-                if progress_callback:
-                    progress_callback(80, 100, "开始压缩打包...")
-                
-                # 创建ZIP文件
                 zip_filename = f"{character_name}.zip"
                 zip_path = os.path.join(output_dir, zip_filename)
                 
-                zip_success = self.create_voice_pack_zip(
-                    temp_dir, zip_path, character_name,
-                    lambda current, total, message: progress_callback(int(80 + (current / total) * 20), 100, message) if progress_callback and total > 0 else None
-                )
+                writer = StreamingZipWriter(zip_path, compress_workers=self.zip_compress_workers)
+                try:
+                    # 复制并整理文件，每个BRE生成后立即写入ZIP
+                    success_count, total_count, errors = self.copy_and_organize_voice_files(
+                        source_voices_dir, temp_dir, character_name,
+                        lambda current, total, message: progress_callback(int(0.1 * 100 + (current / total) * 70), 100, message) if progress_callback and total > 0 else None,
+                        material_pack=material_pack,
+                        stop_flag=stop_flag,
+                        file_callback=lambda bre_file: writer.submit(bre_file, os.path.relpath(bre_file, temp_dir))
+                    )
+                    
+                    if progress_callback:
+                        progress_callback(80, 100, "等待压缩打包完成...")
+                finally:
+                    with metrics.span('zip_finalize') as attrs:
+                        zip_stats = writer.close()
+                        attrs.update(files=zip_stats['files'], bytes_in=zip_stats['bytes_in'],
+                                     bytes_out=zip_stats['bytes_out'])
+                    metrics.inc('zip_bytes_total', zip_stats['bytes_out'], help_text='ZIP写出字节数')
+                
+                if stop_flag and stop_flag.is_set():
+                    # 用户停止导出：删除不完整的ZIP，不返回成功
+                    if os.path.exists(zip_path):
+                        os.remove(zip_path)
+                    self.logger.info(f"导出已停止，已删除不完整的语音包: {zip_path}")
+                    return {
+                        'success': False,
+                        'zip_path': None,
+                        'message': "操作被用户取消",
+                        'stats': {
+                            'success_count': success_count,
+                            'total_count': total_count,
+                            'errors': errors
+                        }
+                    }
+                
+                zip_success = zip_stats['files'] > 0 and not zip_stats['errors']
+                if zip_success:
+                    self.logger.info(
+                        f"ZIP文件创建成功: {zip_path} "
+                        f"(存储 {zip_stats['stored']} 个, 压缩 {zip_stats['deflated']} 个)"
+                    )
                 
                 if progress_callback:
                     progress_callback(100, 100, "导出完成！")
@@ -575,7 +827,7 @@ class VoicePackExporter:
                         'stats': {
                             'success_count': success_count,
                             'total_count': total_count,
-                            'errors': errors
+                            'errors': errors + zip_stats['errors']
                         }
                     }
                     
@@ -591,4 +843,4 @@ class VoicePackExporter:
                     'total_count': 0,
                     'errors': [error_msg]
                 }
-            }
\ No newline at end of file
+            }
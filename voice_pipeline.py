@@ -0,0 +1,194 @@
+import os
+import csv
+import time
+import shutil
+import base64
+import metrics
+
+# TTS服务接口
+TTS_API_URL = "https://tts.ioioioioio.com:1120/breathvoice/single-tts"
+TTS_VOICE_GROUPS_URL = "https://tts.ioioioioio.com:1120/breathvoice/voice-groups"
+
+# 文件名关键词到语音子文件夹的映射（breath和moan由素材包提供）
+AUDIO_KEYWORD_FOLDERS = {
+    "greeting": "greeting",
+    "impact": "impact",
+    "reaction": "reaction",
+    "tease": "tease",
+    "long": "touch",
+    "short": "touch",
+    "orgasm": "orgasm"
+}
+
+# 台词集文件名中的语言代码
+LANGUAGE_CODES = {"中文": "zh", "English": "en", "日本語": "ja"}
+
+
+def call_single_tts_api(text, filename, voice_group_id, character_dir, timeout=60):
+    """
+    调用单条TTS生成接口，音频写入角色目录下的temp文件夹
+
+    Args:
+        text (str): 台词文本
+        filename (str): 音频文件名（如 动作参数.wav）
+        voice_group_id (str): 语音ID
+        character_dir (str): 角色目录
+        timeout (float): 请求超时（秒）
+
+    Returns:
+        dict: {'success': bool, 'audio_path': str（成功时）, 'message': str}
+    """
+    import requests
+
+    with metrics.span('tts_request', voice_group=voice_group_id) as attrs:
+        result = _request_single_tts(requests, text, filename, voice_group_id, character_dir, timeout)
+        attrs.update(chars=len(text or ''), success=result['success'])
+    metrics.inc('tts_requests_total', help_text='TTS请求次数', status='ok' if result['success'] else 'error')
+    return result
+
+
+def _request_single_tts(requests, text, filename, voice_group_id, character_dir, timeout):
+    """call_single_tts_api的实际请求部分"""
+    try:
+        # 准备单条TTS请求数据
+        payload = {
+            "text": text,
+            "filename": filename,
+            "voice_group_id": voice_group_id
+        }
+
+        # 发送单条TTS请求
+        response = requests.post(
+            TTS_API_URL,
+            json=payload,
+            headers={'Content-Type': 'application/json'},
+            timeout=timeout,  # 单条请求超时时间
+            verify=False  # 忽略SSL证书验证
+        )
+
+        if response.status_code != 200:
+            return {"success": False, "message": f"HTTP错误: {response.status_code}"}
+
+        result = response.json()
+        if not result.get("success", False):
+            return {"success": False, "message": f"API错误: {result.get('error', '未知错误')}"}
+
+        # 获取base64编码的音频数据
+        audio_data = result.get("audio_data", "")
+        if not audio_data:
+            return {"success": False, "message": "API返回的音频数据为空"}
+
+        # 写入角色目录下的temp文件夹
+        temp_dir = os.path.join(character_dir, "temp")
+        os.makedirs(temp_dir, exist_ok=True)
+        audio_file_path = os.path.join(temp_dir, filename)
+        with open(audio_file_path, 'wb') as f:
+            f.write(base64.b64decode(audio_data))
+
+        return {"success": True, "audio_path": audio_file_path, "message": "生成成功"}
+
+    except requests.exceptions.Timeout:
+        return {"success": False, "message": "请求超时"}
+    except requests.exceptions.RequestException as e:
+        return {"success": False, "message": f"网络错误: {str(e)}"}
+    except Exception as e:
+        return {"success": False, "message": f"生成失败: {str(e)}"}
+
+
+def audio_folder_for(filename):
+    """按文件名关键词返回目标子文件夹，没有匹配时返回None"""
+    lower = filename.lower()
+    for keyword, folder_name in AUDIO_KEYWORD_FOLDERS.items():
+        if keyword in lower:
+            return folder_name
+    return None
+
+
+def classify_audio_files(character_dir):
+    """
+    将temp文件夹中的WAV按文件名关键词移动到角色目录下对应的子文件夹
+
+    Returns:
+        dict: {原路径: 新路径}，temp文件夹不存在时为空
+    """
+    temp_dir = os.path.join(character_dir, "temp")
+    moved_files = {}
+    if not os.path.isdir(temp_dir):
+        return moved_files
+
+    for filename in os.listdir(temp_dir):
+        if not filename.endswith('.wav'):
+            continue
+        folder_name = audio_folder_for(filename)
+        if folder_name is None:
+            continue
+        source_path = os.path.join(temp_dir, filename)
+        target_folder = os.path.join(character_dir, folder_name)
+        os.makedirs(target_folder, exist_ok=True)
+        target_path = os.path.join(target_folder, filename)
+        try:
+            shutil.move(source_path, target_path)
+            moved_files[source_path] = target_path
+        except Exception as e:
+            print(f"移动文件失败 {filename}: {e}")
+    return moved_files
+
+
+def find_generated_audio(character_dir, filename):
+    """查找已生成的音频（temp文件夹或已分类的子文件夹），不存在时返回None"""
+    candidates = [os.path.join(character_dir, "temp", filename)]
+    folder_name = audio_folder_for(filename)
+    if folder_name:
+        candidates.append(os.path.join(character_dir, folder_name, filename))
+    for path in candidates:
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            return path
+    return None
+
+
+def read_dialogue_csv(csv_path):
+    """
+    读取台词集CSV（第1列动作参数，第2列台词），跳过标题行和空行
+
+    Returns:
+        list: [(动作参数, 台词)]
+    """
+    dialogues = []
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 2:
+                continue
+            action_param, dialogue = row[0].strip(), row[1]
+            if action_param and dialogue.strip():
+                dialogues.append((action_param, dialogue))
+    return dialogues
+
+
+def write_dialogue_csv(script_dir, language, dialogues):
+    """
+    将台词保存为角色script文件夹中的台词集CSV（dialogue_<语言>_<日期>_<时间>.csv）
+
+    Returns:
+        str: 文件路径
+    """
+    os.makedirs(script_dir, exist_ok=True)
+    lang_code = LANGUAGE_CODES.get(language, "zh") if isinstance(language, str) else "zh"
+    date_str = time.strftime("%Y%m%d")
+    time_str = time.strftime("%H%M%S")
+    file_path = os.path.join(script_dir, f"dialogue_{lang_code}_{date_str}_{time_str}.csv")
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["动作参数", "台词"])  # 标题行
+        for action_param, line in dialogues:
+            writer.writerow([action_param, line or ""])
+    return file_path
+
+
+def latest_dialogue_csv(script_dir):
+    """返回script文件夹中最新的台词集CSV，不存在时返回None"""
+    if not os.path.isdir(script_dir):
+        return None
+    csv_files = [os.path.join(script_dir, f) for f in os.listdir(script_dir) if f.endswith('.csv')]
+    return max(csv_files, key=os.path.getmtime) if csv_files else None
@@ -0,0 +1,177 @@
+import os
+import struct
+
+# 读取/混缩流程的版本，输出的采样数据发生变化时递增（缓存签名使用）
+READER_VERSION = 2
+
+# WAV格式编码
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# 可直接映射为NumPy数组的(格式, 位深) -> dtype
+_MEMMAP_DTYPES = {
+    (WAVE_FORMAT_PCM, 8): 'u1',
+    (WAVE_FORMAT_PCM, 16): '<i2',
+    (WAVE_FORMAT_PCM, 32): '<i4',
+    (WAVE_FORMAT_IEEE_FLOAT, 32): '<f4',
+    (WAVE_FORMAT_IEEE_FLOAT, 64): '<f8',
+}
+
+
+def read_wav_info(wav_path):
+    """
+    逐块解析RIFF/WAVE头部，支持LIST、fact等附加块以及WAVE_FORMAT_EXTENSIBLE
+
+    Args:
+        wav_path (str): WAV文件路径
+
+    Returns:
+        dict: WAV信息；不是有效WAV文件时返回None
+            {'file_size', 'audio_format', 'num_channels', 'sample_rate', 'byte_rate',
+             'block_align', 'bits_per_sample', 'data_offset', 'data_size', 'num_frames',
+             'duration', 'header_size', 'chunks'}
+    """
+    try:
+        actual_size = os.path.getsize(wav_path)
+        with open(wav_path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12:
+                return None
+            riff, riff_size, wave = struct.unpack('<4sI4s', header)
+            if riff != b'RIFF' or wave != b'WAVE':
+                return None
+
+            fmt = None
+            data_offset = None
+            data_size = None
+            chunks = []
+            position = 12
+
+            while position + 8 <= actual_size:
+                f.seek(position)
+                chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+                chunks.append(chunk_id.decode('ascii', errors='replace'))
+                body_offset = position + 8
+
+                if chunk_id == b'fmt ':
+                    fmt_data = f.read(min(chunk_size, 40))
+                    if len(fmt_data) < 16:
+                        return None
+                    audio_format, num_channels, sample_rate, byte_rate, block_align, bits_per_sample = \
+                        struct.unpack('<HHIIHH', fmt_data[:16])
+                    # 扩展格式：真实编码在SubFormat GUID的前两个字节
+                    if audio_format == WAVE_FORMAT_EXTENSIBLE and len(fmt_data) >= 26:
+                        audio_format = struct.unpack('<H', fmt_data[24:26])[0]
+                    fmt = (audio_format, num_channels, sample_rate, byte_rate, block_align, bits_per_sample)
+
+                elif chunk_id == b'data':
+                    data_offset = body_offset
+                    # 流式写入的文件可能使用0或0xFFFFFFFF占位，以实际文件大小为准
+                    available = actual_size - body_offset
+                    data_size = chunk_size if 0 < chunk_size <= available else available
+                    if fmt is not None:
+                        break
+
+                # 块按偶数字节对齐
+                position = body_offset + chunk_size + (chunk_size & 1)
+
+            if fmt is None or data_offset is None:
+                return None
+
+            audio_format, num_channels, sample_rate, byte_rate, block_align, bits_per_sample = fmt
+            if num_channels == 0 or sample_rate == 0:
+                return None
+            if block_align == 0:
+                block_align = num_channels * ((bits_per_sample + 7) // 8)
+            num_frames = data_size // block_align if block_align else 0
+
+            return {
+                'file_size': riff_size,
+                'audio_format': audio_format,
+                'num_channels': num_channels,
+                'sample_rate': sample_rate,
+                'byte_rate': byte_rate,
+                'block_align': block_align,
+                'bits_per_sample': bits_per_sample,
+                'data_offset': data_offset,
+                'data_size': data_size,
+                'num_frames': num_frames,
+                'duration': num_frames / sample_rate,
+                'header_size': data_offset,
+                'chunks': chunks
+            }
+    except (OSError, struct.error) as e:
+        print(f"Error reading {wav_path}: {e}")
+        return None
+
+
+def open_wav_memmap(wav_path, info=None):
+    """
+    以内存映射方式打开WAV的PCM数据（零拷贝）
+
+    Args:
+        wav_path (str): WAV文件路径
+        info (dict): 已解析的WAV信息，省略时自动解析
+
+    Returns:
+        tuple: (形状为(帧数, 声道数)的只读numpy数组, WAV信息)；
+               格式无法直接映射（如24bit）时返回(None, info)
+    """
+    import numpy as np
+
+    if info is None:
+        info = read_wav_info(wav_path)
+    if info is None:
+        return None, None
+
+    dtype = _MEMMAP_DTYPES.get((info['audio_format'], info['bits_per_sample']))
+    if dtype is None or info['block_align'] != info['num_channels'] * np.dtype(dtype).itemsize:
+        return None, info
+
+    shape = (info['num_frames'], info['num_channels'])
+    if info['num_frames'] == 0:
+        return np.zeros(shape, dtype=dtype), info
+    view = np.memmap(wav_path, dtype=dtype, mode='r', offset=info['data_offset'], shape=shape)
+    return view, info
+
+
+def pcm_to_float32_mono(view, block_frames=262144):
+    """
+    将映射的PCM数据分块转换为[-1, 1)范围的float32单声道数组
+
+    每次只物化一个块，长音频不会整段转换为float64。
+
+    Args:
+        view (numpy.ndarray): open_wav_memmap返回的(帧数, 声道数)数组
+        block_frames (int): 每块的帧数
+
+    Returns:
+        numpy.ndarray: float32单声道数据
+    """
+    import numpy as np
+
+    num_frames, num_channels = view.shape
+    kind = view.dtype.kind
+    if kind == 'u':
+        offset, scale = 128.0, 1.0 / 128.0
+    elif kind == 'i':
+        offset, scale = 0.0, 1.0 / float(2 ** (view.dtype.itemsize * 8 - 1))
+    else:
+        offset, scale = 0.0, 1.0
+
+    output = np.empty(num_frames, dtype=np.float32)
+    for start in range(0, num_frames, block_frames):
+        end = min(start + block_frames, num_frames)
+        block = np.asarray(view[start:end], dtype=np.float32)
+        if num_channels > 1:
+            # 取平均值转换为单声道
+            mono = block.mean(axis=1, dtype=np.float32)
+        else:
+            mono = block[:, 0]
+        if offset:
+            mono -= offset
+        if scale != 1.0:
+            mono *= scale
+        output[start:end] = mono
+    return output